@@ -1,60 +1,146 @@
 # Bioemu Inference Runner
 # This script will run Bioemu Inference
 
-# Arguments: {pdb_id} {structure_fasta | structure} {num_samples}
-# Outputs a merged/multi-conformer PDB file to provided output path
+# Arguments: {pdb_id} {topology_output_path} {structure_fasta | structure} {num_samples} [seed]
+# Moves the raw samples next to the provided topology path: topology.pdb (single frame) + bioemu.xtc.
+# The multi-model PDB is only written once, aligned, by postprocess.py.
+
+# MSAs/embeddings are cached per sequence under ./bin/bioemu_embeds/<sequence hash>/ and reused across runs;
+# sampling diversity comes from the seed (a fresh one is drawn and logged when none is given).
 
 
 import sys
 import os
+import functools
+import hashlib
+import importlib
+import inspect
 import pandas as pd
 import shutil
 import random
+import numpy as np
 
-from bioemu.sample import main as sample
-from scripts.helpers import dcd_to_pdb
-import mdtraj as md
+BIOEMU_CACHE_ROOT = "./bin/bioemu_embeds"
 
 
-# merges the xtc samples and topology into a single PDB file with multiple conformations
-def makeABigPDBFile(pdbId, tmp_path, output_path):
-    xtc_file = os.path.join(tmp_path, 'samples.xtc')
-    topology_file = os.path.join(tmp_path, 'topology.pdb')
-    
-    if not os.path.exists(xtc_file) or not os.path.exists(topology_file):
-        print(f"[bioemu: inference.py] Files not found for {pdbId} in {tmp_path}. Skipping.")
-        return None
+def sequence_cache_dir(sequence):
+    return os.path.join(BIOEMU_CACHE_ROOT, hashlib.sha256(sequence.encode()).hexdigest()[:16])
 
-    dcd_to_pdb.dcd_to_pdb(xtc_file, topology_file, output_path)
-    print(f"[bioemu: inference.py] Saved combined PDB for {pdbId} at {output_path}")
-    return output_path
 
+def new_seed():
+    return int.from_bytes(os.urandom(4), "little") >> 1
+
+
+def seed_everything(seed):
+    import torch
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+
+# Samplers write samples.xtc + topology.pdb (bioemu's output layout) into output_dir
+class BioEmuSampler:
+    def __init__(self):
+        import bioemu.sample
+        self.bioemu_sample = bioemu.sample
+        # keep the loaded weights for every later target in this process
+        if hasattr(bioemu.sample, 'load_model') and not hasattr(bioemu.sample.load_model, 'cache_info'):
+            bioemu.sample.load_model = functools.lru_cache(maxsize=None)(bioemu.sample.load_model)
+        self.parameters = inspect.signature(bioemu.sample.main).parameters
+
+    def sample(self, sequence, num_samples, output_dir, seed, cache_dir):
+        seed_everything(seed)
+        sample_options = {}
+        if 'cache_embeds_dir' in self.parameters:
+            sample_options['cache_embeds_dir'] = cache_dir
+        if 'base_seed' in self.parameters:
+            sample_options['base_seed'] = seed
+
+        self.bioemu_sample.main(sequence=sequence, 
+                                num_samples=num_samples, 
+                                output_dir=output_dir,
+                                **sample_options)
+
+
+class StubSampler:
+    # CPU-only stand-in: a noisy straight backbone per sample, for testing the orchestration
+    def sample(self, sequence, num_samples, output_dir, seed, cache_dir):
+        import mdtraj as md
+        from scripts.helpers.pdb_sequence_maker import AMINO_ACID_TO_LETTER
+        letter_to_residue = {letter: name for name, letter in AMINO_ACID_TO_LETTER.items()}
+
+        topology = md.Topology()
+        chain = topology.add_chain()
+        for i, letter in enumerate(sequence):
+            residue = topology.add_residue(letter_to_residue.get(letter, "UNK"), chain, resSeq=i + 1)
+            for atom_name in ("N", "CA", "C", "O"):
+                topology.add_atom(atom_name, md.element.get_by_symbol(atom_name[0]), residue)
 
-def runBioemu(pdb_id, output_path, structure_fasta, num_samples):
+        rng = np.random.default_rng(seed)
+        offsets = np.array([[0.0, 0.0, 0.0], [0.145, 0.0, 0.0], [0.24, 0.1, 0.0], [0.23, 0.22, 0.0]])
+        frame = (np.arange(len(sequence))[:, None, None] * np.array([0.38, 0.0, 0.0]) + offsets).reshape(-1, 3)
+        xyz = frame[None] + rng.normal(scale=0.05, size=(num_samples, *frame.shape))
+        trajectory = md.Trajectory(xyz.astype(np.float32), topology)
+        trajectory[0].save_pdb(os.path.join(output_dir, 'topology.pdb'))
+        trajectory.save_xtc(os.path.join(output_dir, 'samples.xtc'))
+
+
+SAMPLERS = {'bioemu': BioEmuSampler, 'stub': StubSampler}
+
+
+def get_sampler(name):
+    # a registered name, or "module:Class" for any object with the same sample() signature
+    if name in SAMPLERS:
+        return SAMPLERS[name]()
+    module_name, class_name = name.split(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+def runBioemu(pdb_id, output_path, structure_fasta, num_samples, seed=None, sampler=None):
     print(f"[bioemu: inference.py] Processing {pdb_id}...")
+    if sampler is None:
+        sampler = BioEmuSampler()
     
     temp_output_dir = os.path.join('./temp', pdb_id.lower())
+    shutil.rmtree(temp_output_dir, ignore_errors=True) # bioemu skips batches already in output_dir
     os.makedirs(temp_output_dir, exist_ok=True)
-    
-    sample(sequence=structure_fasta, 
-           num_samples=num_samples, 
-           output_dir=temp_output_dir)
 
-    makeABigPDBFile(pdb_id, temp_output_dir, output_path)
-    shutil.copyfile(os.path.join(temp_output_dir, 'samples.xtc'), './PDBs/' + pdb_id.lower() + '/bioemu_bin/bioemu.xtc')
+    if seed is None:
+        seed = new_seed()
+
+    cache_dir = sequence_cache_dir(structure_fasta)
+    os.makedirs(cache_dir, exist_ok=True)
+    cached = len(os.listdir(cache_dir)) > 0
+    print(f"[bioemu: inference.py] Seed {seed}, embeddings cache {cache_dir} ({'reused' if cached else 'new'})")
+    bin_dir = os.path.dirname(output_path)
+    os.makedirs(bin_dir, exist_ok=True)
+    with open(os.path.join(bin_dir, 'seed.txt'), 'w') as f:
+        f.write(f"{seed}\n")
+
+    sampler.sample(structure_fasta, num_samples, temp_output_dir, seed, cache_dir)
+
+    if not os.path.exists(os.path.join(temp_output_dir, 'samples.xtc')) or not os.path.exists(os.path.join(temp_output_dir, 'topology.pdb')):
+        print(f"[bioemu: inference.py] Files not found for {pdb_id} in {temp_output_dir}. Skipping.")
+        return None
+    # same filesystem: renames, no trajectory conversion
+    shutil.move(os.path.join(temp_output_dir, 'topology.pdb'), output_path)
+    shutil.move(os.path.join(temp_output_dir, 'samples.xtc'), os.path.join(bin_dir, 'bioemu.xtc'))
     shutil.rmtree(temp_output_dir, ignore_errors=True)
+    print(f"[bioemu: inference.py] Saved samples for {pdb_id} to {bin_dir}")
+    return output_path
 
 if __name__ == "__main__":
     print("[bioemu: inference.py] Starting inference with bioemu")
     
     if len(sys.argv) < 5:
-        print("[bioemu: inference.py] Usage: python inference.py <pdb_id> <output_path> <structure_fasta> <num_samples>")
+        print("[bioemu: inference.py] Usage: python inference.py <pdb_id> <topology_output_path> <structure_fasta> <num_samples> [seed]")
         sys.exit(1)
     
     pdb_id = sys.argv[1]
     output_path = sys.argv[2]
     structure_fasta = sys.argv[3]
     num_samples = int(sys.argv[4])
+    seed = int(sys.argv[5]) if len(sys.argv) > 5 else None
     
-    runBioemu(pdb_id, output_path, structure_fasta, num_samples)
+    runBioemu(pdb_id, output_path, structure_fasta, num_samples, seed)
     print(f"[bioemu: inference.py] Inference completed. Output saved to {output_path}")
\ No newline at end of file
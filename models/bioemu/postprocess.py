@@ -0,0 +1,87 @@
+# Bioemu Post-processing
+# Turns the raw BioEmu samples in ./PDBs/<pdb_id>/bioemu_bin/ (topology.pdb + bioemu.xtc) into the aligned ensemble.
+
+# Arguments: {pdb_id} [--xtc]
+# Sidechains are rebuilt by bioemu.sidechain_relax, whose output trajectory is loaded once and kept in memory:
+# every frame is superposed on the deposited CA trace, the transforms are stored (transform_store "mdtraj",
+# applied) and <pdb_id>_ensemble.pdb is written exactly once. --xtc also keeps a compressed copy
+# (<pdb_id>_ensemble.xtc). Phaser placement (align_with_phaser.sh) runs on that file as before.
+
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import mdtraj as md
+import numpy as np
+
+from scripts.helpers import transform_store
+from scripts.helpers.align_with_symmetry import get_deposited_ca, get_ensemble_ca, match_residues
+
+
+def rebuild_sidechains(bin_dir):
+    topology_path = os.path.join(bin_dir, "topology.pdb")
+    xtc_path = os.path.join(bin_dir, "bioemu.xtc")
+    subprocess.run([sys.executable, "-m", "bioemu.sidechain_relax",
+                    "--pdb-path", topology_path, "--xtc-path", xtc_path, "--outpath", bin_dir], check=True)
+    return md.load(os.path.join(bin_dir, "samples_sidechain_rec.xtc"),
+                   top=os.path.join(bin_dir, "samples_sidechain_rec.pdb"))
+
+
+def superpose_on_deposited(ensemble, deposited_path):
+    # per-frame CA fit (Å), residues matched by number/name rather than by atom index
+    reference_residues, reference_ca = get_deposited_ca(deposited_path)
+    ensemble_residues, ca_indices = get_ensemble_ca(ensemble)
+    reference_index, mobile_index = match_residues(reference_residues, ensemble_residues)
+    if len(reference_index) < 3:
+        return None, None
+
+    mobile = ensemble.xyz[:, ca_indices[mobile_index]].astype(np.float64) * 10.0
+    reference = np.broadcast_to(reference_ca[reference_index], mobile.shape)
+    rotation, translation = transform_store.kabsch(mobile, reference)
+
+    xyz = ensemble.xyz.astype(np.float64) * 10.0
+    ensemble.xyz = (transform_store.apply_transform(xyz, rotation, translation) / 10.0).astype(np.float32)
+    return rotation, translation
+
+
+def postprocess(pdb_id, write_xtc=False):
+    pdb_id = pdb_id.lower()
+    pdb_dir = f"./PDBs/{pdb_id}"
+    bin_dir = f"{pdb_dir}/bioemu_bin"
+
+    ensemble = rebuild_sidechains(bin_dir)
+    print(f"[bioemu: postprocess.py] Rebuilt sidechains of {pdb_id}: {ensemble.n_frames} frames")
+
+    rotation, translation = superpose_on_deposited(ensemble, f"{pdb_dir}/{pdb_id}_final.pdb")
+    if rotation is None:
+        print(f"[bioemu: postprocess.py] No matching CA atoms between {pdb_id} and its deposited model, writing unaligned")
+
+    ensemble_path = f"{bin_dir}/{pdb_id}_ensemble.pdb"
+    ensemble.save_pdb(ensemble_path)
+    if write_xtc:
+        ensemble.save_xtc(f"{bin_dir}/{pdb_id}_ensemble.xtc")
+    if rotation is not None:
+        transform_store.save_transform(pdb_id, "bioemu", "mdtraj", rotation, translation, ensemble_path, applied=True)
+    print(f"[bioemu: postprocess.py] Saved aligned ensemble of {pdb_id} to {ensemble_path}")
+    return ensemble_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sidechains, superposition and ensemble write for BioEmu samples")
+    parser.add_argument("pdb_id")
+    parser.add_argument("--xtc", action="store_true", help="Also write a compressed <pdb_id>_ensemble.xtc")
+    args = parser.parse_args()
+
+    start_ms_timestamp = int(time.time() * 1000)
+
+    postprocess(args.pdb_id, write_xtc=args.xtc)
+
+    elapsed_time_ms = int(time.time() * 1000) - start_ms_timestamp
+    os.makedirs("./bin/timings", exist_ok=True)
+    with open("./bin/timings/bioemu_postprocess.csv", "a") as f:
+        f.write(f"{args.pdb_id.lower()},{elapsed_time_ms}\n")
+
+    sys.exit(0)
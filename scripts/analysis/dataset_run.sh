@@ -25,6 +25,9 @@ PREDICTOR_TYPES=("bioemu" "sam2" "alphaflow" "boltz2" "openfold")
 for PDBID in $(cat $DATASET_TXT); do
     #for PREDICTOR in "${PREDICTOR_TYPES[@]}"; do
     #    echo "Running $SCRIPT_NAME for $PDBID... and $PREDICTOR"
+        START_MS=$(date +%s%3N)
         "./scripts/analysis/$SCRIPT_NAME" "$PDBID" # "$PREDICTOR" #"--mode" "backbone"
+        EXIT_CODE=$?
+        python ./scripts/helpers/status_index.py record-run "$SCRIPT_NAME" "$PDBID" "$EXIT_CODE" $(( $(date +%s%3N) - START_MS ))
     #done
 done
\ No newline at end of file
@@ -7,7 +7,6 @@ import sys
 import os
 import json
 import numpy as np
-import mdtraj as md
 import tempfile
 import pandas as pd
 import argparse
@@ -17,6 +16,11 @@ import threading
 import subprocess
 import shutil
 
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from scripts.helpers.lazy_imports import lazy_import
+
+md = lazy_import("mdtraj")
+
 local_temp = threading.local()
 
 # density-fitness rejecting PDBs for not having HEADER at top
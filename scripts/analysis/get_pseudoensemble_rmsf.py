@@ -0,0 +1,161 @@
+# get_pseudoensemble_rmsf.py [--mapping_file bin/protein_classes/include.txt] [--output_dir bin/protein_classes]
+# Class-level baseline RMSF from a pseudo-ensemble of deposited multiconformer structures (tests/pseudoensemble_deposited):
+# every class in the mapping file ("class,pdb" lines) pools the altlocs of its members' ./PDBs/<pdb>/<pdb>_final.pdb.
+# Writes <output_dir>/rmsfs.csv (class,residue,rmsf) and <output_dir>/include.csv (class,pdb), the two files
+# class_rmsf_condensed.py reads, in the format of tests/pseudoensemble_deposited/info.txt: lowercase class keys
+# (cypa, lysozyme, ubi, stn) and 0-based residue indices along the chain of the class's first member.
+
+# Members are put on the first member's residue numbering the way get_rmsf_cosine_similarity.py matches predictors
+# (most common offset between same-named residues), and only heavy atoms every member has are kept. Members are
+# superposed in-process on the occupancy-weighted CA positions of those residues (batched Kabsch, refined against the
+# mean structure), then each member's altlocs become conformers weighted by occupancy / member, so every member counts
+# once. The RMSF of all conformers of all members is then the same bincount reduction as get_rmsf_baseline.py.
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from scripts.analysis.get_rmsf_baseline import altloc_rmsf, read_atoms
+from scripts.helpers.residue_numbering import numbering_offset
+from scripts.helpers.protein_classes import read_class_mapping
+
+SUPERPOSE_ROUNDS = 3
+
+
+def class_key(protein_class):
+    # include.txt labels (CypA, Lysozyme, UBI, STN) as the lowercase keys of rmsfs.csv
+    return protein_class.strip().lower()
+
+
+def read_member(pdb_id):
+    # heavy atoms of the first chain of ./PDBs/<pdb_id>/<pdb_id>_final.pdb, None when missing
+    pdb_path = f"./PDBs/{pdb_id.lower()}/{pdb_id.lower()}_final.pdb"
+    if not os.path.exists(pdb_path):
+        print(f"[get_pseudoensemble_rmsf.py] Warning: {pdb_path} not found, skipping {pdb_id}...")
+        return None
+    atoms = read_atoms(pdb_path)
+    if atoms.empty:
+        print(f"[get_pseudoensemble_rmsf.py] Warning: no protein atoms in {pdb_path}, skipping {pdb_id}...")
+        return None
+    return atoms[(atoms['Chain'] == atoms['Chain'].iloc[0]) & (atoms['icode'] == ' ')].copy()
+
+
+def map_members(members):
+    # one frame of all members on the first member's numbering: member,residue,AA,atom,occupancy,x,y,z,
+    # restricted to (residue, atom) pairs every member has
+    reference = members[0].drop_duplicates('resseq')
+    reference_residues = reference['resseq'].to_numpy(dtype=np.int64)
+    reference_names = reference['AA'].to_numpy()
+
+    mapped = []
+    for member, atoms in enumerate(members):
+        residues = atoms.drop_duplicates('resseq')
+        offset = numbering_offset(residues['resseq'].to_numpy(dtype=np.int64), residues['AA'].to_numpy(),
+                                  reference_residues, reference_names)
+        atoms = atoms.assign(member=member, residue=atoms['resseq'] + offset)
+        mapped.append(atoms[['member', 'residue', 'AA', 'atom', 'occupancy', 'x', 'y', 'z']])
+    mapped = pd.concat(mapped, ignore_index=True)
+
+    # same residue type and atom in every member
+    shared = mapped.groupby(['residue', 'AA', 'atom'])['member'].nunique()
+    shared = shared[shared == len(members)].reset_index()[['residue', 'AA', 'atom']]
+    return mapped.merge(shared, on=['residue', 'AA', 'atom'])
+
+
+def kabsch(mobile, target):
+    # rotations (n, 3, 3) and translations (n, 3) that best put each of mobile (n, k, 3) onto target (k, 3)
+    mobile_center = mobile.mean(axis=1)
+    target_center = target.mean(axis=0)
+    covariance = np.swapaxes(mobile - mobile_center[:, None], 1, 2) @ (target - target_center)
+    u, _, vt = np.linalg.svd(covariance)
+    sign = np.sign(np.linalg.det(np.swapaxes(vt, 1, 2) @ np.swapaxes(u, 1, 2)))
+    correction = np.tile(np.eye(3), (len(mobile), 1, 1))
+    correction[:, 2, 2] = sign
+    rotations = np.swapaxes(vt, 1, 2) @ correction @ np.swapaxes(u, 1, 2)
+    translations = target_center - np.einsum('nij,nj->ni', rotations, mobile_center)
+    return rotations, translations
+
+
+def superpose(mapped, n_members):
+    # mapped with x,y,z of every member moved onto the (refined) mean of the members' CA traces
+    ca = mapped[mapped['atom'] == 'CA'].copy()
+    ca['w'] = ca['occupancy'].where(ca['occupancy'] > 0, 1.0)
+    for axis in ('x', 'y', 'z'):
+        ca[axis] = ca[axis] * ca['w']
+    ca = ca.groupby(['member', 'residue'])[['x', 'y', 'z', 'w']].sum()
+    traces = (ca[['x', 'y', 'z']].to_numpy() / ca[['w']].to_numpy()).reshape(n_members, -1, 3)
+    if traces.shape[1] < 3:
+        raise ValueError("fewer than 3 shared CA atoms to superpose on")
+
+    target = traces[0]
+    for _ in range(SUPERPOSE_ROUNDS):
+        rotations, translations = kabsch(traces, target)
+        target = (np.einsum('nij,nkj->nki', rotations, traces) + translations[:, None]).mean(axis=0)
+
+    members = mapped['member'].to_numpy()
+    coords = mapped[['x', 'y', 'z']].to_numpy(dtype=np.float64)
+    moved = np.einsum('nij,nj->ni', rotations[members], coords) + translations[members]
+    return mapped.assign(x=moved[:, 0], y=moved[:, 1], z=moved[:, 2])
+
+
+def class_rmsf(pdb_ids):
+    # residue,rmsf of one class, None when fewer than two members could be read
+    members = [atoms for atoms in (read_member(pdb_id) for pdb_id in pdb_ids) if atoms is not None]
+    if len(members) < 2:
+        return None
+
+    mapped = superpose(map_members(members), len(members))
+
+    # altlocs of a member share its weight: occupancy normalised per member and atom
+    occupancy = mapped['occupancy'].where(mapped['occupancy'] > 0, 1.0)
+    mapped['occupancy'] = occupancy / occupancy.groupby([mapped['member'], mapped['residue'], mapped['atom']]).transform('sum')
+
+    pooled = mapped.assign(Chain='', resseq=mapped['residue'], icode=' ')
+    rmsf_df = altloc_rmsf(pooled).sort_values('resseq')
+
+    # first member's residue numbers -> 0-based position along its chain
+    reference_residues = np.unique(members[0]['resseq'].to_numpy(dtype=np.int64))
+    residues = np.searchsorted(reference_residues, rmsf_df['resseq'].to_numpy(dtype=np.int64))
+    return pd.DataFrame({'residue': residues, 'rmsf': rmsf_df['RMSF'].to_numpy()})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Class baseline RMSF from superposed deposited multiconformer structures")
+    parser.add_argument("--mapping_file", default="bin/protein_classes/include.txt", help="class,pdb lines")
+    parser.add_argument("--output_dir", default="bin/protein_classes")
+    args = parser.parse_args()
+
+    mapping = {}
+    # a malformed line raises with its line number rather than being skipped
+    for protein_class, pdb_ids in read_class_mapping(args.mapping_file).items():
+        mapping.setdefault(class_key(protein_class), []).extend(pdb_id.lower() for pdb_id in pdb_ids)
+    if not mapping:
+        print(f"[get_pseudoensemble_rmsf.py] No classes in {args.mapping_file}")
+        sys.exit(1)
+
+    class_dfs = []
+    for protein_class, pdb_ids in mapping.items():
+        try:
+            rmsf_df = class_rmsf(pdb_ids)
+        except ValueError as e:
+            print(f"[get_pseudoensemble_rmsf.py] {protein_class}: {e}, skipping...")
+            continue
+        if rmsf_df is None:
+            print(f"[get_pseudoensemble_rmsf.py] {protein_class}: fewer than two structures, skipping...")
+            continue
+        print(f"[get_pseudoensemble_rmsf.py] {protein_class}: {len(pdb_ids)} structures, {len(rmsf_df)} shared residues, "
+              f"mean RMSF {rmsf_df['rmsf'].mean():.3f}")
+        class_dfs.append(rmsf_df.assign(**{'class': protein_class})[['class', 'residue', 'rmsf']])
+
+    if not class_dfs:
+        sys.exit(1)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    pd.concat(class_dfs, ignore_index=True).to_csv(os.path.join(args.output_dir, "rmsfs.csv"), index=False)
+    pd.DataFrame([(protein_class, pdb_id) for protein_class, pdb_ids in mapping.items() for pdb_id in pdb_ids],
+                 columns=['class', 'pdb']).to_csv(os.path.join(args.output_dir, "include.csv"), index=False)
+    print(f"[get_pseudoensemble_rmsf.py] Class RMSF saved to {os.path.join(args.output_dir, 'rmsfs.csv')}")
@@ -0,0 +1,126 @@
+# get_rmsf_baseline.py <pdb_id>
+# get_rmsf_baseline.py --split <split_name> [--workers N]
+# adds a <pdb_id>_qfit_RMSF.csv to {PDB}/analysis as ,resseq,AA,Chain,RMSF,PDB_name (the table qFit's qfit_RMSF.py
+# writes), computed from the alternate conformers of the deposited multiconformer model ({pdb_id}_final.pdb).
+
+# Like get_rmsf.py (heavy mode) but over altlocs instead of frames: every heavy atom's RMSF is the occupancy-weighted
+# RMS distance of its altloc positions from their weighted mean (0 for an atom without altlocs), and a residue's RMSF
+# is the mean over its heavy atoms. All atoms of a structure are reduced with np.bincount in one pass;
+# --split runs the PDBs of a split in a process pool.
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import gemmi
+import numpy as np
+import pandas as pd
+
+
+def read_atoms(pdb_path):
+    # one row per heavy amino-acid atom (every altloc) of the first model
+    structure = gemmi.read_structure(pdb_path)
+    structure.setup_entities()
+    rows = []
+    for chain in structure[0]:
+        for residue in chain:
+            info = gemmi.find_tabulated_residue(residue.name)
+            if info is None or not info.is_amino_acid():
+                continue
+            for atom in residue:
+                if atom.is_hydrogen():
+                    continue
+                rows.append((chain.name, residue.seqid.num, residue.seqid.icode, residue.name, atom.name,
+                             atom.occ, atom.pos.x, atom.pos.y, atom.pos.z))
+    return pd.DataFrame(rows, columns=['Chain', 'resseq', 'icode', 'AA', 'atom', 'occupancy', 'x', 'y', 'z'])
+
+
+def altloc_rmsf(atoms):
+    # per-residue RMSF table (resseq,AA,Chain,RMSF) from read_atoms rows
+    if atoms.empty:
+        return pd.DataFrame(columns=['resseq', 'AA', 'Chain', 'RMSF'])
+
+    residue_keys = ['Chain', 'resseq', 'icode']
+    residue_ids = atoms.groupby(residue_keys, sort=False).ngroup().to_numpy()
+    atom_ids = atoms.groupby(residue_keys + ['atom'], sort=False).ngroup().to_numpy()
+    n_atoms = atom_ids.max() + 1
+
+    coords = atoms[['x', 'y', 'z']].to_numpy(dtype=np.float64)
+    weights = atoms['occupancy'].to_numpy(dtype=np.float64)
+    weight_sums = np.bincount(atom_ids, weights, minlength=n_atoms)
+    # an atom whose altlocs all have zero occupancy counts its positions equally
+    weights = np.where(weight_sums[atom_ids] > 0, weights, 1.0)
+    weight_sums = np.bincount(atom_ids, weights, minlength=n_atoms)
+
+    means = np.stack([np.bincount(atom_ids, weights * coords[:, k], minlength=n_atoms) for k in range(3)], axis=1)
+    means /= weight_sums[:, None]
+    squared = np.sum((coords - means[atom_ids]) ** 2, axis=1)
+    atom_rmsf = np.sqrt(np.bincount(atom_ids, weights * squared, minlength=n_atoms) / weight_sums)
+
+    # residue of every atom group, then the mean over the residue's atoms
+    atom_residue = np.zeros(n_atoms, dtype=np.int64)
+    atom_residue[atom_ids] = residue_ids
+    n_residues = residue_ids.max() + 1
+    residue_rmsf = np.bincount(atom_residue, atom_rmsf, minlength=n_residues) / np.bincount(atom_residue, minlength=n_residues)
+
+    residues = atoms.drop_duplicates(residue_keys)
+    return pd.DataFrame({
+        'resseq': residues['resseq'].to_numpy(),
+        'AA': residues['AA'].to_numpy(),
+        'Chain': residues['Chain'].to_numpy(),
+        'RMSF': residue_rmsf,
+    })
+
+
+def get_rmsf_baseline(pdb_id):
+    # writes ./PDBs/<pdb_id>/analysis/<pdb_id>_qfit_RMSF.csv; returns the number of residues
+    pdb_path = f"./PDBs/{pdb_id.lower()}/{pdb_id.lower()}_final.pdb"
+    if not os.path.exists(pdb_path):
+        raise FileNotFoundError(pdb_path)
+
+    rmsf_df = altloc_rmsf(read_atoms(pdb_path))
+    rmsf_df['PDB_name'] = pdb_id
+
+    analysis_path = f"./PDBs/{pdb_id.lower()}/analysis"
+    os.makedirs(analysis_path, exist_ok=True)
+    rmsf_df.to_csv(f"{analysis_path}/{pdb_id}_qfit_RMSF.csv")
+    return len(rmsf_df)
+
+
+def run_split(pdb_ids, workers):
+    failed = []
+    start = time.time()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(get_rmsf_baseline, pdb_id): pdb_id for pdb_id in pdb_ids}
+        for future in as_completed(futures):
+            pdb_id = futures[future]
+            try:
+                print(f"[get_rmsf_baseline.py] {pdb_id}: {future.result()} residues")
+            except Exception as e:
+                print(f"[get_rmsf_baseline.py] {pdb_id} failed: {e}")
+                failed.append(pdb_id)
+    print(f"[get_rmsf_baseline.py] {len(pdb_ids) - len(failed)} of {len(pdb_ids)} PDBs in {time.time() - start:.1f}s")
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Occupancy-weighted altloc RMSF of the deposited multiconformer models")
+    parser.add_argument("pdb_id", nargs="?", help="PDB ID to process")
+    parser.add_argument("--split", help="Process every PDB of ./splits/<split>.txt")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4, help="Processes used with --split")
+    args = parser.parse_args()
+
+    if bool(args.pdb_id) == bool(args.split):
+        print("Usage: python get_rmsf_baseline.py <pdb_id> | --split <split_name>")
+        sys.exit(1)
+
+    if args.split:
+        with open(f"./splits/{args.split}.txt") as f:
+            pdb_ids = [line.strip() for line in f if line.strip()]
+        sys.exit(1 if run_split(pdb_ids, args.workers) else 0)
+
+    n_residues = get_rmsf_baseline(args.pdb_id)
+    print(f"[get_rmsf_baseline.py] Baseline RMSF for {n_residues} residues saved to "
+          f"./PDBs/{args.pdb_id.lower()}/analysis/{args.pdb_id}_qfit_RMSF.csv")
@@ -1,7 +1,7 @@
-# get_rmsf_baseline.sh <dataset_name>
-# Gets RMSF for multiconformer PDB models in the dataset through QFIT's RMSF script.
+# get_rmsf_baseline.sh <dataset_name> [--workers N]
+# Gets RMSF for multiconformer PDB models in the dataset from their altlocs (<pdb_id>_qfit_RMSF.csv, same table as
+# qFit's qfit_RMSF.py), in parallel across the dataset. See get_rmsf_baseline.py.
 
-QFIT_RMSF_PATH="/home/aslamaj/workdir/alphaflow-testing/ensemble-merger-qfit/qfit-3.0/scripts/post/qfit_RMSF.py"
 DATASET_NAME=$1
 
 if [ -z "$DATASET_NAME" ]; then
@@ -16,12 +16,4 @@ if [ ! -f "$DATASET_TXT" ]; then
     exit 1
 fi
 
-for PDBID in $(cat $DATASET_TXT); do
-    echo "Processing PDBID: $PDBID"
-    PDB_DIR="./PDBs/${PDBID,,}"
-    TOPOLOGY="$PDB_DIR/${PDBID,,}_final.pdb"
-    TOPOLOGY_ABSPATH="$(realpath $TOPOLOGY)"
-    cd "$PDB_DIR/analysis" || { echo "Directory $PDB_DIR/analysis does not exist."; continue; }
-    python $QFIT_RMSF_PATH "$TOPOLOGY_ABSPATH" "$PDBID"
-    cd -
-done
\ No newline at end of file
+python ./scripts/analysis/get_rmsf_baseline.py --split "$DATASET_NAME" "${@:2}"
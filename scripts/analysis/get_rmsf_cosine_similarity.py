@@ -1,23 +1,25 @@
-# python get_rmsf_cosine_similarity.py <pdb_id>
-# adds a cosine_similarity.csv to PDB analysis folder
+# python get_rmsf_cosine_similarity.py <pdb_id> [--metrics cosine pearson spearman]
+# python get_rmsf_cosine_similarity.py --split <split_name> [--metrics ...] [--output_csv <file>]
+# adds a cosine_similarity.csv to PDB analysis folder (element1,element2,cosine_similarity[,pearson,spearman],n_residues)
 
-import sys
-import os 
-import pandas as pd
-from itertools import combinations
+# RMSF vectors are joined on residue number rather than by position: each predictor's numbering is shifted onto
+# the deposited (qFit) numbering by the offset that matches the most residue names, and every source becomes
+# one row of a (n_sources, n_residues) matrix with a mask for residues it does not have. All pairs are then
+# scored over the residues both members share, with a few masked matmuls. --split stacks every PDB of the
+# split into one padded (n_pdbs, n_sources, n_residues) batch.
 
+import argparse
+import os
+import sys
 
+import numpy as np
+import pandas as pd
 
-# vector dimension is residues
-# < RMSF, RMSF, RMSF, ... >
-def get_cosine_similarity(vector1, vector2):
-    dot_product = sum(a * b for a, b in zip(vector1, vector2))
-    magnitude1 = sum(a * a for a in vector1) ** 0.5
-    magnitude2 = sum(b * b for b in vector2) ** 0.5
-    if magnitude1 == 0 or magnitude2 == 0:
-        return 0.0
-    return dot_product / (magnitude1 * magnitude2)
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from scripts.helpers.residue_numbering import numbering_offset
 
+PREDICTORS = ['bioemu', 'alphaflow', 'sam2', 'boltz2', 'openfold']
+METRICS = ['cosine', 'pearson', 'spearman']
 
 
 def get_predictor_rmsf(pdb):
@@ -32,39 +34,178 @@ def get_deposited_rmsf(pdb):
 
 
 def get_rmsf_vectors(pdb):
+    # source -> pd.Series of RMSF indexed by residue number (deposited numbering)
     deposited_df = get_deposited_rmsf(pdb)
     predictor_df = get_predictor_rmsf(pdb)
-    predictors = predictor_df['predictor'].unique()
 
-    rmsf_vectors = {}
-    rmsf_vectors['deposited'] = deposited_df['RMSF'].tolist()
+    # one chain, like the predicted ensembles
+    deposited_df = deposited_df[deposited_df['Chain'] == deposited_df['Chain'].iloc[0]]
+    deposited_df = deposited_df.drop_duplicates('resseq')
+    reference_residues = deposited_df['resseq'].to_numpy(dtype=np.int64)
+    reference_names = deposited_df['AA'].astype(str).str.upper().to_numpy()
+
+    rmsf_vectors = {'deposited': pd.Series(deposited_df['RMSF'].to_numpy(dtype=np.float64), index=reference_residues)}
+    for predictor in predictor_df['predictor'].unique():
+        predictor_data = predictor_df[predictor_df['predictor'] == predictor].drop_duplicates('residue')
+        residues = predictor_data['residue'].to_numpy(dtype=np.int64)
+        names = predictor_data['residue_aa'].astype(str).str.upper().to_numpy()
+        offset = numbering_offset(residues, names, reference_residues, reference_names)
+        rmsf_vectors[predictor] = pd.Series(predictor_data['rmsf'].to_numpy(dtype=np.float64), index=residues + offset)
+    return rmsf_vectors
+
+
+def build_matrix(rmsf_vectors, sources, residues):
+    # (n_sources, n_residues) values and 0/1 mask; sources or residues a PDB lacks are masked out
+    values = np.zeros((len(sources), len(residues)))
+    mask = np.zeros((len(sources), len(residues)))
+    position = pd.Index(residues)
+    for row, source in enumerate(sources):
+        vector = rmsf_vectors.get(source)
+        if vector is None:
+            continue
+        vector = vector[vector.notna()]
+        columns = position.get_indexer(vector.index)
+        values[row, columns] = vector.to_numpy()
+        mask[row, columns] = 1.0
+    return values, mask
+
+
+def masked_ranks(values, mask):
+    # average ranks (1..n) of each source over its own residues, 0 where masked
+    ranks = np.zeros_like(values)
+    for index in np.ndindex(values.shape[:-1]):
+        present = mask[index] > 0
+        if present.any():
+            ranks[index][present] = pd.Series(values[index][present]).rank().to_numpy()
+    return ranks
+
+
+def pairwise_pearson(values, mask):
+    # Pearson r of every pair of rows over the residues both rows have; works on (..., n_sources, n_residues)
+    masked = values * mask
+    mask_t = np.swapaxes(mask, -1, -2)
+    n = mask @ mask_t                           # shared residues
+    sums = masked @ mask_t                      # sums[i, j]: sum of row i over residues shared with j
+    squares = (masked * masked) @ mask_t
+    products = masked @ np.swapaxes(masked, -1, -2)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        covariance = products - sums * np.swapaxes(sums, -1, -2) / n
+        variance = squares - sums * sums / n
+        return covariance / np.sqrt(variance * np.swapaxes(variance, -1, -2))
+
+
+def similarity_matrices(values, mask, metrics=('cosine',)):
+    # metric -> (..., n_sources, n_sources) matrix, plus 'n_residues' (shared residue counts)
+    masked = values * mask
+    mask_t = np.swapaxes(mask, -1, -2)
+    results = {'n_residues': mask @ mask_t}
+
+    if 'cosine' in metrics:
+        products = masked @ np.swapaxes(masked, -1, -2)
+        squares = (masked * masked) @ mask_t    # squares[i, j]: |row i|^2 over residues shared with j
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cosine = products / np.sqrt(squares * np.swapaxes(squares, -1, -2))
+        results['cosine'] = np.where(np.isfinite(cosine), cosine, 0.0)  # zero vectors score 0 as before
+
+    if 'pearson' in metrics:
+        results['pearson'] = pairwise_pearson(values, mask)
 
-    for predictor in predictors:
-        predictor_data = predictor_df[predictor_df['predictor'] == predictor]
-        rmsf_vectors[predictor] = predictor_data['rmsf'].tolist()
-    
-    all_elements = list(rmsf_vectors.keys()) # combination of ALL
+    if 'spearman' in metrics:
+        # ranks over each source's own residues are only right for pairs covering the same residues,
+        # the (few) other pairs are re-ranked over what they share
+        spearman = pairwise_pearson(masked_ranks(values, mask), mask)
+        for index in np.ndindex(values.shape[:-2]):
+            pdb_mask = mask[index] > 0
+            for i, j in zip(*np.triu_indices(len(pdb_mask), 1)):
+                if not pdb_mask[i].any() or not pdb_mask[j].any() or np.array_equal(pdb_mask[i], pdb_mask[j]):
+                    continue
+                shared = pdb_mask[i] & pdb_mask[j]
+                first = pd.Series(values[index][i][shared]).rank()
+                second = pd.Series(values[index][j][shared]).rank()
+                spearman[index + (i, j)] = spearman[index + (j, i)] = first.corr(second) if shared.sum() > 1 else np.nan
+        results['spearman'] = spearman
 
-    combination_data = []
+    return results
 
-    for elem1, elem2 in combinations(all_elements, 2):
-        vec1 = rmsf_vectors[elem1]
-        vec2 = rmsf_vectors[elem2]
-        cos_sim = get_cosine_similarity(vec1, vec2)
-        #print(f"Cosine similarity between {elem1} and {elem2}: {cos_sim:.4f}")
-        combination_data.append((elem1, elem2, cos_sim))
 
-    output_df = pd.DataFrame(combination_data, columns=['element1', 'element2', 'cosine_similarity'])
+def similarity_table(results, sources, order, metrics):
+    # one row per pair of `order` (same pairs and order as itertools.combinations)
+    rows = []
+    for a, first in enumerate(order):
+        for second in order[a + 1:]:
+            i, j = sources.index(first), sources.index(second)
+            row = {'element1': first, 'element2': second}
+            for metric in metrics:
+                row['cosine_similarity' if metric == 'cosine' else metric] = results[metric][i, j]
+            row['n_residues'] = int(results['n_residues'][i, j])
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def save_similarities(pdb, similarity_df):
     output_path = f"./PDBs/{pdb}/analysis/cosine_similarity.csv"
-    output_df.to_csv(output_path, index=False)
+    similarity_df.to_csv(output_path, index=False)
     print(f"[get_rmsf_cosine_similarity.py] Cosine similarity results saved to {output_path}")
-    
-    
-    
+
+
+def get_split_similarities(pdb_ids, metrics=('cosine',)):
+    # one batched pass over every PDB with both RMSF files; returns {pdb_id: similarity frame}
+    vectors = {}
+    for pdb in pdb_ids:
+        try:
+            vectors[pdb] = get_rmsf_vectors(pdb)
+        except (FileNotFoundError, KeyError, IndexError) as e:
+            print(f"[get_rmsf_cosine_similarity.py] Skipping {pdb}: {e}")
+    if not vectors:
+        return {}
+
+    extra = sorted({source for pdb_vectors in vectors.values() for source in pdb_vectors} - set(PREDICTORS) - {'deposited'})
+    sources = ['deposited'] + PREDICTORS + extra
+    residue_lists = {pdb: np.unique(np.concatenate([v.index.to_numpy() for v in pdb_vectors.values()]))
+                     for pdb, pdb_vectors in vectors.items()}
+    width = max(len(residues) for residues in residue_lists.values())
+
+    values = np.zeros((len(vectors), len(sources), width))
+    mask = np.zeros((len(vectors), len(sources), width))
+    for batch, (pdb, pdb_vectors) in enumerate(vectors.items()):
+        residues = residue_lists[pdb]
+        values[batch, :, :len(residues)], mask[batch, :, :len(residues)] = build_matrix(pdb_vectors, sources, residues)
+
+    results = similarity_matrices(values, mask, metrics)
+    tables = {}
+    for batch, (pdb, pdb_vectors) in enumerate(vectors.items()):
+        # deposited first, then predictors in the order rmsf.csv lists them
+        order = ['deposited'] + [source for source in pdb_vectors if source != 'deposited']
+        pdb_results = {key: matrix[batch] for key, matrix in results.items()}
+        tables[pdb] = similarity_table(pdb_results, sources, order, metrics)
+    return tables
+
+
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python get_rmsf_cosine_similarity.py <pdb_id>")
+    parser = argparse.ArgumentParser(description="RMSF similarity between the deposited model and every predictor")
+    parser.add_argument("pdb_id", nargs="?", help="PDB ID to process")
+    parser.add_argument("--split", help="Process every PDB of ./splits/<split>.txt in one batch")
+    parser.add_argument("--metrics", nargs="+", choices=METRICS, default=['cosine'])
+    parser.add_argument("--output_csv", help="Also write all PDBs to one csv (with a pdb_id column)")
+    args = parser.parse_args()
+
+    if bool(args.pdb_id) == bool(args.split):
+        print("Usage: python get_rmsf_cosine_similarity.py <pdb_id> | --split <split_name>")
         sys.exit(1)
-    
-    pdb_id = sys.argv[1]
-    get_rmsf_vectors(pdb_id)
\ No newline at end of file
+
+    if args.split:
+        with open(f"./splits/{args.split}.txt") as f:
+            pdb_ids = [line.strip() for line in f if line.strip()]
+    else:
+        pdb_ids = [args.pdb_id]
+
+    metrics = [metric for metric in METRICS if metric in args.metrics]
+    tables = get_split_similarities(pdb_ids, metrics)
+    for pdb, similarity_df in tables.items():
+        save_similarities(pdb, similarity_df)
+
+    if args.output_csv and tables:
+        pd.concat([table.assign(pdb_id=pdb) for pdb, table in tables.items()], ignore_index=True).to_csv(args.output_csv, index=False)
+        print(f"[get_rmsf_cosine_similarity.py] Saved {len(tables)} PDBs to {args.output_csv}")
+
+    sys.exit(0 if len(tables) == len(pdb_ids) else 1)
@@ -7,31 +7,39 @@ import sys
 import os
 import pandas as pd
 from Bio.PDB import PDBParser
-import pymol
-from pymol import cmd
 import time
 
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from scripts.helpers import transform_store
+from scripts.helpers.lazy_imports import lazy_import
+
+pymol = lazy_import("pymol")
+cmd = lazy_import("pymol.cmd")
+
 pdbparse = PDBParser(QUIET=True)
 
-def align_with_pymol(reference_pdb, mobile_pdb, output_pdb):
+def align_with_pymol(reference_pdb, mobile_pdb):
+    # returns the RMSD and the rigid transform PyMOL applied, instead of saving an aligned copy
     pymol.finish_launching(['pymol', '-qc'])
     
     cmd.load(reference_pdb, "reference")
     cmd.load(mobile_pdb, "mobile")
     
+    before = cmd.get_coords("mobile", state=1)
     align_result = cmd.align("mobile", "reference")
     alignment_rmsd = align_result[0]
+    after = cmd.get_coords("mobile", state=1)
     
-    cmd.save(output_pdb, "mobile", state=0)
-    cmd.remove("all")
+    cmd.delete("all")
     
 
     import gc
     gc.collect()
 
+    rotation, translation = transform_store.kabsch(before.astype(np.float64), after.astype(np.float64))
     
     print(f"[get_rmsr_galign.py] Aligned {mobile_pdb} to {reference_pdb} with RMSD {alignment_rmsd:.3f}")
-    return alignment_rmsd
+    return alignment_rmsd, rotation, translation
 
 def get_multiconformer_residue_centroid(residue):
     altloc_groups = {}
@@ -111,27 +119,32 @@ def get_rmsr_galign(pdb_id):
 
     for i, predictor in enumerate(predictors):
         ensemble_path = f"{PDB_FOLDER}/{pdb_id.lower()}_{predictor}.pdb" # the ensemble path
-        aligned_ensemble_path = f"{PDB_FOLDER}/{predictor}_bin/{pdb_id.lower()}_ensemble_pymol_aligned.pdb"
         
         print(f"[get_rmsr_galign.py] Processing {ensemble_path}...")
 
         if not os.path.exists(ensemble_path):
             print(f"[get_rmsr_galign.py] Warning: {ensemble_path} not found, skipping...")
             continue
-            
-        try:
-            align_rmsd = align_with_pymol(deposited, ensemble_path, aligned_ensemble_path)
-            print(f"[get_rmsr_galign.py] Successfully aligned {predictor} ensemble with RMSD {align_rmsd:.3f}")
-        except Exception as e:
-            print(f"[get_rmsr_galign.py] Error aligning {predictor} ensemble: {str(e)}")
-            print(f"[get_rmsr_galign.py] Falling back to original ensemble")
-            aligned_ensemble_path = ensemble_path
-
-        ensemble = pdbparse.get_structure(f"{pdb_id}_{predictor}", aligned_ensemble_path)
+
+        transform = transform_store.load_transform(pdb_id, predictor, "pymol")
+        if transform is not None:
+            rotation, translation = transform['rotation'], transform['translation']
+            print(f"[get_rmsr_galign.py] Using stored PyMOL transform for {predictor}")
+        else:
+            try:
+                align_rmsd, rotation, translation = align_with_pymol(deposited, ensemble_path)
+                transform_store.save_transform(pdb_id, predictor, "pymol", rotation, translation, ensemble_path)
+                print(f"[get_rmsr_galign.py] Successfully aligned {predictor} ensemble with RMSD {align_rmsd:.3f}")
+            except Exception as e:
+                print(f"[get_rmsr_galign.py] Error aligning {predictor} ensemble: {str(e)}")
+                print(f"[get_rmsr_galign.py] Falling back to original ensemble")
+                rotation, translation = np.eye(3), np.zeros(3)
+
+        ensemble = pdbparse.get_structure(f"{pdb_id}_{predictor}", ensemble_path)
         
         first_model = next(ensemble.get_models())
         if len(first_model) == 0:
-            print(f"[get_rmsr_galign.py] Warning: No chains found in {aligned_ensemble_path}, skipping...")
+            print(f"[get_rmsr_galign.py] Warning: No chains found in {ensemble_path}, skipping...")
             continue
             
         first_chain = next(first_model.get_chains())
@@ -150,6 +163,7 @@ def get_rmsr_galign(pdb_id):
             for residue in chain:
                 centroid = get_residue_centroid(residue)
                 if centroid is not None:
+                    centroid = transform_store.apply_transform(centroid, rotation, translation)
                     if res_ind not in residue_centroids:
                         residue_centroids[res_ind] = []
                     residue_centroids[res_ind].append(centroid)
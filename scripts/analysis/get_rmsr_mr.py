@@ -7,8 +7,6 @@ import sys
 import os
 import pandas as pd
 from Bio.PDB import PDBParser
-import pymol
-from pymol import cmd
 
 pdbparse = PDBParser(QUIET=True)
 
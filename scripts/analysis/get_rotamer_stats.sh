@@ -1,5 +1,6 @@
 #!/bin/bash
 # get rotamer stats using phenix.rotalyze
+# (scripts/analysis/get_rotamers.py computes the same rotamers in-process for all frames and the deposited altlocs)
 
 PDB_CODE=$1
 PREDICTOR=$2
@@ -0,0 +1,135 @@
+# get_rotamers.py <pdb_id> [--predictors p1 ...]
+# Side-chain chi angles and rotamers of every frame of every predictor ensemble and of the deposited altlocs,
+# computed in-process (scripts/helpers/rotamers.py) instead of phenix.rotalyze per ensemble (get_rotamer_stats.sh).
+# Writes to ./PDBs/<pdb_id>/analysis/:
+#   rotamers.csv            predictor,frame,chain,residue,aa,chi1,chi2,chi3,chi4,rotamer
+#   rotamers_deposited.csv  chain,residue,aa,altloc,weight,chi1,chi2,chi3,chi4,rotamer (weight = altloc occupancy)
+#   rotamer_comparison.csv  predictor,chain,residue,aa,deposited_rotamers,n_frames,deposited_fraction,top_rotamer,top_fraction
+# deposited_rotamers lists the deposited altloc rotamers with their weights; deposited_fraction is the fraction of
+# frames whose rotamer is one of them. Predictor residues are matched onto the deposited numbering (first chain)
+# the same way get_rmsf_cosine_similarity.py does.
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from scripts.helpers import rotamers
+from scripts.helpers.residue_numbering import numbering_offset
+
+PREDICTORS = ['bioemu', 'alphaflow', 'sam2', 'boltz2', 'openfold']
+CHI_COLUMNS = ['chi1', 'chi2', 'chi3', 'chi4']
+
+
+def chi_frame(chis, names, columns):
+    # columns + chi1..chi4 (rounded like rotalyze) + rotamer
+    df = pd.DataFrame(columns)
+    for k, column in enumerate(CHI_COLUMNS):
+        df[column] = np.round(chis[..., k].ravel(), 1)
+    df['rotamer'] = names.ravel()
+    return df
+
+
+def get_ensemble_rotamers(pdb_id, predictors=PREDICTORS):
+    frame_dfs = []
+    for predictor in predictors:
+        ensemble_path = f"./PDBs/{pdb_id}/{pdb_id}_{predictor}.pdb"
+        if not os.path.exists(ensemble_path):
+            print(f"[get_rotamers.py] Warning: {ensemble_path} not found, skipping...")
+            continue
+
+        chis, names, table = rotamers.rotamers(ensemble_path)
+        n_frames, n_residues = names.shape
+        print(f"[get_rotamers.py] {predictor}: {n_frames} frames x {n_residues} residues")
+        df = chi_frame(chis, names, {
+            'predictor': predictor,
+            'frame': np.repeat(np.arange(n_frames), n_residues),
+            'chain': np.tile(table['chain'], n_frames),
+            'residue': np.tile(table['residue'], n_frames),
+            'aa': np.tile(table['aa'], n_frames),
+        })
+        frame_dfs.append(df[df['rotamer'] != ''])
+
+    if not frame_dfs:
+        return pd.DataFrame()
+    return pd.concat(frame_dfs, ignore_index=True)
+
+
+def get_deposited_rotamers(pdb_id):
+    chis, names, table = rotamers.deposited_rotamers(f"./PDBs/{pdb_id}/{pdb_id}_final.pdb")
+    df = chi_frame(chis, names, {key: table[key] for key in ('chain', 'residue', 'aa', 'altloc', 'weight')})
+    df['weight'] = df['weight'].round(4)
+    return df[df['rotamer'] != ''].reset_index(drop=True)
+
+
+def compare_rotamers(frames_df, deposited_df):
+    # one row per predictor and residue that both the ensemble and the deposited model name
+    deposited_df = deposited_df[deposited_df['chain'] == deposited_df['chain'].iloc[0]]
+    weights = deposited_df.groupby(['residue', 'rotamer'], sort=False)['weight'].sum()
+    deposited_sets = {residue: set(group.index.get_level_values('rotamer')) - {rotamers.OUTLIER}
+                      for residue, group in weights.groupby(level='residue')}
+    deposited_labels = {residue: ';'.join(f"{rotamer}:{weight:.2f}" for (_, rotamer), weight in group.sort_values(ascending=False).items())
+                        for residue, group in weights.groupby(level='residue')}
+    reference = deposited_df.drop_duplicates('residue')
+    reference_residues = reference['residue'].to_numpy(dtype=np.int64)
+    reference_names = reference['aa'].to_numpy()
+
+    rows = []
+    for predictor, predictor_df in frames_df.groupby('predictor', sort=False):
+        residues = predictor_df.drop_duplicates('residue')
+        offset = numbering_offset(residues['residue'].to_numpy(dtype=np.int64), residues['aa'].to_numpy(),
+                                  reference_residues, reference_names)
+        for (chain, residue, aa), group in predictor_df.groupby(['chain', 'residue', 'aa'], sort=True):
+            deposited_residue = residue + offset
+            if deposited_residue not in deposited_sets:
+                continue
+            counts = group['rotamer'].value_counts(normalize=True)
+            rows.append({
+                'predictor': predictor,
+                'chain': chain,
+                'residue': deposited_residue,
+                'aa': aa,
+                'deposited_rotamers': deposited_labels[deposited_residue],
+                'n_frames': len(group),
+                'deposited_fraction': counts[counts.index.isin(deposited_sets[deposited_residue])].sum(),
+                'top_rotamer': counts.index[0],
+                'top_fraction': counts.iloc[0],
+            })
+    return pd.DataFrame(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chi angles and rotamers of the predicted ensembles and the deposited model")
+    parser.add_argument("pdb_id", type=str, help="PDB ID of the structure")
+    parser.add_argument("--predictors", nargs="+", choices=PREDICTORS, default=PREDICTORS)
+    args = parser.parse_args()
+
+    pdb_id = args.pdb_id.lower()
+    analysis_dir = f"./PDBs/{pdb_id}/analysis"
+    os.makedirs(analysis_dir, exist_ok=True)
+
+    deposited_df = pd.DataFrame()
+    if os.path.exists(f"./PDBs/{pdb_id}/{pdb_id}_final.pdb"):
+        deposited_df = get_deposited_rotamers(pdb_id)
+        deposited_df.to_csv(f"{analysis_dir}/rotamers_deposited.csv", index=False)
+        print(f"[get_rotamers.py] Deposited: {len(deposited_df)} side-chain conformers")
+    else:
+        print(f"[get_rotamers.py] Warning: ./PDBs/{pdb_id}/{pdb_id}_final.pdb not found, no deposited rotamers")
+
+    frames_df = get_ensemble_rotamers(pdb_id, args.predictors)
+    if frames_df.empty:
+        print(f"[get_rotamers.py] No ensembles found for {pdb_id}")
+        sys.exit(1)
+    frames_df.to_csv(f"{analysis_dir}/rotamers.csv", index=False)
+
+    if not deposited_df.empty:
+        comparison_df = compare_rotamers(frames_df, deposited_df)
+        comparison_df.to_csv(f"{analysis_dir}/rotamer_comparison.csv", index=False, float_format="%.4f")
+        for predictor, group in comparison_df.groupby('predictor', sort=False):
+            print(f"[get_rotamers.py] {predictor}: deposited rotamer in {group['deposited_fraction'].mean():.1%} of frames "
+                  f"on average over {len(group)} residues")
+
+    print(f"[get_rotamers.py] Rotamers for {pdb_id} written to {analysis_dir}")
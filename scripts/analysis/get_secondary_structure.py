@@ -1,5 +1,10 @@
-# get_secondary_structure.py <pdb_id>
+# get_secondary_structure.py <pdb_id> [--backend mkdssp|numpy] [--validate]
+# get_secondary_structure.py <pdb_id> --ensembles [--predictors p1 ...]
 # Uses DSSP to get secondary structure information from a PDB file.
+# --ensembles instead assigns every frame of every predictor ensemble with the in-process NumPy DSSP
+# (scripts/helpers/dssp.py), fast enough for 1000-frame ensembles, and writes analysis/secondary_structure_frames.csv (predictor,frame,chain,residue,
+# secondary_structure) and analysis/secondary_structure_propensity.csv (predictor,chain,residue,aa and the
+# fraction of frames in H, E, G, I, T, S, C). --validate compares the NumPy DSSP with mkdssp on the deposited model.
 
 # https://github.com/PDB-REDO/dssp
 
@@ -24,12 +29,19 @@
 
 import argparse
 import pandas as pd
+import numpy as np
 import os
 import subprocess
+import sys
 import tempfile
 from Bio import PDB
 from Bio.PDB.DSSP import DSSP
 
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from scripts.helpers import dssp as numpy_dssp
+
+PREDICTORS = ['bioemu', 'alphaflow', 'sam2', 'boltz2', 'openfold']
+
 def get_secondary_structure_from_dssp(pdb_id, pdb_file_path):
     try:
         parser = PDB.PDBParser(QUIET=True)
@@ -77,20 +89,97 @@ def get_secondary_structure_from_dssp(pdb_id, pdb_file_path):
         return None
 
 
+def get_secondary_structure_numpy(pdb_file_path):
+    # same columns as get_secondary_structure_from_dssp, first model only
+    ss, table = numpy_dssp.secondary_structure(pdb_file_path)
+    return pd.DataFrame({
+        'residue': table['residue'],
+        'chain': table['chain'],
+        'amino_acid': numpy_dssp.one_letter(table['aa']),
+        'secondary_structure': ss[0] if len(ss) else [],
+    })
+
+
+def get_ensemble_secondary_structure(pdb_id, predictors=PREDICTORS):
+    # (frames_df, propensity_df) over every frame of every predictor ensemble that exists
+    frame_dfs, propensity_dfs = [], []
+    for predictor in predictors:
+        ensemble_path = f"./PDBs/{pdb_id}/{pdb_id}_{predictor}.pdb"
+        if not os.path.exists(ensemble_path):
+            print(f"[get_secondary_structure.py] Warning: {ensemble_path} not found, skipping...")
+            continue
+
+        ss, table = numpy_dssp.secondary_structure(ensemble_path)
+        n_frames, n_residues = ss.shape
+        print(f"[get_secondary_structure.py] {predictor}: {n_frames} frames x {n_residues} residues")
+
+        frame_dfs.append(pd.DataFrame({
+            'predictor': predictor,
+            'frame': np.repeat(np.arange(n_frames), n_residues),
+            'chain': np.tile(table['chain'], n_frames),
+            'residue': np.tile(table['residue'], n_frames),
+            'secondary_structure': ss.ravel(),
+        }))
+
+        propensity = pd.DataFrame({'predictor': predictor, 'chain': table['chain'], 'residue': table['residue'], 'aa': table['aa']})
+        for code in numpy_dssp.SS_CODES:
+            propensity[code] = (ss == code).mean(axis=0) if n_frames else np.nan
+        propensity_dfs.append(propensity)
+
+    if not frame_dfs:
+        return pd.DataFrame(), pd.DataFrame()
+    return pd.concat(frame_dfs, ignore_index=True), pd.concat(propensity_dfs, ignore_index=True)
+
+
+def validate_against_mkdssp(pdb_id, pdb_file_path):
+    # per-residue agreement of the NumPy DSSP with mkdssp on the deposited model
+    reference = get_secondary_structure_from_dssp(pdb_id, pdb_file_path)
+    if reference is None or reference.empty:
+        print("[get_secondary_structure.py] mkdssp gave no result, nothing to validate against")
+        return None
+    merged = reference.merge(get_secondary_structure_numpy(pdb_file_path), on=['chain', 'residue'], suffixes=('_mkdssp', '_numpy'))
+    agreement = (merged['secondary_structure_mkdssp'] == merged['secondary_structure_numpy']).mean()
+    print(f"[get_secondary_structure.py] NumPy DSSP matches mkdssp on {agreement:.1%} of {len(merged)} residues")
+    print(pd.crosstab(merged['secondary_structure_mkdssp'], merged['secondary_structure_numpy'],
+                      rownames=['mkdssp'], colnames=['numpy']).to_string())
+    return agreement
+
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Get secondary structure from PDB file.")
     parser.add_argument("pdb_id", type=str, help="PDB ID of the structure")
+    parser.add_argument("--backend", choices=["mkdssp", "numpy"], default="mkdssp", help="DSSP used for the deposited model")
+    parser.add_argument("--ensembles", action="store_true", help="Assign every frame of the predictor ensembles instead of the deposited model")
+    parser.add_argument("--predictors", nargs="+", choices=PREDICTORS, default=PREDICTORS)
+    parser.add_argument("--validate", action="store_true", help="Compare the NumPy DSSP with mkdssp on the deposited model")
     args = parser.parse_args()
 
     pdb_id = args.pdb_id
     pdb_file_path = f"./PDBs/{pdb_id}/{pdb_id}_final.pdb"
 
+    if args.ensembles:
+        frames_df, propensity_df = get_ensemble_secondary_structure(pdb_id, args.predictors)
+        if frames_df.empty:
+            print(f"[get_secondary_structure.py] No ensembles found for {pdb_id}")
+            exit(1)
+        os.makedirs(f"./PDBs/{pdb_id}/analysis", exist_ok=True)
+        frames_df.to_csv(f"./PDBs/{pdb_id}/analysis/secondary_structure_frames.csv", index=False)
+        propensity_df.to_csv(f"./PDBs/{pdb_id}/analysis/secondary_structure_propensity.csv", index=False, float_format="%.4f")
+        print(f"[get_secondary_structure.py] Per-frame secondary structure for {pdb_id} written ({len(frames_df)} rows)")
+        exit(0)
+
     if not os.path.exists(pdb_file_path):
         print(f"PDB file {pdb_file_path} does not exist.")
         exit(1)
 
-    ssdf = get_secondary_structure_from_dssp(pdb_id, pdb_file_path)
+    if args.validate:
+        validate_against_mkdssp(pdb_id, pdb_file_path)
+
+    if args.backend == "numpy":
+        ssdf = get_secondary_structure_numpy(pdb_file_path)
+    else:
+        ssdf = get_secondary_structure_from_dssp(pdb_id, pdb_file_path)
 
     # RESIDUE|SECONDARY_STRUCTURE
     newdf = ssdf[['residue', 'secondary_structure']].copy()
@@ -5,19 +5,23 @@ import sys
 import os
 import json
 import numpy as np
-import mdtraj as md
 import tempfile
-from SFC_Torch import SFcalculator
 import pandas as pd
 import argparse
 import concurrent.futures
 from concurrent.futures import ThreadPoolExecutor
 import threading
 
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scripts.helpers.lazy_imports import lazy_import
+
+md = lazy_import("mdtraj")
+SFC_Torch = lazy_import("SFC_Torch")
+
 local_temp = threading.local()
 
 def get_rfree(pdb_file, mtz_file):
-    sfcalculator = SFcalculator(pdb_file, mtz_file, expcolumns=['FP', 'SIGFP'], set_experiment=True, freeflag='FREE', testset_value=0)
+    sfcalculator = SFC_Torch.SFcalculator(pdb_file, mtz_file, expcolumns=['FP', 'SIGFP'], set_experiment=True, freeflag='FREE', testset_value=0)
     sfcalculator.inspect_data(verbose=False) 
     sfcalculator.calc_fprotein(atoms_position_tensor=None, atoms_biso_tensor=None, atoms_occ_tensor=None, atoms_aniso_uw_tensor=None)
     sfcalculator.calc_fsolvent()
@@ -7,6 +7,10 @@ import numpy as np
 import os
 import sys
 
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scripts.graphing import loaders
+from scripts.helpers import warehouse
+
 
 def make_boxplot(pdb_rfrees_list, output_path):
     print(f"[dataset_rfree_boxplot.py] Making box plot for {len(pdb_rfrees_list)} PDBs...")
@@ -92,17 +96,21 @@ if __name__ == "__main__":
         for line in f:
             pdb_list.append(line.strip())
     
-    for pdb in pdb_list:
-        try:
-            rfree_path = f"./PDBs/{pdb}/analysis/rfrees.csv"
-            rfree_df = pd.read_csv(rfree_path)
-            
-            pdb_rfrees_set.append({
-                "pdb_id": pdb,
-                "rfrees": rfree_df
-            })
-            
-        except FileNotFoundError:
-            print(f"[dataset_rfree_boxplot.py] File not found for {pdb}, skipping...")
+    if warehouse.available(dataset_name, ["rfree"]):
+        rfrees = warehouse.read_table("rfree", dataset_name)
+        pdb_rfrees_set = [{"pdb_id": pdb, "rfrees": rfree_df} for pdb, rfree_df in warehouse.split_by_pdb(rfrees, pdb_list)]
+    else:
+        for pdb in pdb_list:
+            try:
+                rfree_path = f"./PDBs/{pdb}/analysis/rfrees.csv"
+                rfree_df = loaders.read_csv(rfree_path)
+
+                pdb_rfrees_set.append({
+                    "pdb_id": pdb,
+                    "rfrees": rfree_df
+                })
+
+            except FileNotFoundError:
+                print(f"[dataset_rfree_boxplot.py] File not found for {pdb}, skipping...")
 
     make_boxplot(pdb_rfrees_set, output_path)
\ No newline at end of file
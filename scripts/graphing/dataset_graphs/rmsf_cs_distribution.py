@@ -9,6 +9,9 @@ import os
 import sys
 from matplotlib.lines import Line2D
 
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scripts.graphing import loaders
+
 
 def make_cosine_similarity_boxplot(pdb_cs_list, output_path, dataset_name):
     print(f"[rmsf_cs_distribution.py] Making cosine similarity box plot for {len(pdb_cs_list)} PDBs...")
@@ -107,7 +110,7 @@ if __name__ == "__main__":
         try:
             cosine_similarity_path = f"./PDBs/{pdb}/analysis/cosine_similarity.csv"
             if os.path.exists(cosine_similarity_path):
-                cosine_similarity = pd.read_csv(cosine_similarity_path)
+                cosine_similarity = loaders.read_csv(cosine_similarity_path)
                 
                 pdb_data = {
                     "pdb_id": pdb,
@@ -8,43 +8,21 @@ import os
 import sys
 from matplotlib.lines import Line2D
 
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scripts.graphing import loaders
+from scripts.helpers import warehouse
+
 
 def read_cosine_similarity(pdb_id):
     pdb_dir = f"./PDBs/{pdb_id}"
     cs_file = f"{pdb_dir}/analysis/cosine_similarity.csv"
     if os.path.exists(cs_file):
-        return pd.read_csv(cs_file)
+        return loaders.read_csv(cs_file)
     else:
         print(f"[rmsf_cs_pdbs.py] Cosine similarity file not found for {pdb_id}")
         return None
 
 
-def read_protein_class_mapping(mapping_text=None, mapping_file="bin/protein_classes/include.txt"):
-    mapping = {}
-    
-    if mapping_text:
-        lines = mapping_text.strip().split('\n')
-        for line in lines:
-            if line.strip():
-                protein_class, pdb = line.strip().split(',')
-                if protein_class not in mapping:
-                    mapping[protein_class] = []
-                mapping[protein_class].append(pdb)
-    elif os.path.exists(mapping_file):
-        try:
-            with open(mapping_file, 'r') as f:
-                for line in f:
-                    if line.strip():
-                        protein_class, pdb = line.strip().split(',')
-                        if protein_class not in mapping:
-                            mapping[protein_class] = []
-                        mapping[protein_class].append(pdb)
-        except Exception as e:
-            print(f"Error reading protein class mapping: {e}")
-    
-    return mapping
-
-
 def make_cs_scatter_plot(pdb_cs_list, output_path, dataset_name, protein_class_mapping=None):
     print(f"[rmsf_cs_pdbs.py] Making cosine similarity scatter plot for {len(pdb_cs_list)} PDBs...")
     
@@ -207,7 +185,7 @@ UBI,5tog
 STN,2pyk
 STN,2pzw"""
     
-    protein_class_mapping = read_protein_class_mapping(mapping_text)
+    protein_class_mapping = loaders.read_protein_class_mapping(mapping_text)
     
     pdb_cs_set = []
     pdb_list = []
@@ -220,23 +198,27 @@ STN,2pzw"""
         print(f"Dataset file ./splits/{dataset_name}.txt not found")
         sys.exit(1)
     
-    for pdb in pdb_list:
-        try:
-            cs_path = f"./PDBs/{pdb}/analysis/cosine_similarity.csv"
-            
-            if os.path.exists(cs_path):
-                cs_df = pd.read_csv(cs_path)
-                
-                pdb_data = {
-                    "pdb_id": pdb,
-                    "cosine_similarity": cs_df
-                }
-                
-                pdb_cs_set.append(pdb_data)
-            else:
-                print(f"[rmsf_cs_pdbs.py] Cosine similarity file not found for {pdb}, skipping...")
-                
-        except Exception as e:
-            print(f"[rmsf_cs_pdbs.py] Error processing {pdb}: {e}")
+    if warehouse.available(dataset_name, ["cosine_similarity"]):
+        similarities = warehouse.read_table("cosine_similarity", dataset_name)
+        pdb_cs_set = [{"pdb_id": pdb, "cosine_similarity": cs_df} for pdb, cs_df in warehouse.split_by_pdb(similarities, pdb_list)]
+    else:
+        for pdb in pdb_list:
+            try:
+                cs_path = f"./PDBs/{pdb}/analysis/cosine_similarity.csv"
+
+                if os.path.exists(cs_path):
+                    cs_df = read_cosine_similarity(pdb)
+
+                    pdb_data = {
+                        "pdb_id": pdb,
+                        "cosine_similarity": cs_df
+                    }
+
+                    pdb_cs_set.append(pdb_data)
+                else:
+                    print(f"[rmsf_cs_pdbs.py] Cosine similarity file not found for {pdb}, skipping...")
+
+            except Exception as e:
+                print(f"[rmsf_cs_pdbs.py] Error processing {pdb}: {e}")
 
     make_cs_scatter_plot(pdb_cs_set, output_path, dataset_name, protein_class_mapping)
\ No newline at end of file
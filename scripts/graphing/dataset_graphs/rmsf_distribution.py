@@ -8,43 +8,9 @@ import os
 import sys
 from matplotlib.lines import Line2D
 
-
-def read_rmsf_values(pdb_id):
-    pdb_dir = "./PDBs/" + pdb_id
-    rmsf_file = pdb_dir + '/analysis/rmsf.csv'
-    thedf = pd.read_csv(rmsf_file)
-    return thedf
-
-def get_deposited_rmsf_values(pdb_id):
-    pdb_dir = "./PDBs/" + pdb_id
-    rmsf_file = pdb_dir + '/analysis/' + pdb_id + "_qfit_RMSF.csv"
-    thedf = pd.read_csv(rmsf_file)
-    return thedf
-
-def read_protein_class_mapping(mapping_text=None, mapping_file="bin/protein_classes/include.txt"):
-    mapping = {}
-    
-    if mapping_text:
-        lines = mapping_text.strip().split('\n')
-        for line in lines:
-            if line.strip():
-                protein_class, pdb = line.strip().split(',')
-                if protein_class not in mapping:
-                    mapping[protein_class] = []
-                mapping[protein_class].append(pdb)
-    elif os.path.exists(mapping_file):
-        try:
-            with open(mapping_file, 'r') as f:
-                for line in f:
-                    if line.strip():
-                        protein_class, pdb = line.strip().split(',')
-                        if protein_class not in mapping:
-                            mapping[protein_class] = []
-                        mapping[protein_class].append(pdb)
-        except Exception as e:
-            print(f"Error reading protein class mapping: {e}")
-    
-    return mapping
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scripts.graphing import loaders
+from scripts.helpers import warehouse
 
 
 def make_dataset_rmsf_boxplot(pdb_rmsf_list, output_path, dataset_name, protein_class_mapping=None):
@@ -252,7 +218,7 @@ UBI,5tog
 STN,2pyk
 STN,2pzw"""
     
-    protein_class_mapping = read_protein_class_mapping(mapping_text)
+    protein_class_mapping = loaders.read_protein_class_mapping(mapping_text)
     
     pdb_rmsf_set = []
 
@@ -265,28 +231,37 @@ STN,2pzw"""
         print(f"Dataset file ./splits/{dataset_name}.txt not found")
         sys.exit(1)
     
-    for pdb in pdb_list:
-        try:
-            rmsf_path = f"./PDBs/{pdb}/analysis/rmsf.csv"
-            rmsf_bl_path = f"./PDBs/{pdb}/analysis/{pdb}_qfit_RMSF.csv"
-            
-            if os.path.exists(rmsf_path):
-                rmsf_df = pd.read_csv(rmsf_path)
-                
-                pdb_data = {
-                    "pdb_id": pdb,
-                    "rmsf": rmsf_df
-                }
-                
-                if os.path.exists(rmsf_bl_path):
-                    bl_rmsf_df = pd.read_csv(rmsf_bl_path)
-                    pdb_data["rmsf_bl"] = bl_rmsf_df
-                
-                pdb_rmsf_set.append(pdb_data)
-            else:
-                print(f"[rmsf_distribution.py] RMSF file not found for {pdb}, skipping...")
-                
-        except Exception as e:
-            print(f"[rmsf_distribution.py] Error processing {pdb}: {e}")
+    if warehouse.available(dataset_name, ["rmsf", "qfit_rmsf"]):
+        rmsfs = warehouse.read_table("rmsf", dataset_name)
+        baselines = dict(warehouse.split_by_pdb(warehouse.read_table("qfit_rmsf", dataset_name), pdb_list))
+        for pdb, rmsf_df in warehouse.split_by_pdb(rmsfs, pdb_list):
+            pdb_data = {"pdb_id": pdb, "rmsf": rmsf_df}
+            if pdb in baselines:
+                pdb_data["rmsf_bl"] = baselines[pdb]
+            pdb_rmsf_set.append(pdb_data)
+    else:
+        for pdb in pdb_list:
+            try:
+                rmsf_path = f"./PDBs/{pdb}/analysis/rmsf.csv"
+                rmsf_bl_path = f"./PDBs/{pdb}/analysis/{pdb}_qfit_RMSF.csv"
+
+                if os.path.exists(rmsf_path):
+                    rmsf_df = loaders.read_rmsf_values(pdb)
+
+                    pdb_data = {
+                        "pdb_id": pdb,
+                        "rmsf": rmsf_df
+                    }
+
+                    if os.path.exists(rmsf_bl_path):
+                        bl_rmsf_df = loaders.get_deposited_rmsf_values(pdb)
+                        pdb_data["rmsf_bl"] = bl_rmsf_df
+
+                    pdb_rmsf_set.append(pdb_data)
+                else:
+                    print(f"[rmsf_distribution.py] RMSF file not found for {pdb}, skipping...")
+
+            except Exception as e:
+                print(f"[rmsf_distribution.py] Error processing {pdb}: {e}")
 
     make_dataset_rmsf_boxplot(pdb_rmsf_set, output_path, dataset_name, protein_class_mapping)
\ No newline at end of file
@@ -8,6 +8,10 @@ import os
 import sys
 from matplotlib.lines import Line2D
 
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scripts.graphing import loaders
+from scripts.helpers import warehouse
+
 
 def make_dataset_rmsr_boxplot(pdb_rmsr_list, output_path, dataset_name):
     print(f"[rmsr_distribution.py] Making rmsr box plot for {len(pdb_rmsr_list)} PDBs...")
@@ -154,23 +158,27 @@ if __name__ == "__main__":
         print(f"Dataset file ./splits/{dataset_name}.txt not found")
         sys.exit(1)
     
-    for pdb in pdb_list:
-        try:
-            rmsr_path = f"./PDBs/{pdb}/analysis/rmsr_galign.csv"
-            
-            if os.path.exists(rmsr_path):
-                rmsr_df = pd.read_csv(rmsr_path)
-                
-                pdb_data = {
-                    "pdb_id": pdb,
-                    "rmsr": rmsr_df
-                }
-                
-                pdb_rmsr_set.append(pdb_data)
-            else:
-                print(f"[rmsr_distribution.py] rmsr file not found for {pdb}, skipping...")
-                
-        except Exception as e:
-            print(f"[rmsr_distribution.py] Error processing {pdb}: {e}")
+    if warehouse.available(dataset_name, ["rmsr"]):
+        rmsrs = warehouse.read_table("rmsr", dataset_name)
+        pdb_rmsr_set = [{"pdb_id": pdb, "rmsr": rmsr_df} for pdb, rmsr_df in warehouse.split_by_pdb(rmsrs, pdb_list)]
+    else:
+        for pdb in pdb_list:
+            try:
+                rmsr_path = f"./PDBs/{pdb}/analysis/rmsr_galign.csv"
+
+                if os.path.exists(rmsr_path):
+                    rmsr_df = loaders.read_csv(rmsr_path)
+
+                    pdb_data = {
+                        "pdb_id": pdb,
+                        "rmsr": rmsr_df
+                    }
+
+                    pdb_rmsr_set.append(pdb_data)
+                else:
+                    print(f"[rmsr_distribution.py] rmsr file not found for {pdb}, skipping...")
+
+            except Exception as e:
+                print(f"[rmsr_distribution.py] Error processing {pdb}: {e}")
 
     make_dataset_rmsr_boxplot(pdb_rmsr_set, output_path, dataset_name)
\ No newline at end of file
@@ -0,0 +1,186 @@
+# loaders.py [clear]
+# Readers shared by every graphing script. A parsed file is cached twice, keyed by path, size and mtime:
+# in-process (LRU), so all figures drawn by one process (see render_pdb_graphs.py) parse each analysis file
+# once, and on disk (./bin/graph_cache/, one pickle per source file), so later runs and other processes load
+# the parsed frame instead of parsing again. A rewritten file is parsed again. Callers get their own copy.
+# `python loaders.py clear` empties the on-disk cache.
+
+import functools
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import uuid
+
+import pandas as pd
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from scripts.helpers import protein_classes
+
+CACHE_SIZE = 64
+CACHE_DIR = "./bin/graph_cache"
+CACHE_VERSION = 1
+
+
+def file_state(path):
+    # (size, mtime_ns), or None when the file does not exist
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_size, stat.st_mtime_ns)
+
+
+def _cache_key(path):
+    state = file_state(path)
+    if state is None:
+        raise FileNotFoundError(path)
+    return (os.path.realpath(path),) + state
+
+
+def _residue_row(predictor, frame, residue_data):
+    return {
+        'predictor': predictor,
+        'frame': frame,
+        'residue': residue_data.get('seqID', None),
+        'aa': residue_data.get('compID', None),
+        'RSCCS': residue_data.get('RSCCS', None),
+        'RSR': residue_data.get('RSR', None),
+        'EDIAm': residue_data.get('EDIAm', None),
+        'chain': residue_data.get('asymID', None),
+    }
+
+
+def _parse_csv(path, option):
+    return pd.read_csv(path)
+
+
+def _parse_density_csv(path, require):
+    # density_fitness.csv lines: predictor,frame,"<json list of residues>"
+    rows = []
+    with open(path, 'r') as f:
+        for line in f:
+            if line.startswith('#') or line.startswith('predictor,'):
+                continue
+            fields = line.split(',')
+            predictor = fields[0].strip()
+            frame = fields[1].strip()
+            try:
+                metrics = json.loads((','.join(fields[2:]).strip())[1:-1])  # Remove surrounding quotes
+            except json.JSONDecodeError:
+                print(f"[loaders.py] Error parsing metrics JSON for {predictor} frame {frame} in {path}")
+                continue
+            for residue_data in metrics:
+                if require is None or require in residue_data:
+                    rows.append(_residue_row(predictor, frame, residue_data))
+    return pd.DataFrame(rows)
+
+
+def _parse_density_json(path, option):
+    # density_fitness.json: DataFrame.to_json of predictor, frame, metrics (json list of residues)
+    with open(path, 'r') as f:
+        parsed = json.load(f)
+    predictors = parsed.get('predictor', {})
+    frames = parsed.get('frame', {})
+    metrics = parsed.get('metrics', {})
+    if not predictors or not frames or not metrics:
+        return pd.DataFrame()
+    rows = [_residue_row(predictors[k], frames[k], residue_data) for k in predictors for residue_data in metrics[k]]
+    return pd.DataFrame(rows)
+
+
+PARSERS = {
+    'csv': _parse_csv,
+    'density_csv': _parse_density_csv,
+    'density_json': _parse_density_json,
+}
+
+
+def _disk_cache_path(kind, path, option):
+    name = hashlib.sha1(repr((kind, path, option)).encode()).hexdigest()
+    return os.path.join(CACHE_DIR, f"{name}.pkl")
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _parsed(kind, key, option=None):
+    path, size, mtime_ns = key
+    cache_path = _disk_cache_path(kind, path, option)
+    state = [CACHE_VERSION, size, mtime_ns]
+    try:
+        with open(cache_path, 'rb') as f:
+            entry = pickle.load(f)
+        if entry['state'] == state:
+            return entry['frame']
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"[loaders.py] Ignoring unreadable cache entry {cache_path}: {e}")
+
+    frame = PARSERS[kind](path, option)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        temp_path = f"{cache_path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, 'wb') as f:
+            pickle.dump({'source': path, 'state': state, 'frame': frame}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, cache_path)
+    except OSError as e:
+        print(f"[loaders.py] Could not write cache entry for {path}: {e}")
+    return frame
+
+
+def read_csv(path):
+    # pd.read_csv(path), cached; FileNotFoundError like pandas
+    return _parsed('csv', _cache_key(path)).copy()
+
+
+def read_density_csv(path, require=None):
+    # one row per residue and frame (predictor,frame,residue,aa,RSCCS,RSR,EDIAm,chain);
+    # with `require`, only residues that report that metric
+    return _parsed('density_csv', _cache_key(path), require).copy()
+
+
+def read_density_json(path):
+    # same columns as read_density_csv, from density_fitness.json
+    return _parsed('density_json', _cache_key(path)).copy()
+
+
+def read_rmsf_values(pdb_id):
+    # predictor,residue,residue_aa,rmsf
+    return read_csv(f"./PDBs/{pdb_id}/analysis/rmsf.csv")
+
+
+def get_deposited_rmsf_values(pdb_id):
+    # ,resseq,AA,Chain,RMSF,PDB_name
+    return read_csv(f"./PDBs/{pdb_id}/analysis/{pdb_id}_qfit_RMSF.csv")
+
+
+def read_protein_class_mapping(mapping_text=None, mapping_file="bin/protein_classes/include.txt"):
+    # class -> [pdb ids], from "class,pdb" lines (scripts/helpers/protein_classes.py)
+    mapping = {}
+    
+    if mapping_text:
+        mapping = protein_classes.parse_class_lines(mapping_text.strip().split('\n'))
+    elif os.path.exists(mapping_file):
+        try:
+            mapping = protein_classes.read_class_mapping(mapping_file)
+        except Exception as e:
+            print(f"Error reading protein class mapping: {e}")
+    
+    return mapping
+
+
+def clear(disk=False):
+    _parsed.cache_clear()
+    if disk:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2 or sys.argv[1] != "clear":
+        print("Usage: python loaders.py clear")
+        sys.exit(1)
+
+    clear(disk=True)
+    print(f"[loaders.py] Removed {CACHE_DIR}")
@@ -8,6 +8,9 @@ import os
 import sys
 from matplotlib.lines import Line2D
 
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scripts.graphing import loaders
+
 
 def read_rmsr_values(pdb_id):
     pdb_dir = "./PDBs/" + pdb_id
@@ -17,19 +20,7 @@ def read_rmsr_values(pdb_id):
         print(f"[bl_rmsf_rmsd_scatter.py] Warning: {rmsf_file} not found")
         return pd.DataFrame()
     
-    thedf = pd.read_csv(rmsf_file)
-    return thedf
-
-
-def get_deposited_rmsf_values(pdb_id):
-    pdb_dir = "./PDBs/" + pdb_id
-    rmsf_file = pdb_dir + '/analysis/' + pdb_id + "_qfit_RMSF.csv"
-    
-    if not os.path.exists(rmsf_file):
-        print(f"[bl_rmsf_rmsd_scatter.py] Warning: {rmsf_file} not found")
-        return pd.DataFrame()
-    
-    thedf = pd.read_csv(rmsf_file)
+    thedf = loaders.read_csv(rmsf_file)
     return thedf
 
 
@@ -111,25 +102,30 @@ def create_baseline_rmsf_scatter(pdb_id, rmsr_df, deposited_rmsf, output_path):
     plt.close()
 
 
-if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python bl_rmsf_rmsd_scatter.py <pdb_name> <output_path>")
-        sys.exit(1)
-
-    pdb_name = sys.argv[1]
-    output_path = sys.argv[2]
-
+def render(pdb_name, output_path):
+    # returns False when there is nothing to plot
     rmsf_file = read_rmsr_values(pdb_name)
-    deposited_rmsf = get_deposited_rmsf_values(pdb_name)
+    deposited_path = f"./PDBs/{pdb_name}/analysis/{pdb_name}_qfit_RMSF.csv"
+    deposited_rmsf = loaders.get_deposited_rmsf_values(pdb_name) if os.path.exists(deposited_path) else pd.DataFrame()
     
     if rmsf_file.empty:
         print(f"[bl_rmsf_rmsd_scatter.py] Error: No predictor RMSF data found for {pdb_name}")
-        sys.exit(1)
+        return False
     
     if deposited_rmsf.empty:
         print(f"[bl_rmsf_rmsd_scatter.py] Error: No baseline QFIT RMSF data found for {pdb_name}")
-        sys.exit(1)
+        return False
 
     create_baseline_rmsf_scatter(pdb_name, rmsf_file, deposited_rmsf, output_path)
     
-    print(f"[bl_rmsf_rmsd_scatter.py] Successfully created baseline RMSF scatter plot for {pdb_name}")
\ No newline at end of file
+    print(f"[bl_rmsf_rmsd_scatter.py] Successfully created baseline RMSF scatter plot for {pdb_name}")
+    return True
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python bl_rmsf_rmsd_scatter.py <pdb_name> <output_path>")
+        sys.exit(1)
+
+    if not render(sys.argv[1], sys.argv[2]):
+        sys.exit(1)
\ No newline at end of file
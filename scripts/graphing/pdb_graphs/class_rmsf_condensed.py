@@ -8,6 +8,12 @@ import os
 import sys
 from matplotlib.lines import Line2D
 
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scripts.graphing import loaders
+
+# rmsfs.csv class keys -> legend names; other classes keep their own label
+CLASS_NAMES = {'cypa': 'CypA', 'lysozyme': 'Lysozyme', 'ubi': 'Ubiquitin', 'stn': 'STN'}
+
 def make_rmsf_scatter(pdb_rmsf_list, output_path):
     print(f"[class_rmsf_condensed.py] Making subplot for {len(pdb_rmsf_list)} PDBs...")
     
@@ -32,6 +38,7 @@ def make_rmsf_scatter(pdb_rmsf_list, output_path):
     }
     
     pdb_legend_elements = []
+    class_label = None
     
 
     fig, ax = plt.subplots(figsize=(24, 8))
@@ -42,20 +49,30 @@ def make_rmsf_scatter(pdb_rmsf_list, output_path):
         bl_rmsf_df = pdb_data["rmsf_bl"]
         class_include = pdb_data["class_include"]
 
-        pdbInClass = class_include[class_include['pdb'] == pdb_id]
+        if class_include is None:
+            print(f"[class_rmsf_condensed.py] No class include file, skipping {pdb_id}...")
+            continue
+
+        pdbInClass = class_include[class_include['pdb'].astype(str).str.lower() == pdb_id.lower()]
         if len(pdbInClass) == 0:
             print(f"[class_rmsf_condensed.py] {pdb_id} not in class include file, skipping...")
             continue
     
-        pdbClassName = pdbInClass['class'].values[0]
-        classRMSFs = bl_rmsf_df[bl_rmsf_df['class'] == pdbClassName]
-        
+        pdbClassName = str(pdbInClass['class'].values[0]).lower()
+        classRMSFs = bl_rmsf_df[bl_rmsf_df['class'].astype(str).str.lower() == pdbClassName].sort_values('residue')
+        if classRMSFs.empty:
+            print(f"[class_rmsf_condensed.py] No class RMSF for {pdbClassName}, skipping {pdb_id}...")
+            continue
+        class_label = CLASS_NAMES.get(pdbClassName, pdbInClass['class'].values[0])
         
         rmsf_df = rmsf_df[rmsf_df['residue'] != 0]
         
+        # class residues are 0-based along the class's first structure, so they line up by position
+        residues = rmsf_df['residue'].drop_duplicates()
+        n_residues = min(len(residues), len(classRMSFs))
         ax.plot(
-                    rmsf_df['residue'].drop_duplicates(),
-                    classRMSFs['rmsf'][0:len(rmsf_df['residue'].drop_duplicates())],
+                    residues.iloc[:n_residues],
+                    classRMSFs['rmsf'].iloc[:n_residues],
                     linestyle='-',
                     color="#8f8f8f",
                     alpha=1,
@@ -89,9 +106,10 @@ def make_rmsf_scatter(pdb_rmsf_list, output_path):
         pdb_legend_elements.append(
             Line2D([0], [0], color=predictorcolors[predictor], lw=2, label=predictor.capitalize(), linestyle="--")
         )
-    pdb_legend_elements.append(
-        Line2D([0], [0], color="#8f8f8f", lw=2, label=f"{({'cypa': 'CypA','lysozyme': 'Lysozyme','ubi': 'Ubiquitin',})[pdbClassName]} PDBs", linestyle='-')
-    )
+    if class_label is not None:
+        pdb_legend_elements.append(
+            Line2D([0], [0], color="#8f8f8f", lw=2, label=f"{class_label} PDBs", linestyle='-')
+        )
     ax.legend(handles=pdb_legend_elements, loc='upper right', bbox_to_anchor=(1.005, 1.02), ncol=len(pdb_rmsf_list),framealpha=0.7, fontsize=28)
     
     plt.tight_layout()
@@ -99,13 +117,8 @@ def make_rmsf_scatter(pdb_rmsf_list, output_path):
     print(f"[class_rmsf_condensed.py] Saved subplot visualization to {output_path}")
 
 
-if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python class_rmsf_condensed.py <pdb_name> <output_path>")
-        sys.exit(1)
-
-    pdb_name = sys.argv[1]
-    output_path = sys.argv[2]
+def render(pdb_name, output_path):
+    # returns False when no PDB data was found
     pdb_rmsf_set = []
 
     # modified from dataset to just one pdb
@@ -118,14 +131,14 @@ if __name__ == "__main__":
             class_include = f"./bin/protein_classes/include.csv"
             
             if os.path.exists(rmsf_path):
-                rmsf_df = pd.read_csv(rmsf_path)
-                bl_rmsf_df = pd.read_csv(rmsf_bl_path)
+                rmsf_df = loaders.read_rmsf_values(pdb)
+                bl_rmsf_df = loaders.read_csv(rmsf_bl_path)
                 
                 pdb_rmsf_set.append({
                     "pdb_id": pdb,
                     "rmsf": rmsf_df,
                     'rmsf_bl': bl_rmsf_df,
-                    'class_include': pd.read_csv(class_include) if os.path.exists(class_include) else None
+                    'class_include': loaders.read_csv(class_include) if os.path.exists(class_include) else None
                 })
             else:
                 print(f"[class_rmsf_condensed.py] RMSF file not found for {pdb}, skipping...")
@@ -133,4 +146,13 @@ if __name__ == "__main__":
         except Exception as e:
             print(f"[class_rmsf_condensed.py] Error processing {pdb}: {e}")
 
-    make_rmsf_scatter(pdb_rmsf_set, output_path)
\ No newline at end of file
+    make_rmsf_scatter(pdb_rmsf_set, output_path)
+    return bool(pdb_rmsf_set)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python class_rmsf_condensed.py <pdb_name> <output_path>")
+        sys.exit(1)
+
+    render(sys.argv[1], sys.argv[2])
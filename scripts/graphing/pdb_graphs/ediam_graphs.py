@@ -7,7 +7,9 @@ import numpy as np
 import os
 import sys
 from matplotlib.lines import Line2D
-import json
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scripts.graphing import loaders, scalable
 
 def make_ediam_scatter(pdb_ediam_list, output_path):
     print(f"[ediam_graphs.py] Making subplot for {len(pdb_ediam_list)} PDBs...")
@@ -69,12 +71,12 @@ def make_ediam_scatter(pdb_ediam_list, output_path):
             if not predictor_data.empty:
                 ax = predictor_to_ax[predictor]
                 
-                ax.plot(
+                # one line through all frames; a filled band once that is too many points to draw
+                scalable.plot_residue_lines(
+                    ax,
                     predictor_data['residue'],
                     predictor_data['EDIAm'], 
-                    linestyle='-',
                     color=predictorcolors.get(predictor),
-                    alpha=1,
                     lw=2.5,
                     label=pdb_id.upper() if i == 0 else None
                 )
@@ -103,58 +105,13 @@ def parse_density_fitness_csv(pdb_id):
         return pd.DataFrame()
     
     try:
-        lines = []
-        with open(file_path, 'r') as f:
-            for line in f:
-                if not line.startswith('#'):
-                    lines.append({
-                        'predictor': line.split(',')[0].strip(),
-                        'frame': line.split(',')[1].strip(),
-                        'metrics': (','.join(line.split(',')[2:]).strip())[1:-1]  # Remove surrounding quotes
-                    })
-        
-        df = pd.DataFrame(lines)
-        if 'metrics' in df.columns:
-            all_data = []
-            
-            for _, row in df.iterrows():
-                predictor = row['predictor']
-                frame = row['frame']
-                
-                try:
-                    metrics = json.loads(row['metrics'])
-                    
-                    for residue_data in metrics:
-                        if 'EDIAm' in residue_data:
-                            all_data.append({
-                                'predictor': predictor,
-                                'frame': frame,
-                                'residue': residue_data.get('seqID', None),
-                                'aa': residue_data.get('compID', None),
-                                'RSCCS': residue_data['RSCCS'],
-                                'RSR': residue_data.get('RSR', None),
-                                'EDIAm': residue_data.get('EDIAm', None),
-                                'chain': residue_data.get('asymID', None)
-                            })
-                except json.JSONDecodeError:
-                    print(row['metrics'])
-                    print(f"[ediam_graphs.py] Error parsing metrics JSON for {predictor} frame {frame}")
-                except Exception as e:
-                    print(f"[ediam_graphs.py] Error processing metrics: {e}")
-            
-            return pd.DataFrame(all_data)
-            
+        return loaders.read_density_csv(file_path, require='EDIAm')
     except Exception as e:
         print(f"[ediam_graphs.py] Error reading {file_path}: {e}")
         return pd.DataFrame()
 
-if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python ediam_graphs.py <pdb_name> <output_path>")
-        sys.exit(1)
-
-    pdb_name = sys.argv[1]
-    output_path = sys.argv[2]
+def render(pdb_name, output_path):
+    # returns False when no PDB data was found
     pdb_ediam_set = []
 
     # modified from dataset to just one pdb
@@ -175,4 +132,13 @@ if __name__ == "__main__":
         except Exception as e:
             print(f"[ediam_graphs.py] Error processing {pdb}: {e}")
 
-    make_ediam_scatter(pdb_ediam_set, output_path) 
\ No newline at end of file
+    make_ediam_scatter(pdb_ediam_set, output_path)
+    return bool(pdb_ediam_set)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python ediam_graphs.py <pdb_name> <output_path>")
+        sys.exit(1)
+
+    render(sys.argv[1], sys.argv[2])
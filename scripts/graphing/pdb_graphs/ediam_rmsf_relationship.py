@@ -3,7 +3,6 @@ import matplotlib.pyplot as plt
 import numpy as np
 import os
 import sys
-import json
 import seaborn as sns
 from scipy import stats
 from matplotlib.colors import LinearSegmentedColormap
@@ -11,6 +10,9 @@ from matplotlib.collections import LineCollection
 from matplotlib.patches import Rectangle
 from matplotlib.patches import Patch
 
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scripts.graphing import loaders
+
 
 def make_rmsf_ediam_plot(pdb_id, rmsf_df, ediam_df, output_path, predictor):
     print(f"[ediam_rmsf_relationship.py] Creating plot for {pdb_id}...")
@@ -102,7 +104,7 @@ def load_rmsf_data(pdb_id):
         return pd.DataFrame()
     
     try:
-        return pd.read_csv(file_path)
+        return loaders.read_csv(file_path)
     except Exception as e:
         print(f"[ediam_rmsf_relationship.py] Error reading RMSF data: {e}")
         return pd.DataFrame()
@@ -116,113 +118,42 @@ def parse_density_fitness_csv(pdb_id):
         return pd.DataFrame()
     
     try:
-        all_data = []
-        parsed = json.load(open(file_path, 'r'))
-        predictors = parsed.get('predictor', [])
-        frames = parsed.get('frame', [])
-        metrics = parsed.get('metrics', [])
-        if not predictors or not frames or not metrics:
+        ediam_df = loaders.read_density_json(file_path)
+        if ediam_df.empty:
             print(f"[ediam_rmsf_relationship.py] No valid data found in {file_path}")
             return pd.DataFrame()
-        
-        allKeys = predictors.keys()
-        for key in allKeys:
-            predictor = predictors[key]
-            frame = frames[key]
-            thismetrics = metrics[key]
-            for metric in thismetrics:
-                all_data.append({
-                    'predictor': predictor,
-                    'frame': frame,
-                    'residue': metric.get('seqID', None),
-                    'aa': metric.get('compID', None),
-                    'RSCCS': metric.get('RSCCS', None),
-                    'RSR': metric.get('RSR', None),
-                    'EDIAm': metric.get('EDIAm', None),
-                    'chain': metric.get('asymID', None)
-                })
-           
-        ediam_df = pd.DataFrame(all_data)
+        ediam_df = ediam_df.groupby(['predictor', 'residue', 'aa'])['EDIAm'].mean().reset_index()
+        return ediam_df
             
-        if not ediam_df.empty:
-            avg_ediam = ediam_df.groupby(['predictor', 'residue', 'aa'])['EDIAm'].mean().reset_index()
-            return avg_ediam
     except Exception as e:
         print(f"[ediam_rmsf_relationship.py] Error reading {file_path}: {e}")
         return pd.DataFrame()
 
 
-def load_ediam_data(pdb_id):
-    file_path = f"./PDBs/{pdb_id}/analysis/density_fitness.csv"
-    
-    if not os.path.exists(file_path):
-        print(f"[ediam_rmsf_relationship.py] Density fitness file not found: {file_path}")
-        return pd.DataFrame()
-    
-    try:
-        lines = []
-        with open(file_path, 'r') as f:
-            for line in f:
-                if not line.startswith('#'):
-                    lines.append({
-                        'predictor': line.split(',')[0].strip(),
-                        'frame': line.split(',')[1].strip(),
-                        'metrics': (','.join(line.split(',')[2:]).strip())[1:-1]
-                    })
-        
-        df = pd.DataFrame(lines)
-        all_data = []
-        
-        if 'metrics' in df.columns:
-            for _, row in df.iterrows():
-                predictor = row['predictor']
-                frame = row['frame']
-                
-                try:
-                    metrics = json.loads(row['metrics'])
-                    
-                    for residue_data in metrics:
-                        if 'EDIAm' in residue_data and 'seqID' in residue_data:
-                            all_data.append({
-                                'predictor': predictor,
-                                'frame': frame,
-                                'residue': residue_data['pdb']['seqNum'],
-                                'EDIAm': residue_data['EDIAm'],
-                                'aa': residue_data.get('compID', '')
-                            })
-                except Exception as e:
-                    print(f"[ediam_rmsf_relationship.py] Error parsing metrics: {e}")
-            
-            ediam_df = pd.DataFrame(all_data)
-            
-            if not ediam_df.empty:
-                avg_ediam = ediam_df.groupby(['predictor', 'residue', 'aa'])['EDIAm'].mean().reset_index()
-                return avg_ediam
-        
-        return pd.DataFrame()
-        
-    except Exception as e:
-        print(f"[ediam_rmsf_relationship.py] Error loading density fitness data: {e}")
-        return pd.DataFrame()
-
-if __name__ == "__main__":
-    if len(sys.argv) != 4:
-        print("Usage: python ediam_rmsf_relationship.py <pdb_id> <predictor> <output_path>")
-        sys.exit(1)
-
-    pdb_id = sys.argv[1].lower()
-    predictor = sys.argv[2].lower()
-    output_path = sys.argv[3]
+def render(pdb_id, predictor, output_path):
+    # returns False when there is nothing to plot
+    pdb_id = pdb_id.lower()
+    predictor = predictor.lower()
     
     rmsf_data = load_rmsf_data(pdb_id)
     ediam_data = parse_density_fitness_csv(pdb_id)
     
     if rmsf_data.empty:
         print(f"[ediam_rmsf_relationship.py] No RMSF data found for {pdb_id} with predictor {predictor}")
-        sys.exit(1)
+        return False
         
     if ediam_data.empty:
         print(f"[ediam_rmsf_relationship.py] No EDIAm data found for {pdb_id} with predictor {predictor}")
-        sys.exit(1)
+        return False
     
-    make_rmsf_ediam_plot(pdb_id, rmsf_data, ediam_data, output_path, predictor)
\ No newline at end of file
+    make_rmsf_ediam_plot(pdb_id, rmsf_data, ediam_data, output_path, predictor)
+    return True
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 4:
+        print("Usage: python ediam_rmsf_relationship.py <pdb_id> <predictor> <output_path>")
+        sys.exit(1)
+
+    if not render(sys.argv[1], sys.argv[2], sys.argv[3]):
+        sys.exit(1)
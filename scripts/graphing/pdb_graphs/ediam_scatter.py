@@ -6,9 +6,11 @@ import matplotlib.pyplot as plt
 import numpy as np
 import os
 import sys
-import json
 import seaborn as sns
 
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scripts.graphing import loaders, scalable
+
 predictors = ['sam2', 'alphaflow', 'bioemu', 'openfold', 'boltz2']
 
 def make_ediam_scatter(pdb_id, predictor, df, output_path):
@@ -24,8 +26,11 @@ def make_ediam_scatter(pdb_id, predictor, df, output_path):
     
     plt.figure(figsize=(12, 6), dpi=100)
     
-    ax = plt.scatter(df['residue'], df['EDIAm'], c=df['EDIAm'], cmap='coolwarm_r', 
-                    alpha=0.8, s=30, edgecolors='none')
+    # past scalable.POINT_CAP points, one point per residue and pixel row (the rest are drawn over anyway)
+    shown = df.iloc[scalable.bin_points(df['residue'], df['EDIAm'])]
+    ax = plt.scatter(shown['residue'], shown['EDIAm'], c=shown['EDIAm'], cmap='coolwarm_r', 
+                    vmin=df['EDIAm'].min(), vmax=df['EDIAm'].max(),
+                    alpha=0.8, s=30, edgecolors='none', rasterized=len(df) > scalable.POINT_CAP)
     
     
     plt.xlabel('Residue Number', fontsize=42)
@@ -55,10 +60,11 @@ alter all, b=0.0
 """
     
     commands += "# Set b-factors to EDIAm values\n"
-    for _, row in df.iterrows():
-        if pd.notna(row['residue']) and pd.notna(row['EDIAm']) and pd.notna(row['chain']) and pd.notna(row['frame']):
-            model_name = f"{predictor}_{1+row['frame']:04d}"
-            commands += f"alter {model_name} and resi {int(row['residue'])}, b={row['EDIAm']}\n"
+    rows = df.dropna(subset=['residue', 'EDIAm', 'chain', 'frame'])
+    commands += "".join(
+        f"alter {predictor}_{1+frame:04d} and resi {int(residue)}, b={ediam}\n"
+        for frame, residue, ediam in zip(rows['frame'].tolist(), rows['residue'].tolist(), rows['EDIAm'].tolist())
+    )
     
     commands += """
 spectrum b, red_white_blue, minimum=0, maximum=1
@@ -78,53 +84,33 @@ def parse_density_fitness_csv(pdb_id):
         return pd.DataFrame()
     
     try:
-   
-        all_data = []
-        parsed = json.load(open(file_path, 'r'))
-        predictors = parsed.get('predictor', [])
-        frames = parsed.get('frame', [])
-        metrics = parsed.get('metrics', [])
-        if not predictors or not frames or not metrics:
+        ediam_df = loaders.read_density_json(file_path)
+        if ediam_df.empty:
             print(f"[ediam_scatter.py] No valid data found in {file_path}")
             return pd.DataFrame()
-        
-        allKeys = predictors.keys()
-        for key in allKeys:
-            predictor = predictors[key]
-            frame = frames[key]
-            thismetrics = metrics[key]
-            for metric in thismetrics:
-                all_data.append({
-                    'predictor': predictor,
-                    'frame': frame,
-                    'residue': metric.get('seqID', None),
-                    'aa': metric.get('compID', None),
-                    'RSCCS': metric.get('RSCCS', None),
-                    'RSR': metric.get('RSR', None),
-                    'EDIAm': metric.get('EDIAm', None),
-                    'chain': metric.get('asymID', None)
-                })
-      
-        return pd.DataFrame(all_data)
+        return ediam_df
             
     except Exception as e:
         print(f"[ediam_scatter.py] Error reading {file_path}: {e}")
         return pd.DataFrame()
 
 
+def render(pdb_id, predictor, output_path):
+    # returns False when there is nothing to plot
+    ediam_data = parse_density_fitness_csv(pdb_id.lower())
+    
+    if ediam_data.empty:
+        print(f"[ediam_scatter.py] No ediam data found for {pdb_id}")
+        return False
+    
+    make_ediam_scatter(pdb_id.lower(), predictor, ediam_data, output_path)
+    return True
+
+
 if __name__ == "__main__":
     if len(sys.argv) != 4:
         print("Usage: python ediam_scatter.py <pdb_id> <predictor> <output_path>")
         sys.exit(1)
 
-    pdb_id = sys.argv[1].lower()
-    predictor = sys.argv[2]
-    output_path = sys.argv[3]
-    
-    ediam_data = parse_density_fitness_csv(pdb_id)
-    
-    if ediam_data.empty:
-        print(f"[ediam_scatter.py] No ediam data found for {pdb_id}")
+    if not render(sys.argv[1], sys.argv[2], sys.argv[3]):
         sys.exit(1)
-    
-    make_ediam_scatter(pdb_id, predictor, ediam_data, output_path)
\ No newline at end of file
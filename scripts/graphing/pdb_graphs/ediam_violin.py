@@ -6,9 +6,11 @@ import matplotlib.pyplot as plt
 import numpy as np
 import os
 import sys
-import json
 import seaborn as sns
 
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scripts.graphing import loaders, scalable
+
 predictors = ['sam2', 'alphaflow', 'bioemu', 'openfold', 'boltz2']
 
 def make_ediam_violin(pdb_id, df, output_path):
@@ -31,17 +33,19 @@ def make_ediam_violin(pdb_id, df, output_path):
     
     
     
+    # above scalable.POINT_CAP points per predictor the strip keeps the same distribution with fewer points
     sns.stripplot(
         x='predictor', 
         y='EDIAm',
-        data=df,
+        data=scalable.thin_groups(df, 'EDIAm', 'predictor'),
         palette=colors, 
         size=3,
         alpha=0.4, 
         jitter=True,
         dodge=False,
         order=predictors, 
-        zorder=1
+        zorder=1,
+        rasterized=len(df) > scalable.POINT_CAP
     )
     
     ax = sns.violinplot(
@@ -91,84 +95,33 @@ def parse_density_fitness_csv(pdb_id):
         return pd.DataFrame()
     
     try:
-        # lines = []
-        # with open(file_path, 'r') as f:
-        #     for line in f:
-        #         if not line.startswith('#'):
-        #             lines.append({
-        #                 'predictor': line.split(',')[0].strip(),
-        #                 'frame': line.split(',')[1].strip(),
-        #                 'metrics': (','.join(line.split(',')[2:]).strip())[1:-1]  # Remove surrounding quotes cuz JSON parsing
-        #             })
-        
-        all_data = []
-        parsed = json.load(open(file_path, 'r'))
-        predictors = parsed.get('predictor', [])
-        frames = parsed.get('frame', [])
-        metrics = parsed.get('metrics', [])
-        if not predictors or not frames or not metrics:
+        ediam_df = loaders.read_density_json(file_path)
+        if ediam_df.empty:
             print(f"[ediam_violin.py] No valid data found in {file_path}")
             return pd.DataFrame()
-        
-        allKeys = predictors.keys()
-        for key in allKeys:
-            predictor = predictors[key]
-            frame = frames[key]
-            thismetrics = metrics[key]
-            for metric in thismetrics:
-                all_data.append({
-                    'predictor': predictor,
-                    'frame': frame,
-                    'residue': metric.get('seqID', None),
-                    'aa': metric.get('compID', None),
-                    'RSCCS': metric.get('RSCCS', None),
-                    'RSR': metric.get('RSR', None),
-                    'EDIAm': metric.get('EDIAm', None),
-                    'chain': metric.get('asymID', None)
-                })
-            # for _, row in df.iterrows():
-            #     predictor = row['predictor']
-            #     frame = row['frame']
-            #     metrics = row['metrics']
-                
-            #     try:
-                    
-            #         for residue_data in metrics:
-            #             if 'EDIAm' in residue_data:
-            #                 all_data.append({
-            #                     'predictor': predictor,
-            #                     'frame': frame,
-            #                     'residue': residue_data.get('seqID', None),
-            #                     'aa': residue_data.get('compID', None),
-            #                     'RSCCS': residue_data['RSCCS'],
-            #                     'RSR': residue_data.get('RSR', None),
-            #                     'EDIAm': residue_data.get('EDIAm', None),
-            #                     'chain': residue_data.get('asymID', None)
-            #                 })
-            #     except json.JSONDecodeError:
-            #         print(f"[ediam_violin.py] Error parsing metrics JSON for {predictor} frame {frame}")
-            #     except Exception as e:
-            #         print(f"[ediam_violin.py] Error processing metrics: {e}")
-            
-        return pd.DataFrame(all_data)
+        return ediam_df
             
     except Exception as e:
         print(f"[ediam_violin.py] Error reading {file_path}: {e}")
         return pd.DataFrame()
 
 
+def render(pdb_id, output_path):
+    # returns False when there is nothing to plot
+    ediam_data = parse_density_fitness_csv(pdb_id.lower())
+    
+    if ediam_data.empty:
+        print(f"[ediam_violin.py] No ediam data found for {pdb_id}")
+        return False
+    
+    make_ediam_violin(pdb_id.lower(), ediam_data, output_path)
+    return True
+
+
 if __name__ == "__main__":
     if len(sys.argv) != 3:
         print("Usage: python ediam_violin.py <pdb_id> <output_path>")
         sys.exit(1)
 
-    pdb_id = sys.argv[1].lower()
-    output_path = sys.argv[2]
-    
-    ediam_data = parse_density_fitness_csv(pdb_id)
-    
-    if ediam_data.empty:
-        print(f"[ediam_violin.py] No ediam data found for {pdb_id}")
+    if not render(sys.argv[1], sys.argv[2]):
         sys.exit(1)
-    
-    make_ediam_violin(pdb_id, ediam_data, output_path)
\ No newline at end of file
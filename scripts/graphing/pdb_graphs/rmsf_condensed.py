@@ -8,6 +8,9 @@ import os
 import sys
 from matplotlib.lines import Line2D
 
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scripts.graphing import loaders
+
 def make_rmsf_scatter(pdb_rmsf_list, output_path):
     print(f"[rmsf_graphs.py] Making subplot for {len(pdb_rmsf_list)} PDBs...")
     
@@ -90,13 +93,8 @@ def make_rmsf_scatter(pdb_rmsf_list, output_path):
     print(f"[rmsf_graphs.py] Saved subplot visualization to {output_path}")
 
 
-if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python rmsf_graphs.py <pdb_name> <output_path>")
-        sys.exit(1)
-
-    pdb_name = sys.argv[1]
-    output_path = sys.argv[2]
+def render(pdb_name, output_path):
+    # returns False when no PDB data was found
     pdb_rmsf_set = []
 
     # modified from dataset to just one pdb
@@ -105,11 +103,10 @@ if __name__ == "__main__":
     for pdb in pdb_list:
         try:
             rmsf_path = f"./PDBs/{pdb}/analysis/rmsf.csv"
-            rmsf_bl_path = f"./PDBs/{pdb}/analysis/{pdb}_qfit_RMSF.csv"
             
             if os.path.exists(rmsf_path):
-                rmsf_df = pd.read_csv(rmsf_path)
-                bl_rmsf_df = pd.read_csv(rmsf_bl_path)
+                rmsf_df = loaders.read_rmsf_values(pdb)
+                bl_rmsf_df = loaders.get_deposited_rmsf_values(pdb)
                 
                 pdb_rmsf_set.append({
                     "pdb_id": pdb,
@@ -122,4 +119,13 @@ if __name__ == "__main__":
         except Exception as e:
             print(f"[rmsf_graphs.py] Error processing {pdb}: {e}")
 
-    make_rmsf_scatter(pdb_rmsf_set, output_path)
\ No newline at end of file
+    make_rmsf_scatter(pdb_rmsf_set, output_path)
+    return bool(pdb_rmsf_set)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python rmsf_graphs.py <pdb_name> <output_path>")
+        sys.exit(1)
+
+    render(sys.argv[1], sys.argv[2])
@@ -8,29 +8,13 @@ import os
 import sys
 from matplotlib.lines import Line2D
 
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scripts.graphing import loaders
 
-def read_rmsf_values(pdb_id):
-    pdb_dir = "./PDBs/" + pdb_id
-    rmsf_file = pdb_dir + '/analysis/rmsf.csv'
-    thedf = pd.read_csv(rmsf_file)
-    return thedf
 
-def get_deposited_rmsf_values(pdb_id):
-    pdb_dir = "./PDBs/" + pdb_id
-    rmsf_file = pdb_dir + '/analysis/' + pdb_id + "_qfit_RMSF.csv"
-    thedf = pd.read_csv(rmsf_file)
-    return thedf
-
-if (__name__ == "__main__"):
-    if len(sys.argv) != 3:
-        print("Usage: python rmsf_distribution.py <pdb_name> <output_path>")
-        sys.exit(1)
-
-    pdb_name = sys.argv[1]
-    output_path = sys.argv[2]
-
-    rmsf_file = read_rmsf_values(pdb_name)
-    deposited_rmsf = get_deposited_rmsf_values(pdb_name)
+def render(pdb_name, output_path):
+    rmsf_file = loaders.read_rmsf_values(pdb_name)
+    deposited_rmsf = loaders.get_deposited_rmsf_values(pdb_name)
     deposited_rmsf['rmsf'] = deposited_rmsf['RMSF']
 
 
@@ -88,7 +72,12 @@ if (__name__ == "__main__"):
     plt.show()
     
     print(f"RMSF distribution box plot saved to: {output_path}")
+    return True
 
 
+if (__name__ == "__main__"):
+    if len(sys.argv) != 3:
+        print("Usage: python rmsf_distribution.py <pdb_name> <output_path>")
+        sys.exit(1)
 
-
+    render(sys.argv[1], sys.argv[2])
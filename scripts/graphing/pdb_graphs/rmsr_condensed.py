@@ -8,6 +8,9 @@ import os
 import sys
 from matplotlib.lines import Line2D
 
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scripts.graphing import loaders
+
 def make_rmsr_scatter(pdb_rmsr_list, output_path):
     print(f"[rmsr_condensed.py] Making subplot for {len(pdb_rmsr_list)} PDBs...")
     
@@ -72,13 +75,8 @@ def make_rmsr_scatter(pdb_rmsr_list, output_path):
     print(f"[rmsr_condensed.py] Saved subplot visualization to {output_path}")
 
 
-if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Usage: python rmsr_condensed.py <pdb_name> <output_path>")
-        sys.exit(1)
-
-    pdb_name = sys.argv[1]
-    output_path = sys.argv[2]
+def render(pdb_name, output_path):
+    # returns False when no PDB data was found
     pdb_rmsr_set = []
 
     # modified from dataset to just one pdb
@@ -89,7 +87,7 @@ if __name__ == "__main__":
             rmsr_path = f"./PDBs/{pdb}/analysis/rmsr_galign.csv"
             
             if os.path.exists(rmsr_path):
-                rmsr_df = pd.read_csv(rmsr_path)
+                rmsr_df = loaders.read_csv(rmsr_path)
                 
                 pdb_rmsr_set.append({
                     "pdb_id": pdb,
@@ -101,4 +99,13 @@ if __name__ == "__main__":
         except Exception as e:
             print(f"[rmsr_condensed.py] Error processing {pdb}: {e}")
 
-    make_rmsr_scatter(pdb_rmsr_set, output_path)
\ No newline at end of file
+    make_rmsr_scatter(pdb_rmsr_set, output_path)
+    return bool(pdb_rmsr_set)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python rmsr_condensed.py <pdb_name> <output_path>")
+        sys.exit(1)
+
+    render(sys.argv[1], sys.argv[2])
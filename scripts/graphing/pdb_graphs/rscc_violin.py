@@ -6,9 +6,11 @@ import matplotlib.pyplot as plt
 import numpy as np
 import os
 import sys
-import json
 import seaborn as sns
 
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..", "..")))
+from scripts.graphing import loaders, scalable
+
 def make_rscc_violin(pdb_id, df, output_path):
     print(f"[rscc_violin.py] Creating violin plot for {pdb_id}...")
     
@@ -29,17 +31,19 @@ def make_rscc_violin(pdb_id, df, output_path):
     
     
     
+    # above scalable.POINT_CAP points per predictor the strip keeps the same distribution with fewer points
     sns.stripplot(
         x='predictor', 
         y='RSCCS',
-        data=df,
+        data=scalable.thin_groups(df, 'RSCCS', 'predictor'),
         palette=colors, 
         size=3,
         alpha=0.4, 
         jitter=True,
         dodge=False,
         order=['sam2', 'alphaflow', 'bioemu', 'openfold', 'boltz2'], 
-        zorder=1
+        zorder=1,
+        rasterized=len(df) > scalable.POINT_CAP
     )
     
     ax = sns.violinplot(
@@ -88,63 +92,28 @@ def parse_density_fitness_csv(pdb_id):
         return pd.DataFrame()
     
     try:
-        lines = []
-        with open(file_path, 'r') as f:
-            for line in f:
-                if not line.startswith('#'):
-                    lines.append({
-                        'predictor': line.split(',')[0].strip(),
-                        'frame': line.split(',')[1].strip(),
-                        'metrics': (','.join(line.split(',')[2:]).strip())[1:-1] # Remove surrounding quotes cuz JSON parsing
-                    })
-        
-        df = pd.DataFrame(lines)
-        if 'metrics' in df.columns:
-            all_data = []
-            
-            for _, row in df.iterrows():
-                predictor = row['predictor']
-                frame = row['frame']
-                
-                try:
-                    metrics = json.loads(row['metrics'])
-                    
-                    for residue_data in metrics:
-                        if 'RSCCS' in residue_data:
-                            all_data.append({
-                                'predictor': predictor,
-                                'frame': frame,
-                                'residue': residue_data.get('seqID', None),
-                                'aa': residue_data.get('compID', None),
-                                'RSCCS': residue_data['RSCCS'],
-                                'RSR': residue_data.get('RSR', None),
-                                'chain': residue_data.get('asymID', None)
-                            })
-                except json.JSONDecodeError:
-                    print(row['metrics'])
-                    print(f"[rscc_violin.py] Error parsing metrics JSON for {predictor} frame {frame}")
-                except Exception as e:
-                    print(f"[rscc_violin.py] Error processing metrics: {e}")
-            
-            return pd.DataFrame(all_data)
-            
+        return loaders.read_density_csv(file_path, require='RSCCS')
     except Exception as e:
         print(f"[rscc_violin.py] Error reading {file_path}: {e}")
         return pd.DataFrame()
 
 
+def render(pdb_id, output_path):
+    # returns False when there is nothing to plot
+    rscc_data = parse_density_fitness_csv(pdb_id.lower())
+    
+    if rscc_data.empty:
+        print(f"[rscc_violin.py] No RSCC data found for {pdb_id}")
+        return False
+    
+    make_rscc_violin(pdb_id.lower(), rscc_data, output_path)
+    return True
+
+
 if __name__ == "__main__":
     if len(sys.argv) != 3:
         print("Usage: python rscc_violin.py <pdb_id> <output_path>")
         sys.exit(1)
 
-    pdb_id = sys.argv[1].lower()
-    output_path = sys.argv[2]
-    
-    rscc_data = parse_density_fitness_csv(pdb_id)
-    
-    if rscc_data.empty:
-        print(f"[rscc_violin.py] No RSCC data found for {pdb_id}")
+    if not render(sys.argv[1], sys.argv[2]):
         sys.exit(1)
-    
-    make_rscc_violin(pdb_id, rscc_data, output_path)
\ No newline at end of file
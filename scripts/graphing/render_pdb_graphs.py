@@ -0,0 +1,177 @@
+# render_pdb_graphs.py <split_name> [--figures f1 f2 ...] [--predictors p1 ...] [--workers N] [--output_dir DIR] [--force]
+# Renders the per-PDB figures of scripts/graphing/pdb_graphs for every PDB of a split, instead of starting a
+# new interpreter per PDB and figure (dataset_run.sh). Workers import matplotlib once with the Agg backend;
+# each worker renders all figures of one PDB, so they share the analysis files loaders.py already parsed.
+# Figures go to <output_dir>/<pdb_id>/<figure>[_<predictor>].png (default ./bin/graphs/<split_name>).
+# A figure is skipped when its input files, its script and its png are unchanged since it was last rendered
+# (<output_dir>/render_state.json); --force renders everything again.
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+os.environ["MPLBACKEND"] = "Agg"
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from scripts.graphing import loaders
+
+PREDICTORS = ['bioemu', 'alphaflow', 'sam2', 'boltz2', 'openfold']
+SCRIPT_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "pdb_graphs")
+# modules the figure scripts draw through, part of every figure's state
+SHARED_CODE = [os.path.realpath(loaders.__file__), os.path.join(os.path.dirname(os.path.realpath(__file__)), "scalable.py")]
+
+# figure -> (input files, one figure per predictor?)
+FIGURES = {
+    'bl_rmsf_rmsd_scatter': (["./PDBs/{pdb}/analysis/rmsr_galign_each.csv", "./PDBs/{pdb}/analysis/{pdb}_qfit_RMSF.csv"], False),
+    'class_rmsf_condensed': (["./PDBs/{pdb}/analysis/rmsf.csv", "./bin/protein_classes/rmsfs.csv", "./bin/protein_classes/include.csv"], False),
+    'ediam_graphs': (["./PDBs/{pdb}/analysis/density_fitness.csv"], False),
+    'ediam_rmsf_relationship': (["./PDBs/{pdb}/analysis/rmsf.csv", "./PDBs/{pdb}/analysis/density_fitness.json"], True),
+    'ediam_scatter': (["./PDBs/{pdb}/analysis/density_fitness.json"], True),
+    'ediam_violin': (["./PDBs/{pdb}/analysis/density_fitness.json"], False),
+    'rmsf_condensed': (["./PDBs/{pdb}/analysis/rmsf.csv", "./PDBs/{pdb}/analysis/{pdb}_qfit_RMSF.csv"], False),
+    'rmsf_distribution': (["./PDBs/{pdb}/analysis/rmsf.csv", "./PDBs/{pdb}/analysis/{pdb}_qfit_RMSF.csv"], False),
+    'rmsf_subplots': (["./PDBs/{pdb}/analysis/rmsf.csv", "./PDBs/{pdb}/analysis/{pdb}_qfit_RMSF.csv"], False),
+    'rmsr_condensed': (["./PDBs/{pdb}/analysis/rmsr_galign.csv"], False),
+    'rscc_violin': (["./PDBs/{pdb}/analysis/density_fitness.csv"], False),
+}
+
+
+def init_worker():
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def state_of(paths):
+    return {path: list(state) if state else None for path, state in ((path, loaders.file_state(path)) for path in paths)}
+
+
+def input_state(figure, pdb_id):
+    # the figure's data files plus the code that draws it
+    paths = [path.format(pdb=pdb_id) for path in FIGURES[figure][0]]
+    paths += [os.path.join(SCRIPT_DIR, f"{figure}.py")] + SHARED_CODE
+    return state_of(paths)
+
+
+def figure_jobs(pdb_id, figures, predictors, output_dir):
+    # [(key, figure, predictor, output_path)]
+    jobs = []
+    for figure in figures:
+        for predictor in (predictors if FIGURES[figure][1] else [None]):
+            name = f"{figure}_{predictor}" if predictor else figure
+            jobs.append((f"{pdb_id}/{name}", figure, predictor, os.path.join(output_dir, pdb_id, f"{name}.png")))
+    return jobs
+
+
+def render_pdb(pdb_id, jobs):
+    # runs in a worker: every stale figure of one PDB; returns [(key, inputs, output state, status)]
+    import matplotlib.pyplot as plt
+
+    results = []
+    for key, figure, predictor, output_path in jobs:
+        inputs = input_state(figure, pdb_id)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        try:
+            module = importlib.import_module(f"scripts.graphing.pdb_graphs.{figure}")
+            # style changes a script makes (e.g. sns.set_style) must not leak into the next figure
+            with plt.rc_context():
+                if predictor:
+                    rendered = module.render(pdb_id, predictor, output_path)
+                else:
+                    rendered = module.render(pdb_id, output_path)
+            output = loaders.file_state(output_path)
+            status = "rendered" if rendered and output else "no data"
+        except Exception as e:
+            print(f"[render_pdb_graphs.py] {key} failed: {e}", flush=True)
+            output, status = None, "failed"
+        finally:
+            plt.close('all')
+        results.append((key, inputs, list(output) if output else None, status))
+    return results
+
+
+def load_state(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def save_state(path, state):
+    with open(path + ".tmp", 'w') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def up_to_date(entry, inputs, output_path):
+    if not entry or entry['inputs'] != inputs:
+        return False
+    output = loaders.file_state(output_path)
+    return output is not None and list(output) == entry['output']
+
+
+def render_split(split_name, figures, predictors, workers=4, output_dir=None, force=False):
+    with open(f"./splits/{split_name}.txt") as f:
+        pdb_ids = [line.strip() for line in f if line.strip()]
+
+    output_dir = output_dir or f"./bin/graphs/{split_name}"
+    os.makedirs(output_dir, exist_ok=True)
+    state_path = os.path.join(output_dir, "render_state.json")
+    state = {} if force else load_state(state_path)
+
+    tasks = {}
+    skipped = 0
+    for pdb_id in pdb_ids:
+        stale = []
+        for job in figure_jobs(pdb_id, figures, predictors, output_dir):
+            key, figure, _, output_path = job
+            if not force and up_to_date(state.get(key), input_state(figure, pdb_id), output_path):
+                skipped += 1
+            else:
+                stale.append(job)
+        if stale:
+            tasks[pdb_id] = stale
+
+    print(f"[render_pdb_graphs.py] {sum(len(jobs) for jobs in tasks.values())} figures to render for "
+          f"{len(tasks)} PDBs, {skipped} unchanged")
+
+    start = time.time()
+    counts = {"rendered": 0, "no data": 0, "failed": 0}
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+        futures = {executor.submit(render_pdb, pdb_id, jobs): pdb_id for pdb_id, jobs in tasks.items()}
+        for future in as_completed(futures):
+            try:
+                results = future.result()
+            except Exception as e:
+                print(f"[render_pdb_graphs.py] {futures[future]} failed: {e}")
+                counts["failed"] += len(tasks[futures[future]])
+                continue
+            for key, inputs, output, status in results:
+                counts[status] += 1
+                if status == "rendered":
+                    state[key] = {'inputs': inputs, 'output': output}
+                else:
+                    state.pop(key, None)
+            save_state(state_path, state)
+
+    print(f"[render_pdb_graphs.py] Rendered {counts['rendered']} figures, {counts['no data']} without data, "
+          f"{counts['failed']} failed, {skipped} unchanged in {time.time() - start:.1f}s ({output_dir})")
+    return counts["failed"] == 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render per-PDB figures for a split in a process pool")
+    parser.add_argument("split_name")
+    parser.add_argument("--figures", nargs="+", choices=list(FIGURES), default=list(FIGURES))
+    parser.add_argument("--predictors", nargs="+", choices=PREDICTORS, default=PREDICTORS,
+                        help="Predictors of the per-predictor figures")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--output_dir", help="Default: ./bin/graphs/<split_name>")
+    parser.add_argument("--force", action="store_true", help="Render figures even if their inputs are unchanged")
+    args = parser.parse_args()
+
+    ok = render_split(args.split_name, args.figures, args.predictors, args.workers, args.output_dir, args.force)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,78 @@
+# scalable.py
+# Drawing helpers for figures whose point count grows with frames x residues x predictors. Up to POINT_CAP
+# points a layer is drawn from the raw data as before. Above it the data is reduced in NumPy to what is
+# visible at the figure's resolution, and the layer is rasterized so pdf/svg outputs stay small:
+#   thin_groups   strip plots: per group, evenly spaced order statistics (same distribution, fewer points)
+#   bin_points    scatter plots: one point per occupied (x, y-bin) cell, about a pixel tall
+#   residue_band  per-residue lines drawn over all frames: the min-max envelope the lines sweep out
+
+import numpy as np
+from matplotlib.collections import LineCollection
+
+POINT_CAP = 20000
+
+
+def thin_indices(values, cap=POINT_CAP):
+    # positions of `cap` evenly spaced order statistics of values (all of them when there are fewer)
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) <= cap:
+        return np.arange(len(values))
+    order = np.argsort(values, kind='stable')
+    return np.sort(order[np.linspace(0, len(values) - 1, cap).round().astype(np.int64)])
+
+
+def thin_groups(df, column, by, cap=POINT_CAP):
+    # df with at most `cap` rows per `by` group, keeping the distribution of `column` in each group
+    if len(df) <= cap:
+        return df
+    keep = []
+    for _, positions in df.groupby(by, sort=False).indices.items():
+        keep.append(positions[thin_indices(df[column].to_numpy()[positions], cap)])
+    return df.iloc[np.sort(np.concatenate(keep))]
+
+
+def bin_points(x, y, y_bins=600, cap=POINT_CAP):
+    # positions of one point per (x, y-bin) cell; y is split into y_bins bins over its range
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(x) <= cap:
+        return np.arange(len(x))
+    valid = np.flatnonzero(~np.isnan(x) & ~np.isnan(y))
+    low, high = y[valid].min(), y[valid].max()
+    step = (high - low) / y_bins or 1.0
+    cells = np.stack([x[valid], np.floor((y[valid] - low) / step)], axis=1)
+    _, first = np.unique(cells, axis=0, return_index=True)
+    return valid[np.sort(first)]
+
+
+def residue_band(x, y):
+    # (residues, min, max) of y at every distinct x, NaNs skipped
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~np.isnan(x) & ~np.isnan(y)
+    x, y = x[valid], y[valid]
+    order = np.lexsort((y, x))
+    x, y = x[order], y[order]
+    starts = np.flatnonzero(np.r_[True, x[1:] != x[:-1]])
+    ends = np.r_[starts[1:], len(x)] - 1
+    return x[starts], y[starts], y[ends]
+
+
+def plot_residue_lines(ax, x, y, color, lw, label=None, cap=POINT_CAP):
+    # ax.plot(x, y) for one line through every frame; above `cap` points the area that line covers:
+    # the envelope between neighbouring residues plus the strokes back from the end of one frame to the
+    # start of the next
+    if len(x) <= cap:
+        return ax.plot(x, y, linestyle='-', color=color, alpha=1, lw=lw, label=label)
+    residues, low, high = residue_band(x, y)
+    band = ax.fill_between(residues, low, high, color=color, edgecolor=color, alpha=1, lw=lw,
+                           label=label, rasterized=True)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    back = np.flatnonzero(np.diff(x) < 0)
+    back = back[~np.isnan(y[back]) & ~np.isnan(y[back + 1])]
+    if len(back):
+        segments = np.stack([np.stack([x[back], y[back]], axis=1), np.stack([x[back + 1], y[back + 1]], axis=1)], axis=1)
+        ax.add_collection(LineCollection(segments, colors=[color], linewidths=lw, rasterized=True))
+    return band
@@ -1,24 +1,55 @@
+# align_with_mdtraj.py <ensemble_path> <topology_path> [--transform-only]
+# Superposes every frame on the topology's CA atoms and stores the per-frame transforms (see transform_store.py).
+# With --transform-only the ensemble file is left untouched.
+
 import mdtraj as md
+import numpy as np
+import argparse
 import os
 import sys
 import time 
 
-def align_with_mdtraj(ensemble_path, topology_path):
+import transform_store
+
+def get_pdb_and_predictor(ensemble_path):
+    # ./PDBs/<id>/<predictor>_bin/<id>_ensemble.pdb
+    folder = os.path.basename(os.path.dirname(os.path.abspath(ensemble_path)))
+    pdb_id = os.path.basename(ensemble_path).split("_")[0]
+    if not folder.endswith("_bin"):
+        return None, None
+    return pdb_id, folder[:-len("_bin")]
+
+def align_with_mdtraj(ensemble_path, topology_path, transform_only=False):
     # Load the reference structure (topology)
     topology = md.load(topology_path)
     # Load the ensemble (multi-frame PDB or trajectory)
     ensemble = md.load(ensemble_path)
     # Choose atom indices for alignment (must be common to both)
     atom_indices = topology.topology.select("name CA")  # You can change to "backbone" or custom selection
-    # Align all frames in the ensemble to the topology
-    ensemble.superpose(topology, atom_indices=atom_indices)
-    # Save the aligned ensemble if needed
-    ensemble.save(ensemble_path)
-    print(f'[align_with_mdtraj.py] Aligned ensemble to topology and saved to {ensemble_path}')
+    # One transform per frame, same fit as md.Trajectory.superpose (in Å for the store)
+    mobile = ensemble.xyz[:, atom_indices].astype(np.float64) * 10.0
+    reference = np.broadcast_to(topology.xyz[0, atom_indices].astype(np.float64) * 10.0, mobile.shape)
+    rotation, translation = transform_store.kabsch(mobile, reference)
+
+    if not transform_only:
+        xyz = ensemble.xyz.astype(np.float64) * 10.0
+        ensemble.xyz = (transform_store.apply_transform(xyz, rotation, translation) / 10.0).astype(np.float32)
+        ensemble.save(ensemble_path)
+        print(f'[align_with_mdtraj.py] Aligned ensemble to topology and saved to {ensemble_path}')
+
+    pdb_id, predictor = get_pdb_and_predictor(ensemble_path)
+    if pdb_id is not None:
+        transform_store.save_transform(pdb_id, predictor, "mdtraj", rotation, translation, ensemble_path, applied=not transform_only)
 
 if __name__ == "__main__":
-    ensemble_path = sys.argv[1]
-    topology_path = sys.argv[2]
+    parser = argparse.ArgumentParser(description="Align an ensemble to a topology with MDTraj")
+    parser.add_argument("ensemble_path")
+    parser.add_argument("topology_path")
+    parser.add_argument("--transform-only", action="store_true", help="Only store the transforms, don't rewrite the ensemble")
+    args = parser.parse_args()
+
+    ensemble_path = args.ensemble_path
+    topology_path = args.topology_path
 
     if not os.path.exists(ensemble_path):
         print(f"Error: DCD file '{ensemble_path}' does not exist.")
@@ -30,7 +61,7 @@ if __name__ == "__main__":
     
     start_ms_timestamp = int(time.time() * 1000)
 
-    align_with_mdtraj(ensemble_path, topology_path)
+    align_with_mdtraj(ensemble_path, topology_path, transform_only=args.transform_only)
 
     end_ms_timestamp = int(time.time() * 1000)
     elapsed_time_ms = end_ms_timestamp - start_ms_timestamp
@@ -51,7 +51,7 @@ START_MS=$(date +%s%3N)
 mkdir -p "$OUTPUT_DIR"
 cd "$OUTPUT_DIR"
 
-phaser << EOF > $PHASER_LOG_PATH 2>&1
+(phaser << EOF > $PHASER_LOG_PATH 2>&1
 TITLe $PDB Ensemble Alignment
 MODE MR_AUTO
 HKLIn $ABSOLUTE_MTZ_PATH
@@ -60,6 +60,7 @@ ENSEmble $PDB PDB $ABSOLUTE_ENSEMBLE_PATH RMS 1.0
 SEARch ENSEmble $PDB NUMBER 1 COPIES 1
 ROOT pa
 EOF
+) || echo "[align_with_phaser.sh] Phaser exited with an error. Phaser Log: $PHASER_LOG_PATH"
 
 
 #
@@ -67,14 +68,6 @@ EOF
 #TRANSLATION VOLUME AROUND
 #TRANSLATION POINT $X $Y $Z
 #TRANSLATION RANGE 5
-NEW_BOUNDING_BOX=$(python "$ABSOLUTE_BBOX_PATH" "pa.1.1.pdb")
-
-NEW_X=$(echo $NEW_BOUNDING_BOX | cut -d',' -f1)
-NEW_Y=$(echo $NEW_BOUNDING_BOX | cut -d',' -f2)
-NEW_Z=$(echo $NEW_BOUNDING_BOX | cut -d',' -f3)
-
-MAGNITUDE=$(echo "scale=2; sqrt(($X - $NEW_X)^2 + ($Y - $NEW_Y)^2 + ($Z - $NEW_Z)^2)" | bc)
-echo "[align_with_phaser.sh] [PHASER]: bounding-box distance = $MAGNITUDE Å"
 
 
 cd - 
@@ -89,8 +82,18 @@ TARGET_FINAL_PATH="${PDB_ROOT}/${PDB,,}_${PREDICTOR}.pdb"
 
 if [ ! -f "$ALIGNED_ENSEMBLE_PATH" ] && [ ! -f "$ALIGNED_CONFORMATION_PATH" ]; then
     echo "[align_with_phaser.sh] Error: Aligned ensemble file '$ALIGNED_ENSEMBLE_PATH' does not exist: Phaser was unsuccessful. Phaser Log: $PHASER_LOG_PATH"
-    echo "[align_with_phaser.sh] MDTRAJ's alignment will be used in the final result."
-    cp "$ENSEMBLE_PATH" "$TARGET_FINAL_PATH"
+    echo "[align_with_phaser.sh] Falling back to symmetry-aware placement of the MDTraj-aligned ensemble."
+    if python ./scripts/helpers/align_with_symmetry.py "$ENSEMBLE_PATH" "$DEPOSITED_PATH" "$MTZ_PATH" --fit --output "$TARGET_FINAL_PATH"; then
+        python ./scripts/helpers/transform_store.py record "${PDB,,}" "$PREDICTOR" symmetry "$ENSEMBLE_PATH" "$TARGET_FINAL_PATH" \
+            || echo "[align_with_phaser.sh] Warning: symmetry transform not recorded."
+    else
+        echo "[align_with_phaser.sh] Symmetry-aware placement failed. MDTRAJ's alignment will be used in the final result."
+        python ./scripts/helpers/transform_store.py apply "${PDB,,}" "$PREDICTOR" mdtraj "$TARGET_FINAL_PATH" \
+            || cp "$ENSEMBLE_PATH" "$TARGET_FINAL_PATH"
+        FALLBACK_NOTE="mdtraj"
+    fi
+    python ./scripts/helpers/status_index.py record "${PDB,,}" "$PREDICTOR" alignment "$TARGET_FINAL_PATH" done \
+        --wall-ms $(( $(date +%s%3N) - START_MS )) --note "${FALLBACK_NOTE:-symmetry}" || true
     exit 0
 fi
 
@@ -102,10 +105,19 @@ elif [ -f "$ALIGNED_CONFORMATION_PATH" ]; then
     cp "$ALIGNED_CONFORMATION_PATH" "$TARGET_FINAL_PATH"
 fi
 
+# Phaser may place the ensemble in any symmetry copy / origin; move it next to the deposited chain
+python ./scripts/helpers/align_with_symmetry.py "$TARGET_FINAL_PATH" "$DEPOSITED_PATH" "$MTZ_PATH" \
+    || echo "[align_with_phaser.sh] Symmetry check failed, keeping Phaser's placement."
+
+python ./scripts/helpers/transform_store.py record "${PDB,,}" "$PREDICTOR" phaser "$ENSEMBLE_PATH" "$TARGET_FINAL_PATH" \
+    || echo "[align_with_phaser.sh] Warning: Phaser transform not recorded."
+
 
 
 mkdir -p $ABSOLUTE_BIN_TIMINGS_DIR
 echo "$PDB,$PREDICTOR,$((END_MS - START_MS))" >> "./bin/timings/align_with_phaser.csv"
+python ./scripts/helpers/status_index.py record "${PDB,,}" "$PREDICTOR" alignment "$TARGET_FINAL_PATH" done \
+    --wall-ms $((END_MS - START_MS)) --note phaser || true
 
 echo "[align_with_phaser.sh] Alignment completed successfully at $TARGET_FINAL_PATH"
 
@@ -0,0 +1,235 @@
+# align_with_symmetry.py <ensemble_pdb> <deposited_pdb> <mtz_or_cif> [--output OUT] [--fit]
+# Places an ensemble on the deposited model using the crystal's unit cell and space-group operators (gemmi).
+# Without --fit the ensemble is assumed to be placed already (e.g. by Phaser) and is moved to the symmetry copy
+# and origin shift that minimises CA RMSD to the deposited chain. With --fit the ensemble is first placed with
+# a single rigid superposition of its mean CA trace (no external MR program).
+# Either way one transform is applied to every frame at once.
+
+import argparse
+import os
+import sys
+import time
+
+import gemmi
+import mdtraj as md
+import numpy as np
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from scripts.helpers.residue_numbering import numbering_offset
+
+# origin shift candidates: multiples of 1/24 cover every shift of the Euclidean normalizers (1/2, 1/3, 1/4, 1/8 ...)
+SHIFT_GRID = 24
+
+
+def read_crystal_symmetry(symmetry_path):
+    if symmetry_path.lower().endswith(".mtz"):
+        mtz = gemmi.read_mtz_file(symmetry_path, with_data=False)
+        return mtz.cell, mtz.spacegroup
+
+    structure = gemmi.read_structure(symmetry_path)
+    spacegroup = gemmi.find_spacegroup_by_name(structure.spacegroup_hm)
+    return structure.cell, spacegroup
+
+
+def get_deposited_ca(deposited_path):
+    structure = gemmi.read_structure(deposited_path)
+    chain = structure[0][0]
+
+    residues = []
+    coords = []
+    for residue in chain:
+        if residue.het_flag != 'A':
+            continue
+        ca = residue.find_atom("CA", "*")
+        if ca is None:
+            continue
+        residues.append((residue.seqid.num, residue.name))
+        coords.append(ca.pos.tolist())
+
+    return residues, np.array(coords)
+
+
+def get_ensemble_ca(ensemble):
+    chain = ensemble.topology.chain(0)
+
+    residues = []
+    atom_indices = []
+    for residue in chain.residues:
+        ca = [atom for atom in residue.atoms if atom.name == "CA"]
+        if not ca:
+            continue
+        residues.append((residue.resSeq, residue.name))
+        atom_indices.append(ca[0].index)
+
+    return residues, np.array(atom_indices)
+
+
+def match_residues(reference_residues, mobile_residues):
+    # Predictors don't always keep the deposited numbering: shift by the offset that lines up the most
+    # residue names (any size), then pair residues whose names agree.
+    if not reference_residues or not mobile_residues:
+        return np.array([], dtype=int), np.array([], dtype=int)
+    reference_numbers = np.array([number for number, _ in reference_residues], dtype=np.int64)
+    reference_names = np.array([name for _, name in reference_residues])
+    mobile_numbers = np.array([number for number, _ in mobile_residues], dtype=np.int64)
+    mobile_names = np.array([name for _, name in mobile_residues])
+    offset = numbering_offset(mobile_numbers, mobile_names, reference_numbers, reference_names)
+
+    reference_lookup = {number: (i, name) for i, (number, name) in enumerate(reference_residues)}
+    pairs = []
+    for j, (number, name) in enumerate(mobile_residues):
+        match = reference_lookup.get(number + offset)
+        if match is not None and match[1] == name:
+            pairs.append((match[0], j))
+
+    if not pairs:
+        return np.array([], dtype=int), np.array([], dtype=int)
+
+    pairs = np.array(pairs)
+    return pairs[:, 0], pairs[:, 1]
+
+
+def kabsch(mobile, reference):
+    mobile_center = mobile.mean(axis=0)
+    reference_center = reference.mean(axis=0)
+
+    h = (mobile - mobile_center).T @ (reference - reference_center)
+    u, _, vt = np.linalg.svd(h)
+    d = np.sign(np.linalg.det(vt.T @ u.T))
+    rotation = vt.T @ np.diag([1.0, 1.0, d]) @ u.T
+    translation = reference_center - rotation @ mobile_center
+    return rotation, translation
+
+
+def allowed_origin_shifts(spacegroup):
+    # Origin shifts that map the space group onto itself: (R - I) s must be a lattice vector (including centring
+    # vectors) for every operator. Candidates are all multiples of 1/SHIFT_GRID, e.g. (1/3, 2/3, 0) in P3.
+    # Axes untouched by every operator are polar and the origin along them is free.
+    group_ops = spacegroup.operations()
+    operations = list(group_ops)
+    rotations = np.array([np.array(op.rot) / op.DEN for op in operations])
+    deltas = rotations - np.eye(3)
+    centrings = np.array([np.array(cen) / gemmi.Op.DEN for cen in group_ops.cen_ops]) % 1.0
+
+    polar_axes = np.all(np.isclose(deltas, 0.0), axis=(0, 1))
+
+    axis_steps = [np.zeros(1) if polar else np.arange(SHIFT_GRID) / SHIFT_GRID for polar in polar_axes]
+    candidates = np.stack(np.meshgrid(*axis_steps, indexing='ij'), axis=-1).reshape(-1, 3)
+
+    moved = np.einsum('kij,nj->nki', deltas, candidates) % 1.0                  # (candidates, operators, 3)
+    difference = np.abs(moved[:, :, None, :] - centrings[None, None])          # against every centring vector
+    on_lattice = np.isclose(np.minimum(difference, 1.0 - difference), 0.0, atol=1e-6).all(axis=-1).any(axis=-1)
+    shifts = candidates[on_lattice.all(axis=1)]
+
+    return shifts, polar_axes
+
+
+def best_symmetry_copy(mobile_ca, reference_ca, cell, spacegroup):
+    frac = np.array(cell.frac.mat.tolist())
+    orth = np.array(cell.orth.mat.tolist())
+
+    operations = list(spacegroup.operations())
+    rot_frac = np.array([np.array(op.rot) / op.DEN for op in operations])
+    tran_frac = np.array([np.array(op.tran) / op.DEN for op in operations])
+
+    origin_shifts, polar_axes = allowed_origin_shifts(spacegroup)
+
+    # every (operator, origin shift) pair as one candidate, evaluated together
+    rot_frac = np.repeat(rot_frac, len(origin_shifts), axis=0)
+    tran_frac = np.repeat(tran_frac, len(origin_shifts), axis=0) + np.tile(origin_shifts, (len(operations), 1))
+
+    mobile_frac = mobile_ca @ frac.T
+    moved_frac = np.einsum('kij,nj->kni', rot_frac, mobile_frac) + tran_frac[:, None, :]
+
+    # pull each candidate into the same cell as the deposited chain; continuous along polar axes
+    reference_centroid = (reference_ca @ frac.T).mean(axis=0)
+    lattice_shift = reference_centroid - moved_frac.mean(axis=1)
+    lattice_shift = np.where(polar_axes, lattice_shift, np.round(lattice_shift))
+    tran_frac = tran_frac + lattice_shift
+    moved_frac = moved_frac + lattice_shift[:, None, :]
+
+    moved = moved_frac @ orth.T
+    rmsds = np.sqrt(((moved - reference_ca) ** 2).sum(axis=2).mean(axis=1))
+
+    best = int(np.argmin(rmsds))
+    rotation = orth @ rot_frac[best] @ frac
+    translation = orth @ tran_frac[best]
+    operator = operations[best // len(origin_shifts)]
+    return rotation, translation, rmsds[best], operator.triplet(), tran_frac[best]
+
+
+def ca_rmsd(mobile, reference):
+    return np.sqrt(((mobile - reference) ** 2).sum(axis=1).mean())
+
+
+def align_with_symmetry(ensemble_path, deposited_path, symmetry_path, output_path, fit=False):
+    ensemble = md.load(ensemble_path)
+    cell, spacegroup = read_crystal_symmetry(symmetry_path)
+    if spacegroup is None:
+        print(f"[align_with_symmetry.py] Error: No space group found in {symmetry_path}")
+        return False
+
+    deposited_residues, deposited_ca = get_deposited_ca(deposited_path)
+    ensemble_residues, ensemble_ca_indices = get_ensemble_ca(ensemble)
+    reference_index, mobile_index = match_residues(deposited_residues, ensemble_residues)
+    if len(reference_index) < 3:
+        print(f"[align_with_symmetry.py] Error: Could not match CA atoms between {ensemble_path} and {deposited_path}")
+        return False
+
+    # mdtraj works in nm, the crystal in Å
+    xyz = ensemble.xyz.astype(np.float64) * 10.0
+    reference_ca = deposited_ca[reference_index]
+    mean_ca = xyz[:, ensemble_ca_indices[mobile_index], :].mean(axis=0)
+
+    rotation = np.eye(3)
+    translation = np.zeros(3)
+    if fit:
+        rotation, translation = kabsch(mean_ca, reference_ca)
+        mean_ca = mean_ca @ rotation.T + translation
+
+    print(f"[align_with_symmetry.py] Space group {spacegroup.hm}, {len(reference_index)} matched CA atoms, "
+          f"input CA RMSD {ca_rmsd(mean_ca, reference_ca):.2f} Å")
+
+    sym_rotation, sym_translation, rmsd, triplet, frac_shift = best_symmetry_copy(mean_ca, reference_ca, cell, spacegroup)
+    rotation = sym_rotation @ rotation
+    translation = sym_rotation @ translation + sym_translation
+
+    if triplet != "x,y,z" or not np.allclose(frac_shift, 0.0, atol=1e-3):
+        print(f"[align_with_symmetry.py] Moved to symmetry copy {triplet} with origin shift "
+              f"{np.round(frac_shift, 3).tolist()}")
+    print(f"[align_with_symmetry.py] Placed CA RMSD {rmsd:.2f} Å")
+
+    ensemble.xyz = ((xyz @ rotation.T + translation) / 10.0).astype(np.float32)
+    ensemble.save(output_path)
+    print(f"[align_with_symmetry.py] Saved placed ensemble to {output_path}")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Symmetry-aware placement of an ensemble on the deposited model.")
+    parser.add_argument("ensemble_path", help="Ensemble PDB (multi-model)")
+    parser.add_argument("deposited_path", help="Deposited model PDB")
+    parser.add_argument("symmetry_path", help="MTZ or CIF/PDB holding the unit cell and space group")
+    parser.add_argument("--output", help="Output PDB (defaults to overwriting the ensemble)")
+    parser.add_argument("--fit", action="store_true", help="Superpose the mean CA trace before the symmetry search")
+    args = parser.parse_args()
+
+    for path in [args.ensemble_path, args.deposited_path, args.symmetry_path]:
+        if not os.path.exists(path):
+            print(f"[align_with_symmetry.py] Error: '{path}' does not exist.")
+            sys.exit(1)
+
+    output_path = args.output or args.ensemble_path
+
+    start_ms_timestamp = int(time.time() * 1000)
+
+    success = align_with_symmetry(args.ensemble_path, args.deposited_path, args.symmetry_path, output_path, fit=args.fit)
+
+    end_ms_timestamp = int(time.time() * 1000)
+    elapsed_time_ms = end_ms_timestamp - start_ms_timestamp
+
+    os.makedirs("./bin/timings", exist_ok=True)
+    with open("./bin/timings/align_with_symmetry.csv", "a") as f:
+        f.write(f"{args.deposited_path},{args.ensemble_path},{elapsed_time_ms}\n")
+
+    sys.exit(0 if success else 1)
@@ -0,0 +1,105 @@
+# bench_startup.py [--repeat N] [--tolerance 0.25] [--fail-on-regression]
+# Measures how long each analysis entry point takes to load (module-level imports only, main() is not run)
+# and appends the results to ./bin/timings/startup.csv as timestamp,script,ms,status.
+# A script is flagged when it is slower than its best recorded time by more than the tolerance.
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+STARTUP_CSV = "./bin/timings/startup.csv"
+
+ENTRY_POINTS = [
+    "./scripts/analysis/get_rfrees.py",
+    "./scripts/analysis/get_rmsf.py",
+    "./scripts/analysis/get_density_fitness.py",
+    "./scripts/analysis/get_secondary_structure.py",
+    "./scripts/analysis/get_rmsr_galign.py",
+    "./scripts/analysis/get_rmsr_galign_each.py",
+    "./scripts/analysis/get_rmsr_mr.py",
+    "./scripts/analysis/get_rmsf_cosine_similarity.py",
+    "./scripts/analysis/internal/get_frame_rfrees.py",
+    "./scripts/helpers/align_with_mdtraj.py",
+    "./scripts/helpers/align_with_symmetry.py",
+    "./scripts/helpers/status_index.py",
+    "./scripts/helpers/transform_store.py",
+    "./scripts/pipeline.py",
+]
+
+# run the module body under a different __name__ so the CLI block doesn't execute
+LOADER = (
+    "import os, runpy, sys; path = sys.argv[1]; "
+    "sys.path.insert(0, os.path.dirname(os.path.abspath(path))); "
+    "runpy.run_path(path, run_name='startup_benchmark')"
+)
+
+
+def time_command(command, repeat):
+    best_ms = None
+    status = "ok"
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if result.returncode != 0:
+            status = result.stderr.decode(errors="replace").strip().splitlines()[-1][:120] if result.stderr else "error"
+            status = status.replace(",", ";")
+        best_ms = elapsed_ms if best_ms is None else min(best_ms, elapsed_ms)
+    return best_ms, status
+
+
+def previous_best():
+    if not os.path.exists(STARTUP_CSV):
+        return {}
+    history = pd.read_csv(STARTUP_CSV, names=['timestamp', 'script', 'ms', 'status'])
+    history = history[history['status'] == 'ok']
+    return history.groupby('script')['ms'].min().to_dict()
+
+
+def bench_startup(repeat, tolerance):
+    baseline = previous_best()
+    interpreter_ms, _ = time_command([sys.executable, "-c", "pass"], repeat)
+    print(f"[bench_startup.py] Bare interpreter start: {interpreter_ms:.0f} ms")
+
+    timestamp = int(time.time())
+    rows = []
+    regressions = []
+    for script in ENTRY_POINTS:
+        if not os.path.exists(script):
+            continue
+        elapsed_ms, status = time_command([sys.executable, "-c", LOADER, script], repeat)
+        rows.append(f"{timestamp},{script},{elapsed_ms:.0f},{status}")
+
+        best = baseline.get(script)
+        flag = ""
+        # ignore noise below the interpreter's own start-up jitter
+        if status == "ok" and best is not None and elapsed_ms > best * (1 + tolerance) and elapsed_ms - best > 50:
+            flag = f"  REGRESSION (best {best:.0f} ms)"
+            regressions.append(script)
+        print(f"[bench_startup.py] {script}: {elapsed_ms:.0f} ms ({elapsed_ms - interpreter_ms:.0f} ms over bare start) {status}{flag}")
+
+    os.makedirs(os.path.dirname(STARTUP_CSV), exist_ok=True)
+    with open(STARTUP_CSV, "a") as f:
+        for row in rows:
+            f.write(row + "\n")
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record import/start-up time of each entry point")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per script, the fastest is kept")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown over the best recorded time")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit 1 if any script regressed")
+    args = parser.parse_args()
+
+    regressions = bench_startup(args.repeat, args.tolerance)
+    if regressions:
+        print(f"[bench_startup.py] {len(regressions)} entry point(s) got slower: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            sys.exit(1)
+    sys.exit(0)
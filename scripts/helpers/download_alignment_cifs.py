@@ -1,5 +1,5 @@
 #!/bin/bash
-# download_alignment_cifs.py <dataset>
+# download_alignment_cifs.py <dataset> [max_downloads]
 # This script downloads the CIFs needed for OpenFold from the HHSearch hits
 
 # Use the batch script, only use this if you don't have a lot of things to download,
@@ -7,19 +7,21 @@
 
 import os
 import sys
-import re
 import urllib.request
 import gzip
 import shutil
-import requests
 import concurrent.futures
 from threading import Lock
+from downloader import Downloader, PDB_REDO_URL
+from download_cache import DownloadCache
+import template_hits
 
 
 DATASET_ARG = sys.argv[1] if len(sys.argv) > 1 else None
 if DATASET_ARG is None:
-    print("Usage: python download_alignment_cifs.py <dataset>")
+    print("Usage: python download_alignment_cifs.py <dataset> [max_downloads]")
     sys.exit(1)
+MAX_DOWNLOADS = int(sys.argv[2]) if len(sys.argv) > 2 else 50
 
 DATASET_ROOT = "./bin/openfold_data/" + DATASET_ARG;
 ALIGNMENTS_DIR = DATASET_ROOT + "/alignments"
@@ -32,39 +34,16 @@ def thread_safe_print(message):
     with print_lock:
         print(message)
 
-def parse_hhsearch_hits(hhsearch_file):
-    hits = []
-    try:
-        with open(hhsearch_file, 'r') as f:
-            for line in f:
-                if re.match(r'^\s*\d+\s+', line):
-                    parts = line.split()
-                    if len(parts) > 1:
-                        pdb_entry = parts[1]
-                        pdb_id = pdb_entry[:4].lower()
-                        if len(pdb_id) == 4 and pdb_id.isalnum():
-                            hits.append(pdb_id)
-    except FileNotFoundError:
-        thread_safe_print(f"Warning: HHsearch file not found: {hhsearch_file}")
-    return hits
-
+# shared session with per-host limits and backoff on 429/5xx, so the worker pool doesn't trip rate limits;
+# template CIFs repeat across targets and datasets, so they come from the shared download cache
+downloader = Downloader(max_workers=10, per_host=4, timeout=30, cache=DownloadCache(), log_prefix="[download_alignment_cifs.py]")
 
 def download_file(url, output_path):
-    try:
-        response = requests.get(url, stream=True, timeout=30)
-        response.raise_for_status()
-        
-        with open(output_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        return True
-    except requests.exceptions.RequestException as e:
-        thread_safe_print(f"Error downloading {url}: {e}")
-        return False
+    return downloader.download(url, output_path)
 
 
 def download_cif(pdb_id, output_dir):
-    cif_url = f"https://pdb-redo.eu/db/{pdb_id}/{pdb_id}_final.cif"
+    cif_url = f"{PDB_REDO_URL}/{pdb_id}/{pdb_id}_final.cif"
     output_file = os.path.join(output_dir, f"{pdb_id}.cif")
     
     if os.path.exists(output_file):
@@ -85,9 +64,7 @@ def download_cif(pdb_id, output_dir):
 
 
 def download_cifs_for_target(pdb_id, max_downloads=50, max_workers=10):
-    alignment_hhsearch = f"{ALIGNMENTS_DIR}/{pdb_id.lower()}/hhsearch_output.hhr"
-    
-    hits = parse_hhsearch_hits(alignment_hhsearch)
+    hits = hits_by_target.get(pdb_id.lower(), [])
     
     if not hits:
         thread_safe_print(f"No hits found for {pdb_id}")
@@ -121,10 +98,13 @@ all_pdb_ids = [f.replace(".fasta", "") for f in all_input_fastas]
 
 os.makedirs(CIF_DIR, exist_ok=True)
 
+# hits come from the persistent template index (template_hits.py) instead of reparsing every .hhr
+hits_by_target = template_hits.target_hits(DATASET_ARG)
+
 allCount = len(all_pdb_ids)
 currCount = 0;
 for pdb_id in all_pdb_ids:
-    download_cifs_for_target(pdb_id, max_downloads=50, max_workers=10)
+    download_cifs_for_target(pdb_id, max_downloads=MAX_DOWNLOADS, max_workers=10)
     currCount += 1
     print(f"Progress: {currCount}/{allCount} targets processed ({(currCount / allCount) * 100:.2f}%)")
 
@@ -1,48 +1,43 @@
 #!/usr/bin/env python3
-# download_alignment_cifs.py <dataset>
+# download_alignment_cifs_batch.py <dataset> [--workers N] [--top N] [--max-evalue E]
 # This script downloads the CIFs needed for OpenFold from the HHSearch hits using batch downloading
+# A worker pool downloads each .cif.gz from RCSB and stream-decompresses it into CIF_DIR;
+# CIF_DIR/index.txt lists the CIFs already present so re-runs don't scan the directory.
+# Hits are read from the template index (template_hits.py), so --top / --max-evalue can change without reparsing.
 
 import os
-import sys
-import re
-import subprocess
-import tempfile
-from pathlib import Path
+import argparse
+import gzip
+import shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Lock
 
+from downloader import Downloader, RCSB_DOWNLOAD_URL
+from download_cache import DownloadCache
+import template_hits
 
-DATASET_ARG = sys.argv[1] if len(sys.argv) > 1 else None
-if DATASET_ARG is None:
-    print("Usage: python download_alignment_cifs.py <dataset>")
-    sys.exit(1)
+
+parser = argparse.ArgumentParser(description="Download OpenFold template CIFs for a dataset")
+parser.add_argument("dataset")
+parser.add_argument("--workers", type=int, default=16, help="Concurrent downloads")
+parser.add_argument("--top", type=int, default=250, help="Templates kept per target")
+parser.add_argument("--max-evalue", type=float, help="Drop hits with a larger e-value")
+ARGS = parser.parse_args()
+
+DATASET_ARG = ARGS.dataset
 
 DATASET_ROOT = "./bin/openfold_data/" + DATASET_ARG
 ALIGNMENTS_DIR = DATASET_ROOT + "/alignments"
 CIF_DIR = DATASET_ROOT + "/cifs"
 INPUT_DIR = DATASET_ROOT + "/inputs"
 
-def parse_hhsearch_hits(hhsearch_file):
-    hits = []
-    try:
-        with open(hhsearch_file, 'r') as f:
-            for line in f:
-                if re.match(r'^\s*\d+\s+', line):
-                    parts = line.split()
-                    if len(parts) > 1:
-                        pdb_entry = parts[1]
-                        pdb_id = pdb_entry[:4].lower()
-                        if len(pdb_id) == 4 and pdb_id.isalnum():
-                            hits.append(pdb_id)
-    except FileNotFoundError:
-        print(f"Warning: HHsearch file not found: {hhsearch_file}")
-    return hits
-
-
-def collect_all_hits(all_pdb_ids, max_downloads=50):
+def collect_all_hits(all_pdb_ids, max_downloads=50, max_evalue=None):
+    # hits come from the persistent template index; only new or changed .hhr files get parsed
+    hits_by_target = template_hits.target_hits(DATASET_ARG, max_evalue=max_evalue, targets=[pdb_id.lower() for pdb_id in all_pdb_ids])
     all_hits = set()
     
     for pdb_id in all_pdb_ids:
-        alignment_hhsearch = f"{ALIGNMENTS_DIR}/{pdb_id.lower()}/hhsearch_output.hhr"
-        hits = parse_hhsearch_hits(alignment_hhsearch)
+        hits = hits_by_target.get(pdb_id.lower(), [])
         
         if not hits:
             print(f"No hits found for {pdb_id}")
@@ -55,68 +50,78 @@ def collect_all_hits(all_pdb_ids, max_downloads=50):
     return list(all_hits)
 
 
-def batch_download_cifs(pdb_ids, output_dir):
-    if not pdb_ids:
-        print("No PDB IDs to download")
-        return
-    
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False) as temp_file:
-        temp_file.write(','.join(pdb_ids))
-        temp_file_path = temp_file.name
-    
+INDEX_FILE = CIF_DIR + "/index.txt"
+DECOMPRESS_BUFFER = 1 << 20
+index_lock = Lock()
+
+
+def load_index():
+    # ids of CIFs already in CIF_DIR; built from one directory scan the first time, then appended to
+    if not os.path.exists(INDEX_FILE):
+        with os.scandir(CIF_DIR) as entries:
+            present = sorted(entry.name[:-4] for entry in entries if entry.name.endswith(".cif"))
+        with open(INDEX_FILE, 'w') as f:
+            f.writelines(f"{pdb_id}\n" for pdb_id in present)
+        return set(present)
+    with open(INDEX_FILE) as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def add_to_index(pdb_id):
+    with index_lock:
+        with open(INDEX_FILE, 'a') as f:
+            f.write(f"{pdb_id}\n")
+
+
+def decompress(gz_path, target_path):
+    # stream in bounded chunks instead of reading the whole CIF into memory
+    temp_path = target_path + ".part"
     try:
-        os.makedirs(output_dir, exist_ok=True)
-        
-        batch_script = "./scripts/helpers/pdbredo_batch_dl.sh"
-        cmd = [
-            "bash", batch_script,
-            "-f", temp_file_path,
-            "-o", output_dir,
-            "-c" 
-        ]
-        
-        print(f"Running batch download for {len(pdb_ids)} PDB IDs...")
-        print(f"Command: {' '.join(cmd)}")
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        if result.returncode == 0:
-            print("Batch download completed successfully")
-            print(result.stdout)
-        else:
-            print(f"Batch download failed with return code {result.returncode}")
-            print(f"Error: {result.stderr}")
-            
+        with gzip.open(gz_path, 'rb') as f_in, open(temp_path, 'wb') as f_out:
+            shutil.copyfileobj(f_in, f_out, DECOMPRESS_BUFFER)
+        os.replace(temp_path, target_path)
     finally:
-        os.unlink(temp_file_path)
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
 
 
-def rename_downloaded_files(output_dir):
-    cif_dir = Path(output_dir)
-    
-    for gz_file in cif_dir.glob("*.cif.gz"):
-        pdb_id = gz_file.stem.replace(".cif", "")
-        target_file = cif_dir / f"{pdb_id}.cif"
-        
-        if target_file.exists():
-            print(f"CIF already exists: {target_file}")
-            gz_file.unlink()
-            continue
-        
-        import gzip
-        try:
-            with gzip.open(gz_file, 'rt') as f_in:
-                with open(target_file, 'w') as f_out:
-                    f_out.write(f_in.read())
-            
-            print(f"Decompressed {gz_file} to {target_file}")
-            gz_file.unlink()
-            
-        except Exception as e:
-            print(f"Error decompressing {gz_file}: {e}")
-
-
-def download_cifs_for_dataset():
+def fetch_cif(downloader, pdb_id, output_dir):
+    gz_path = os.path.join(output_dir, f"{pdb_id}.cif.gz")
+    target_path = os.path.join(output_dir, f"{pdb_id}.cif")
+    if not downloader.download(f"{RCSB_DOWNLOAD_URL}/{pdb_id}.cif.gz", gz_path):
+        return False
+    try:
+        decompress(gz_path, target_path)
+    except (OSError, EOFError) as e:
+        print(f"Error decompressing {gz_path}: {e}")
+        return False
+    finally:
+        if os.path.exists(gz_path):
+            os.remove(gz_path)
+    add_to_index(pdb_id)
+    return True
+
+
+def download_cifs(pdb_ids, output_dir, max_workers=16):
+    downloader = Downloader(max_workers=max_workers, per_host=8, cache=DownloadCache(), log_prefix="[download_alignment_cifs_batch.py]")
+    completed = 0
+    successful = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(fetch_cif, downloader, pdb_id, output_dir): pdb_id for pdb_id in pdb_ids}
+        for future in as_completed(futures):
+            completed += 1
+            try:
+                if future.result():
+                    successful += 1
+            except Exception as e:
+                print(f"Error downloading CIF for {futures[future]}: {e}")
+            if completed % 100 == 0 or completed == len(pdb_ids):
+                print(f"Progress: {completed}/{len(pdb_ids)} CIFs ({successful} successful)")
+    downloader.close()
+    return successful
+
+
+def download_cifs_for_dataset(max_workers=16, max_downloads=250, max_evalue=None):
     all_input_fastas = os.listdir(INPUT_DIR)
     all_input_fastas = [f for f in all_input_fastas if f.endswith(".fasta")]
     all_pdb_ids = [f.replace(".fasta", "") for f in all_input_fastas]
@@ -125,15 +130,11 @@ def download_cifs_for_dataset():
     
     print(f"Processing {len(all_pdb_ids)} targets...")
     
-    all_hits = collect_all_hits(all_pdb_ids, max_downloads=250)
+    all_hits = collect_all_hits(all_pdb_ids, max_downloads, max_evalue)
     
     print(f"Found {len(all_hits)} unique PDB IDs to download")
     
-    existing_cifs = set()
-    for cif_file in Path(CIF_DIR).glob("*.cif"):
-        pdb_id = cif_file.stem
-        existing_cifs.add(pdb_id)
-    
+    existing_cifs = load_index()
     hits_to_download = [hit for hit in all_hits if hit not in existing_cifs]
     
     if not hits_to_download:
@@ -142,16 +143,10 @@ def download_cifs_for_dataset():
     
     print(f"Need to download {len(hits_to_download)} new CIF files")
     
-    batch_size = 100
-    for i in range(0, len(hits_to_download), batch_size):
-        batch = hits_to_download[i:i+batch_size]
-        print(f"Downloading batch {i//batch_size + 1}/{(len(hits_to_download)-1)//batch_size + 1}")
-        
-        batch_download_cifs(batch, CIF_DIR)
-        rename_downloaded_files(CIF_DIR)
+    download_cifs(hits_to_download, CIF_DIR, max_workers)
     
     print("CIF download process completed.")
 
 
 if __name__ == "__main__":
-    download_cifs_for_dataset()
+    download_cifs_for_dataset(ARGS.workers, ARGS.top, ARGS.max_evalue)
@@ -0,0 +1,175 @@
+# download_cache.py stats
+# download_cache.py prune
+# Shared HTTP download cache (./bin/download_cache/) used by downloader.py.
+# Every URL keeps its ETag / Last-Modified and the sha256 of the body in index.sqlite; bodies are stored
+# once under blobs/<sha[:2]>/<sha> and hardlinked (copied across filesystems) into ./PDBs/<id>/.
+# Re-runs send conditional GETs, so unchanged files cost a 304 and no disk.
+
+import argparse
+import hashlib
+import os
+import shutil
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+
+CACHE_ROOT = "./bin/download_cache"
+
+
+class DownloadCache:
+    def __init__(self, root=CACHE_ROOT):
+        self.root = root
+        self.blob_dir = os.path.join(root, "blobs")
+        self.temp_dir = os.path.join(root, "tmp")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.temp_dir, exist_ok=True)
+
+        # one connection shared by the download threads
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(os.path.join(root, "index.sqlite"), timeout=60, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("""
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                etag TEXT,
+                last_modified TEXT,
+                sha256 TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                validated_at REAL NOT NULL
+            )""")
+        self._connection.commit()
+
+    def blob_path(self, sha256):
+        return os.path.join(self.blob_dir, sha256[:2], sha256)
+
+    def lookup(self, url):
+        # cache entry for the URL, or None if it was never fetched or its blob is gone
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT etag, last_modified, sha256, size FROM urls WHERE url=?", (url,)).fetchone()
+        if row is None:
+            return None
+        etag, last_modified, sha256, size = row
+        blob = self.blob_path(sha256)
+        if not os.path.exists(blob) or os.path.getsize(blob) != size:
+            return None
+        return {'etag': etag, 'last_modified': last_modified, 'sha256': sha256, 'size': size}
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry is None:
+            return headers
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def mark_validated(self, url):
+        with self._lock:
+            self._connection.execute("UPDATE urls SET validated_at=? WHERE url=?", (time.time(), url))
+            self._connection.commit()
+
+    def store(self, url, response):
+        # stream a 200 response into the blob store and index it; returns the sha256
+        digest = hashlib.sha256()
+        size = 0
+        temp_path = os.path.join(self.temp_dir, uuid.uuid4().hex)
+        try:
+            with open(temp_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=1 << 16):
+                    digest.update(chunk)
+                    size += len(chunk)
+                    f.write(chunk)
+            sha256 = digest.hexdigest()
+            blob = self.blob_path(sha256)
+            if os.path.exists(blob) and os.path.getsize(blob) == size:
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(blob), exist_ok=True)
+                # blobs are shared by every hardlink, keep them read-only
+                os.chmod(temp_path, 0o444)
+                os.replace(temp_path, blob)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO urls VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, response.headers.get("ETag"), response.headers.get("Last-Modified"), sha256, size, now, now))
+            self._connection.commit()
+        return sha256
+
+    def link(self, sha256, output_path):
+        blob = self.blob_path(sha256)
+        if os.path.exists(output_path) and os.path.samefile(blob, output_path):
+            return
+
+        output_dir = os.path.dirname(output_path) or "."
+        os.makedirs(output_dir, exist_ok=True)
+        temp_path = os.path.join(output_dir, f".{os.path.basename(output_path)}.{uuid.uuid4().hex}.part")
+        try:
+            try:
+                os.link(blob, temp_path)
+            except OSError:
+                # cache and ./PDBs/ on different filesystems
+                shutil.copyfile(blob, temp_path)
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def stats(self):
+        with self._lock:
+            urls, referenced = self._connection.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT sha256) FROM urls").fetchone()
+        blobs = 0
+        total_bytes = 0
+        for dirpath, _, filenames in os.walk(self.blob_dir):
+            for filename in filenames:
+                blobs += 1
+                total_bytes += os.path.getsize(os.path.join(dirpath, filename))
+        return {'urls': urls, 'referenced_blobs': referenced, 'blobs': blobs, 'bytes': total_bytes}
+
+    def prune(self):
+        # drop blobs no URL points at any more (superseded versions); hardlinked copies in ./PDBs/ are unaffected
+        with self._lock:
+            referenced = {row[0] for row in self._connection.execute("SELECT sha256 FROM urls")}
+        removed = 0
+        for dirpath, _, filenames in os.walk(self.blob_dir):
+            for filename in filenames:
+                if filename not in referenced:
+                    os.remove(os.path.join(dirpath, filename))
+                    removed += 1
+        for filename in os.listdir(self.temp_dir):
+            # leftovers of interrupted downloads; recent ones may still be in flight
+            temp_path = os.path.join(self.temp_dir, filename)
+            if os.path.getmtime(temp_path) < time.time() - 3600:
+                os.remove(temp_path)
+        return removed
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or prune the shared download cache")
+    parser.add_argument("command", choices=["stats", "prune"])
+    parser.add_argument("--root", default=CACHE_ROOT)
+    args = parser.parse_args()
+
+    cache = DownloadCache(args.root)
+    if args.command == "stats":
+        stats = cache.stats()
+        print(f"[download_cache.py] {stats['urls']} URLs, {stats['blobs']} blobs "
+              f"({stats['referenced_blobs']} referenced), {stats['bytes'] / 1e6:.1f} MB")
+    elif args.command == "prune":
+        print(f"[download_cache.py] Removed {cache.prune()} unreferenced blobs")
+    cache.close()
+    sys.exit(0)
@@ -0,0 +1,152 @@
+# downloader.py
+# Shared HTTP downloader for split preparation and template CIFs.
+# One requests.Session (keep-alive, pooled connections) used from many threads, at most `per_host`
+# requests in flight per host, exponential backoff on 429/5xx and connection errors, and files
+# written to a temporary name in the target folder before being renamed into place.
+# Base URLs come from PDB_REDO_URL / RCSB_DOWNLOAD_URL so a local stand-in server can be used.
+# With a DownloadCache (download_cache.py) requests are conditional and files are hardlinked from ./bin/.
+
+import os
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+PDB_REDO_URL = os.environ.get("PDB_REDO_URL", "https://pdb-redo.eu/db")
+RCSB_DOWNLOAD_URL = os.environ.get("RCSB_DOWNLOAD_URL", "https://files.rcsb.org/download")
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class Downloader:
+    def __init__(self, max_workers=16, per_host=4, retries=5, backoff=1.0, max_backoff=60.0, timeout=60, cache=None, log_prefix="[downloader.py]"):
+        self.max_workers = max_workers
+        self.per_host = per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.cache = cache
+        self.log_prefix = log_prefix
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max(4, per_host), pool_maxsize=max(max_workers, per_host))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._host_lock = threading.Lock()
+        self._host_slots = defaultdict(lambda: threading.BoundedSemaphore(self.per_host))
+
+    def _slot(self, url):
+        with self._host_lock:
+            return self._host_slots[urlsplit(url).netloc]
+
+    def _retry_delay(self, attempt, response=None):
+        if response is not None and response.headers.get("Retry-After", "").isdigit():
+            return min(float(response.headers["Retry-After"]), self.max_backoff)
+        # exponential with a little jitter so parallel workers don't retry in lockstep
+        return min(self.backoff * (2 ** attempt), self.max_backoff) * (0.5 + random.random() / 2)
+
+    @contextmanager
+    def get(self, url, headers=None):
+        # GET with per-host bounding and retries; yields the (streaming) response or None.
+        # The host slot stays taken until the with-block exits, so reading the body counts against per_host.
+        slot = self._slot(url)
+        for attempt in range(self.retries + 1):
+            with slot:
+                try:
+                    response = self.session.get(url, headers=headers, stream=True, timeout=self.timeout)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    response = None
+                    error = str(e)
+                else:
+                    if response.status_code not in RETRY_STATUSES:
+                        try:
+                            yield response
+                        finally:
+                            response.close()
+                        return
+                    error = f"HTTP {response.status_code}"
+                    response.close()
+
+            if attempt == self.retries:
+                print(f"{self.log_prefix} Error downloading {url}: {error} (gave up after {self.retries + 1} attempts)")
+                break
+            delay = self._retry_delay(attempt, response)
+            print(f"{self.log_prefix} {error} for {url}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+        yield None
+
+    def write_response(self, response, output_path):
+        # stream into a temporary file next to the target, then rename so readers never see partial files
+        output_dir = os.path.dirname(output_path) or "."
+        os.makedirs(output_dir, exist_ok=True)
+        temp_path = os.path.join(output_dir, f".{os.path.basename(output_path)}.{uuid.uuid4().hex}.part")
+        try:
+            with open(temp_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=1 << 16):
+                    f.write(chunk)
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def download(self, url, output_path):
+        if self.cache is not None:
+            return self.download_cached(url, output_path)
+
+        with self.get(url) as response:
+            if response is None:
+                return False
+            try:
+                if response.status_code != 200:
+                    print(f"{self.log_prefix} Error downloading {url}: HTTP {response.status_code}")
+                    return False
+                self.write_response(response, output_path)
+                return True
+            except (requests.exceptions.RequestException, OSError) as e:
+                print(f"{self.log_prefix} Error downloading {url}: {e}")
+                return False
+
+    def download_cached(self, url, output_path):
+        entry = self.cache.lookup(url)
+        with self.get(url, headers=self.cache.conditional_headers(entry)) as response:
+            if response is None:
+                if entry is None:
+                    return False
+                # server unreachable: fall back to the last version we saw
+                print(f"{self.log_prefix} Using cached copy of {url}")
+                self.cache.link(entry['sha256'], output_path)
+                return True
+            try:
+                if response.status_code == 304 and entry is not None:
+                    self.cache.mark_validated(url)
+                    self.cache.link(entry['sha256'], output_path)
+                    return True
+                if response.status_code != 200:
+                    print(f"{self.log_prefix} Error downloading {url}: HTTP {response.status_code}")
+                    return False
+                self.cache.link(self.cache.store(url, response), output_path)
+                return True
+            except (requests.exceptions.RequestException, OSError) as e:
+                print(f"{self.log_prefix} Error downloading {url}: {e}")
+                return False
+
+    def download_many(self, jobs):
+        # jobs: iterable of (url, output_path); returns {output_path: success}
+        jobs = list(jobs)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = executor.map(lambda job: self.download(*job), jobs)
+            return {output_path: success for (_, output_path), success in zip(jobs, results)}
+
+    def close(self):
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
@@ -0,0 +1,224 @@
+# dssp.py
+# Secondary structure of every model of a (multi-model) PDB in one process, following Kabsch & Sander (DSSP).
+# Backbone coordinates of all frames are one (n_frames, n_residues, 3) array per atom; the electrostatic
+# H-bond energy of every CO(i) -> NH(j) pair is computed for a block of frames at once, and turns, helices and
+# bridges are boolean array operations on that block's (frames, residues, residues) H-bond matrix. Only the
+# (frames, residues) letters outlive a block, so memory is bounded by BLOCK_ELEMENTS, not by the ensemble size.
+# Letters follow get_secondary_structure.py: H, E (strand and isolated bridge), G, I, T, S and C (coil).
+# Differences from mkdssp: no polyproline (P) class and classic helix priority (H over I); see --validate in
+# get_secondary_structure.py to compare both on a deposited model.
+
+import gemmi
+import numpy as np
+
+SS_CODES = ['H', 'E', 'G', 'I', 'T', 'S', 'C']
+
+HBOND_CUTOFF = -0.5          # kcal/mol
+ENERGY_FLOOR = -9.9
+MIN_DISTANCE = 0.5           # Å, closer atoms get ENERGY_FLOOR
+MAX_CA_DISTANCE = 9.0        # Å, pairs further apart are not scored
+PEPTIDE_BOND = 2.5           # Å, longer C(i)-N(i+1) is a chain break
+BEND_ANGLE = 70.0            # degrees
+BLOCK_ELEMENTS = 2_000_000   # frames * residues^2 per block
+
+
+def read_backbone(path):
+    # {'N','CA','C','O'}: (n_frames, n_residues, 3) float32, plus residue table (chain, residue, aa, is_proline).
+    # Residues come from the first model (amino acids with a complete backbone); a residue missing from a later
+    # model is NaN in that frame.
+    structure = gemmi.read_structure(path)
+    structure.setup_entities()
+    structure.remove_alternative_conformations()
+
+    keys, residues = [], []
+    for chain in structure[0]:
+        for residue in chain:
+            info = gemmi.find_tabulated_residue(residue.name)
+            if info is None or not info.is_amino_acid():
+                continue
+            if all(residue.find_atom(name, '*') is not None for name in ('N', 'CA', 'C', 'O')):
+                keys.append((chain.name, residue.seqid.num, residue.seqid.icode))
+                residues.append((chain.name, residue.seqid.num, residue.name, residue.name == 'PRO'))
+    index = {key: i for i, key in enumerate(keys)}
+
+    coords = {name: np.full((len(structure), len(keys), 3), np.nan, dtype=np.float32) for name in ('N', 'CA', 'C', 'O')}
+    for frame, model in enumerate(structure):
+        for chain in model:
+            for residue in chain:
+                i = index.get((chain.name, residue.seqid.num, residue.seqid.icode))
+                if i is None:
+                    continue
+                for name in ('N', 'CA', 'C', 'O'):
+                    atom = residue.find_atom(name, '*')
+                    if atom is not None:
+                        coords[name][frame, i] = (atom.pos.x, atom.pos.y, atom.pos.z)
+
+    table = {
+        'chain': np.array([r[0] for r in residues]),
+        'residue': np.array([r[1] for r in residues], dtype=np.int64),
+        'aa': np.array([r[2] for r in residues]),
+        'is_proline': np.array([r[3] for r in residues], dtype=bool),
+    }
+    return coords, table
+
+
+def one_letter(names):
+    # three-letter residue names -> one-letter codes (X when unknown), as mkdssp reports them
+    codes = []
+    for name in names:
+        info = gemmi.find_tabulated_residue(name)
+        codes.append(info.one_letter_code.upper() if info is not None and info.one_letter_code.strip() else 'X')
+    return np.array(codes)
+
+
+def chain_breaks(coords, chains):
+    # (n_frames, n_residues - 1): True where residue i+1 does not follow residue i
+    gap = np.linalg.norm(coords['N'][:, 1:] - coords['C'][:, :-1], axis=-1)
+    return ~(gap <= PEPTIDE_BOND) | (chains[1:] != chains[:-1])[None, :]
+
+
+def amide_hydrogens(coords, breaks):
+    # H(i) = N(i) + unit(C(i-1) - O(i-1)); the first residue of a segment gets H = N (no H-bond energy as donor)
+    n = coords['N']
+    hydrogens = n.copy()
+    carbonyl = coords['C'][:, :-1] - coords['O'][:, :-1]
+    carbonyl /= np.linalg.norm(carbonyl, axis=-1, keepdims=True)
+    hydrogens[:, 1:] = np.where(breaks[..., None], n[:, 1:], n[:, 1:] + carbonyl)
+    return hydrogens
+
+
+def _distances(a, b):
+    # (frames, n, 3) x (frames, n, 3) -> (frames, n, n), as |a|^2 + |b|^2 - 2 a.b so the bulk is one matmul
+    a = a.astype(np.float64)
+    b = b.astype(np.float64)
+    squared = np.sum(a * a, axis=-1)[:, :, None] + np.sum(b * b, axis=-1)[:, None, :] - 2 * a @ np.swapaxes(b, -1, -2)
+    return np.sqrt(np.maximum(squared, 0))
+
+
+def allowed_pairs(is_proline):
+    # (n_residues, n_residues) pairs mkdssp scores: not j == i, j == i + 1 or a proline donor
+    n_residues = len(is_proline)
+    allowed = ~np.eye(n_residues, dtype=bool)
+    allowed[np.arange(n_residues - 1), np.arange(1, n_residues)] = False
+    allowed[:, is_proline] = False
+    return allowed
+
+
+def hbond_matrix(coords, hydrogens, allowed):
+    # (n_frames, n_residues, n_residues) bool for the frames in coords (one block):
+    # H-bond from CO of residue i (acceptor) to NH of residue j (donor)
+    o, c = coords['O'], coords['C']
+    n, h = coords['N'], hydrogens
+    d_on, d_ch = _distances(o, n), _distances(c, h)
+    d_oh, d_cn = _distances(o, h), _distances(c, n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        energy = 0.084 * 332 * (1 / d_on + 1 / d_ch - 1 / d_oh - 1 / d_cn)
+    close = (d_on < MIN_DISTANCE) | (d_ch < MIN_DISTANCE) | (d_oh < MIN_DISTANCE) | (d_cn < MIN_DISTANCE)
+    energy = np.where(close, ENERGY_FLOOR, np.maximum(np.round(energy, 3), ENERGY_FLOOR))
+    near = _distances(coords['CA'], coords['CA']) < MAX_CA_DISTANCE
+    return (energy < HBOND_CUTOFF) & near & allowed
+
+
+def _shift(matrix, di, dj):
+    # out[..., i, j] = matrix[..., i + di, j + dj], False outside
+    out = np.zeros_like(matrix)
+    n = matrix.shape[-1]
+    src_i = slice(max(0, di), n + min(0, di))
+    dst_i = slice(max(0, -di), n - max(0, di))
+    src_j = slice(max(0, dj), n + min(0, dj))
+    dst_j = slice(max(0, -dj), n - max(0, dj))
+    out[..., dst_i, dst_j] = matrix[..., src_i, src_j]
+    return out
+
+
+def _unbroken(breaks, start_offset, length):
+    # (frames, n_residues): no chain break between residue i + start_offset and i + start_offset + length
+    n_frames, n_gaps = breaks.shape
+    n_residues = n_gaps + 1
+    cumulative = np.concatenate([np.zeros((n_frames, 1), dtype=np.int64), np.cumsum(breaks, axis=1)], axis=1)
+    first = np.arange(n_residues) + start_offset
+    last = first + length
+    inside = (first >= 0) & (last < n_residues)
+    first, last = first.clip(0, n_residues - 1), last.clip(0, n_residues - 1)
+    return inside[None, :] & (cumulative[:, last] == cumulative[:, first])
+
+
+def assign_block(coords, breaks, hydrogens, allowed):
+    # (n_frames, n_residues) letters for one block of frames
+    hbonds = hbond_matrix(coords, hydrogens, allowed)
+    n_frames, n_residues = hbonds.shape[:2]
+    positions = np.arange(n_residues)
+    ss = np.full((n_frames, n_residues), 'C', dtype='<U1')
+
+    # bends: CA(i-2) -> CA(i) -> CA(i+2) turns by more than BEND_ANGLE
+    ca = coords['CA']
+    bend = np.zeros((n_frames, n_residues), dtype=bool)
+    if n_residues > 4:
+        before = ca[:, 2:-2] - ca[:, :-4]
+        after = ca[:, 4:] - ca[:, 2:-2]
+        with np.errstate(invalid='ignore'):
+            cosine = np.sum(before * after, axis=-1) / (np.linalg.norm(before, axis=-1) * np.linalg.norm(after, axis=-1))
+        bend[:, 2:-2] = (np.degrees(np.arccos(np.clip(cosine, -1, 1))) > BEND_ANGLE) & _unbroken(breaks, -2, 4)[:, 2:-2]
+    ss[bend] = 'S'
+
+    # n-turns at i: CO(i) -> NH(i+n) with no break in between
+    turns = {}
+    for n in (3, 4, 5):
+        turn = np.zeros((n_frames, n_residues), dtype=bool)
+        turn[:, :n_residues - n] = hbonds[:, positions[:n_residues - n], positions[:n_residues - n] + n]
+        turns[n] = turn & _unbroken(breaks, 0, n)
+
+    # turn residues (i+1 .. i+n-1), below helices and strands
+    turn_residue = np.zeros((n_frames, n_residues), dtype=bool)
+    for n, turn in turns.items():
+        for k in range(1, n):
+            turn_residue[:, k:] |= turn[:, :n_residues - k]
+    ss[turn_residue] = 'T'
+
+    # helices: two consecutive n-turns at i-1 and i make residues i .. i+n-1 helical
+    helices = {}
+    for n, turn in turns.items():
+        start = np.zeros((n_frames, n_residues), dtype=bool)
+        start[:, 1:] = turn[:, 1:] & turn[:, :-1]
+        helix = np.zeros((n_frames, n_residues), dtype=bool)
+        for k in range(n):
+            helix[:, k:] |= start[:, :n_residues - k]
+        helices[n] = helix
+    ss[helices[5]] = 'I'
+    ss[helices[3]] = 'G'
+
+    # bridges (parallel and antiparallel) between residues at least 3 apart
+    transposed = np.swapaxes(hbonds, -1, -2)      # transposed[i, j] = hbonds[j, i]
+    parallel = (_shift(hbonds, -1, 0) & _shift(transposed, 1, 0)) | (_shift(transposed, 0, -1) & _shift(hbonds, 0, 1))
+    antiparallel = (hbonds & transposed) | (_shift(hbonds, -1, 1) & _shift(transposed, 1, -1))
+    separated = np.abs(positions[:, None] - positions[None, :]) >= 3
+    triplet = _unbroken(breaks, -1, 2)               # residues i-1, i, i+1 in one segment
+    bridge = (parallel | antiparallel) & separated & triplet[:, :, None] & triplet[:, None, :]
+    ss[bridge.any(axis=2)] = 'E'
+
+    ss[helices[4]] = 'H'
+    return ss
+
+
+def assign(coords, table):
+    # (n_frames, n_residues) array of SS_CODES letters, assigned BLOCK_ELEMENTS // residues^2 frames at a time
+    breaks = chain_breaks(coords, table['chain'])
+    hydrogens = amide_hydrogens(coords, breaks)
+    allowed = allowed_pairs(table['is_proline'])
+    n_frames, n_residues = coords['N'].shape[:2]
+    block = max(1, BLOCK_ELEMENTS // max(1, n_residues * n_residues))
+
+    ss = np.full((n_frames, n_residues), 'C', dtype='<U1')
+    for start in range(0, n_frames, block):
+        frames = slice(start, start + block)
+        block_coords = {name: xyz[frames] for name, xyz in coords.items()}
+        ss[frames] = assign_block(block_coords, breaks[frames], hydrogens[frames], allowed)
+    return ss
+
+
+def secondary_structure(path):
+    # (ss, table): ss is (n_frames, n_residues) of SS_CODES letters for every model in the file
+    coords, table = read_backbone(path)
+    if len(table['residue']) == 0:
+        return np.empty((len(coords['N']), 0), dtype='<U1'), table
+    return assign(coords, table), table
@@ -0,0 +1,34 @@
+# lazy_imports.py
+# Deferred imports for the heavy dependencies (mdtraj, SFC_Torch, pymol, ...) used by the analysis scripts.
+# md = lazy_import("mdtraj") binds a stand-in module; the real import happens on first attribute access,
+# so argument errors and missing-file exits never pay for it.
+
+import importlib
+import threading
+import types
+
+
+class LazyModule(types.ModuleType):
+    def __init__(self, name):
+        super().__init__(name)
+        self.__dict__['_lazy_lock'] = threading.Lock()
+        self.__dict__['_lazy_module'] = None
+
+    def _load(self):
+        # analysis scripts touch these from worker threads
+        with self._lazy_lock:
+            if self._lazy_module is None:
+                module = importlib.import_module(self.__name__)
+                self.__dict__['_lazy_module'] = module
+                self.__dict__.update(module.__dict__)
+        return self._lazy_module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_import(name):
+    return LazyModule(name)
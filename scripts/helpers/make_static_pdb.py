@@ -7,6 +7,7 @@
 # This script will remove atom lines with occupancy less than 0.5.
 
 # Output will be from {pdb}_nowat.pdb to {pdb}_nowat_static.pdb 
+# prepare_split.py already writes it (preprocess_structure.py); this only rebuilds a missing or outdated copy.
 
 import os
 import sys
@@ -20,6 +21,10 @@ if not os.path.exists(nowat_pdb):
     print(f"Error: Input file {nowat_pdb} not found.")
     sys.exit(1)
 
+if os.path.exists(static_pdb) and os.path.getmtime(static_pdb) >= os.path.getmtime(nowat_pdb):
+    print(f"[make_static_pdb.py] {static_pdb} is up to date.")
+    sys.exit(0)
+
 with open(nowat_pdb, 'r') as infile, open(static_pdb, 'w') as outfile:
     for line in infile:
         if line.startswith(('ATOM', 'HETATM')):
@@ -1,3 +1,31 @@
+AMINO_ACID_TO_LETTER = {
+    "ALA": "A",
+    "ARG": "R",
+    "ASN": "N",
+    "ASP": "D",
+    "CYS": "C",
+    "GLU": "E",
+    "GLN": "Q",
+    "GLY": "G",
+    "HIS": "H",
+    "ILE": "I",
+    "LEU": "L",
+    "LYS": "K",
+    "MET": "M",
+    "PHE": "F",
+    "PRO": "P",
+    "SER": "S",
+    "THR": "T",
+    "TRP": "W",
+    "TYR": "Y",
+    "VAL": "V",
+    "SEC": "U",
+    "PYL": "O",
+    "ASX": "B",
+    "GLX": "Z",
+    "UNK": "X",  # Unknown
+}
+
 
 def get_sequence_array(pdbPath):
     with open(pdbPath, "r") as file:
@@ -22,34 +50,6 @@ def get_sequence_array(pdbPath):
                 num_key = 0
             residues[chain_id][full_res_num] = {'name': res_name, 'order': num_key}
     
-    aminoAcidToLetter = {
-        "ALA": "A",
-        "ARG": "R",
-        "ASN": "N",
-        "ASP": "D",
-        "CYS": "C",
-        "GLU": "E",
-        "GLN": "Q",
-        "GLY": "G",
-        "HIS": "H",
-        "ILE": "I",
-        "LEU": "L",
-        "LYS": "K",
-        "MET": "M",
-        "PHE": "F",
-        "PRO": "P",
-        "SER": "S",
-        "THR": "T",
-        "TRP": "W",
-        "TYR": "Y",
-        "VAL": "V",
-        "SEC": "U",
-        "PYL": "O",
-        "ASX": "B",
-        "GLX": "Z",
-        "UNK": "X",  # Unknown
-    }
-    
     fasta = ""
     sequences = []
     for chain_id in sorted(residues.keys()):
@@ -58,7 +58,7 @@ def get_sequence_array(pdbPath):
         
         chain_seq = ""
         for _, res_data in sorted_residues:
-            chain_seq += aminoAcidToLetter.get(res_data['name'], "X")
+            chain_seq += AMINO_ACID_TO_LETTER.get(res_data['name'], "X")
         
         if chain_seq and len(chain_seq) > 10:
             chain_id = chain_id if chain_id else "A"
@@ -1,69 +1,67 @@
-# prepare_split.py.py splits/dataset.txt
+# prepare_split.py.py splits/dataset.txt [--jobs N] [--per-host N] [--no-cache] [--workers N]
 # Downloads and sets up ./PDBs/*
+# PDBs are fetched concurrently over one shared session; set PDB_REDO_URL / RCSB_DOWNLOAD_URL to use a mirror.
+# Files go through the shared download cache (./bin/download_cache/), so re-runs only revalidate with the server.
+# Each downloaded structure is then preprocessed in a process pool (preprocess_structure.py); files whose content
+# didn't change are left untouched, so pipeline.py doesn't rebuild what depends on them.
 
 import os
-import requests
 import argparse
-import pdb_sequence_maker
+import filecmp
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import gemmi
+from downloader import Downloader, PDB_REDO_URL, RCSB_DOWNLOAD_URL
+from download_cache import DownloadCache
+from preprocess_structure import preprocess
 
-def get_rid_of_water_and_ions(pdb_file_path, output_file_path):
-    cleaned_lines = []
-    with open(pdb_file_path, 'r') as pdb_file:
-        for line in pdb_file:
-            if not line.startswith(('HETATM', 'ANISOU', 'TER', 'END')):
-                cleaned_lines.append(line)
-            # elif line.startswith('HETATM'):
-            #     if not ('HOH' in line or 'WAT' in line or 'MG' in line):
-            #         cleaned_lines.append(line)
-    
-    with open(output_file_path, 'w') as output_file:
-        output_file.writelines(cleaned_lines)
-        output_file.close()
-    return True
+def download_file(url, output_path, downloader=None):
+    if downloader is None:
+        downloader = get_downloader()
+    return downloader.download(url, output_path)
 
-def download_file(url, output_path):
-    try:
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        
-        with open(output_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-        return True
-    except requests.exceptions.RequestException as e:
-        print(f"Error downloading {url}: {e}")
-        return False
 
+_downloader = None
+
+def get_downloader():
+    # one shared session for the whole split so connections to each host are reused
+    global _downloader
+    if _downloader is None:
+        _downloader = Downloader(cache=DownloadCache(), log_prefix="[prepare_split.py]")
+    return _downloader
 
-def download_pdb(pdb_id):
+
+def download_pdb(pdb_id, downloader=None):
     pdb_id = pdb_id.lower()
+    if downloader is None:
+        downloader = get_downloader()
     
     pdb_dir = os.path.join("PDBs", pdb_id)
     os.makedirs(pdb_dir, exist_ok=True)
     
-    pdb_redo_url = f"https://pdb-redo.eu/db/{pdb_id}/{pdb_id}_final.pdb"
+    pdb_redo_url = f"{PDB_REDO_URL}/{pdb_id}/{pdb_id}_final.pdb"
     pdb_output_path = os.path.join(pdb_dir, f"{pdb_id}_final.pdb")
     
-    if os.path.exists(pdb_output_path):
+    # without the cache there is no way to revalidate, so keep whatever is on disk
+    if downloader.cache is None and os.path.exists(pdb_output_path):
         print(f"[prepare_split.py] PDB already exists: {pdb_output_path}")
         return True
 
-    if download_file(pdb_redo_url, pdb_output_path):
+    if download_file(pdb_redo_url, pdb_output_path, downloader):
         print(f"[prepare_split.py] Successfully downloaded PDB from PDB_REDO: {pdb_id}")
         
-        mtz_url = f"https://pdb-redo.eu/db/{pdb_id}/{pdb_id}_final.mtz"
         mtz_output_path = os.path.join(pdb_dir, f"{pdb_id}_final.mtz")
-        
-        if download_file(mtz_url, mtz_output_path):
+        cif_output_path = os.path.join(pdb_dir, f"{pdb_id}_final.cif")
+        results = downloader.download_many([
+            (f"{PDB_REDO_URL}/{pdb_id}/{pdb_id}_final.mtz", mtz_output_path),
+            (f"{PDB_REDO_URL}/{pdb_id}/{pdb_id}_final.cif", cif_output_path),
+        ])
+
+        if results[mtz_output_path]:
             print(f"[prepare_split.py] Successfully downloaded MTZ from PDB_REDO: {pdb_id}")
         else:
             print(f"[prepare_split.py] Failed to download MTZ from PDB_REDO: {pdb_id}")
 
-        cif_url = f"https://pdb-redo.eu/db/{pdb_id}/{pdb_id}_final.cif"
-        cif_output_path = os.path.join(pdb_dir, f"{pdb_id}_final.cif")
-        
-        if download_file(cif_url, cif_output_path):
+        if results[cif_output_path]:
             print(f"[prepare_split.py] Successfully downloaded CIF from PDB_REDO: {pdb_id}")
         else:
             print(f"[prepare_split.py] Failed to download CIF from PDB_REDO: {pdb_id}")
@@ -71,24 +69,25 @@ def download_pdb(pdb_id):
     else:
         print(f"[prepare_split.py] PDB_REDO not available for {pdb_id}. Trying RCSB...")
         
-        rcsb_pdb_url = f"https://files.rcsb.org/download/{pdb_id}.pdb"
+        rcsb_pdb_url = f"{RCSB_DOWNLOAD_URL}/{pdb_id}.pdb"
         rcsb_pdb_output = os.path.join(pdb_dir, f"{pdb_id}_final.pdb")
         
-        if download_file(rcsb_pdb_url, rcsb_pdb_output):
+        if download_file(rcsb_pdb_url, rcsb_pdb_output, downloader):
             print(f"[prepare_split.py] Successfully downloaded PDB from RCSB: {pdb_id}")
             
-            rcsb_cif_url = f"https://files.rcsb.org/download/{pdb_id}.cif"
             rcsb_cif_output = os.path.join(pdb_dir, f"{pdb_id}_final.cif")
+            rcsb_sf_output = os.path.join(pdb_dir, f"{pdb_id}_sf.cif")
+            results = downloader.download_many([
+                (f"{RCSB_DOWNLOAD_URL}/{pdb_id}.cif", rcsb_cif_output),
+                (f"{RCSB_DOWNLOAD_URL}/{pdb_id}-sf.cif", rcsb_sf_output),
+            ])
             
-            if download_file(rcsb_cif_url, rcsb_cif_output):
+            if results[rcsb_cif_output]:
                 print(f"[prepare_split.py] Successfully downloaded CIF from RCSB: {pdb_id}")
             else:
                 print(f"[prepare_split.py] Failed to download CIF from RCSB: {pdb_id}")
             
-            rcsb_sf_url = f"https://files.rcsb.org/download/{pdb_id}-sf.cif"
-            rcsb_sf_output = os.path.join(pdb_dir, f"{pdb_id}_sf.cif")
-            
-            if download_file(rcsb_sf_url, rcsb_sf_output):
+            if results[rcsb_sf_output]:
                 print(f"[prepare_split.py] Successfully downloaded structure factors from RCSB: {pdb_id}")
                 
                 mtz_output = os.path.join(pdb_dir, f"{pdb_id}_final.mtz")
@@ -113,7 +112,13 @@ def convert_cif_to_mtz(cif_path, mtz_path, pdb_id):
         sf_doc = gemmi.cif.read(cif_path)
         mtz = gemmi.Mtz()
         mtz.read_sf_mmcif(sf_doc)
-        mtz.write_to_file(mtz_path)
+        # only replace an existing MTZ if the conversion differs, so its mtime tracks real changes
+        temp_path = mtz_path + ".tmp"
+        mtz.write_to_file(temp_path)
+        if os.path.exists(mtz_path) and filecmp.cmp(temp_path, mtz_path, shallow=False):
+            os.remove(temp_path)
+        else:
+            os.replace(temp_path, mtz_path)
         
         if os.path.exists(mtz_path):
             print(f"[prepare_split.py] Successfully converted CIF to MTZ using gemmi: {pdb_id}")
@@ -130,6 +135,10 @@ def convert_cif_to_mtz(cif_path, mtz_path, pdb_id):
 def main():
     parser = argparse.ArgumentParser(description='Initialize PDBs from a split file')
     parser.add_argument('split_file', help='Path to split text file')
+    parser.add_argument('--jobs', type=int, default=8, help='PDB entries downloaded at the same time')
+    parser.add_argument('--per-host', type=int, default=4, help='Maximum concurrent requests to one server')
+    parser.add_argument('--no-cache', action='store_true', help='Bypass ./bin/download_cache and skip PDBs already on disk')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Processes used to preprocess structures')
     args = parser.parse_args()
     
   
@@ -144,34 +153,42 @@ def main():
     
     print(f"[prepare_split.py] Downloading {len(pdb_ids)} PDB structures...")
     
+    cache = None if args.no_cache else DownloadCache()
+    downloader = Downloader(max_workers=max(args.jobs, 2), per_host=args.per_host, cache=cache, log_prefix="[prepare_split.py]")
     current_iter = 0
     total_iter = len(pdb_ids)
-    for pdb_id in pdb_ids:
-        if download_pdb(pdb_id):
-            # Downloaded the PDB successfully, now lets extract the sequence
-            new_original_path = os.path.join("PDBs", pdb_id, f"{pdb_id}_final.pdb")
-            thisPDBSeqArray = pdb_sequence_maker.get_sequence_array(new_original_path)
-            if (len(thisPDBSeqArray) > 1):
-                print(f"[prepare_split.py] Multiple sequences found for {pdb_id}, using the first one.")
-            if len(thisPDBSeqArray) == 0:
-                print(f"[prepare_split.py] No sequences found for {pdb_id}.")
-                usingSequence = None
-                continue
-            usingSequence = thisPDBSeqArray[0]
-            if usingSequence:
-                seq_file_path = os.path.join("PDBs", pdb_id, f"{pdb_id}_seq.txt")
-                with open(seq_file_path, 'w') as seq_file:
-                    seq_file.write(usingSequence)
-                print(f"[prepare_split.py] Sequence for {pdb_id} saved to {seq_file_path}")
-            
-            # Make non-water PDB
-            cleaned_pdb_path = os.path.join("PDBs", pdb_id, f"{pdb_id}_nowat.pdb")
-            if get_rid_of_water_and_ions(new_original_path, cleaned_pdb_path):
-                print(f"[prepare_split.py] Cleaned PDB for {pdb_id} saved to {cleaned_pdb_path}")
-            else:
-                print(f"[prepare_split.py] Failed to clean PDB for {pdb_id}")
+
+    def report_progress():
+        nonlocal current_iter
         current_iter += 1
         print(f"[prepare_split.py] Progress: {current_iter}/{total_iter} ({(current_iter / total_iter) * 100:.2f}%)")
+
+    # structures are preprocessed as soon as their download finishes, while the rest keep downloading
+    with ThreadPoolExecutor(max_workers=args.jobs) as download_executor, \
+            ProcessPoolExecutor(max_workers=args.workers) as process_executor:
+        download_futures = {download_executor.submit(download_pdb, pdb_id, downloader): pdb_id for pdb_id in pdb_ids}
+        process_futures = {}
+        for future in as_completed(download_futures):
+            pdb_id = download_futures[future]
+            try:
+                downloaded = future.result()
+            except Exception as e:
+                print(f"[prepare_split.py] Error downloading {pdb_id}: {e}")
+                downloaded = False
+            if downloaded:
+                process_futures[process_executor.submit(preprocess, pdb_id)] = pdb_id
+            else:
+                report_progress()
+        downloader.close()
+
+        for future in as_completed(process_futures):
+            pdb_id = process_futures[future]
+            try:
+                if not future.result():
+                    print(f"[prepare_split.py] Failed to clean PDB for {pdb_id}")
+            except Exception as e:
+                print(f"[prepare_split.py] Error preprocessing {pdb_id}: {e}")
+            report_progress()
     print("[prepare_split.py] All tasks completed.")
 
 if __name__ == "__main__":
@@ -0,0 +1,133 @@
+# preprocess_structure.py <PDB_ID> [<PDB_ID> ...]
+# One gemmi read of ./PDBs/{pdb}/{pdb}_final.pdb produces everything prepare_split.py and the alignment
+# scripts need from the deposited model:
+#   {pdb}_seq.txt             first chain sequence (same rules as pdb_sequence_maker.py)
+#   {pdb}_nowat.pdb           polymer atoms only (no waters, ions, ligands or ANISOU records)
+#   {pdb}_nowat_static.pdb    _nowat without atoms below 0.5 occupancy (was make_static_pdb.py)
+# Outputs whose content is unchanged are not rewritten.
+
+import os
+import sys
+
+import gemmi
+
+from pdb_sequence_maker import AMINO_ACID_TO_LETTER
+
+STATIC_OCCUPANCY = 0.5
+MIN_CHAIN_LENGTH = 10
+
+
+def log(message):
+    # one write per line so output from pool workers doesn't interleave mid-line
+    sys.stdout.write(message + "\n")
+    sys.stdout.flush()
+
+
+def get_sequences(model):
+    # mirrors pdb_sequence_maker.get_sequence_array: ATOM records only, residues keyed by number + insertion code,
+    # chains in name order, stable sort by residue number, chains of 10 residues or fewer ignored
+    residues = {}
+    for chain in model:
+        chain_residues = residues.setdefault(chain.name, {})
+        for residue in chain:
+            if residue.het_flag != 'A':
+                continue
+            chain_residues[f"{residue.seqid.num}{residue.seqid.icode.strip()}"] = (residue.name, residue.seqid.num)
+
+    sequences = []
+    for chain_name in sorted(residues):
+        ordered = sorted(residues[chain_name].values(), key=lambda x: x[1])
+        chain_seq = "".join(AMINO_ACID_TO_LETTER.get(name, "X") for name, _ in ordered)
+        if len(chain_seq) > MIN_CHAIN_LENGTH:
+            sequences.append(chain_seq)
+    return sequences
+
+
+def strip_to_polymer(structure):
+    # same content as the old line filter that dropped HETATM/ANISOU records
+    for model in structure:
+        for chain in model:
+            for i in reversed(range(len(chain))):
+                if chain[i].het_flag != 'A':
+                    del chain[i]
+                    continue
+                for atom in chain[i]:
+                    atom.aniso = gemmi.SMat33f(0, 0, 0, 0, 0, 0)
+    structure.remove_empty_chains()
+
+
+def drop_low_occupancy(structure, cutoff=STATIC_OCCUPANCY):
+    for model in structure:
+        for chain in model:
+            for i in reversed(range(len(chain))):
+                residue = chain[i]
+                for j in reversed(range(len(residue))):
+                    if residue[j].occ < cutoff:
+                        del residue[j]
+                if len(residue) == 0:
+                    del chain[i]
+    structure.remove_empty_chains()
+
+
+def write_if_changed(path, text):
+    # keep the file (and its mtime) when the content is the same, so a re-run of prepare_split.py
+    # doesn't make pipeline.py rebuild everything downstream; returns whether the file was written
+    if os.path.exists(path):
+        with open(path) as f:
+            if f.read() == text:
+                return False
+    temp_path = path + ".tmp"
+    with open(temp_path, 'w') as f:
+        f.write(text)
+    os.replace(temp_path, path)
+    return True
+
+
+def write_pdb(structure, path):
+    options = gemmi.PdbWriteOptions()
+    options.ter_records = False
+    options.end_record = False
+    return write_if_changed(path, structure.make_pdb_string(options))
+
+
+def preprocess(pdb_id):
+    pdb_id = pdb_id.lower()
+    pdb_dir = os.path.join("PDBs", pdb_id)
+    final_path = os.path.join(pdb_dir, f"{pdb_id}_final.pdb")
+
+    try:
+        structure = gemmi.read_structure(final_path)
+    except (RuntimeError, ValueError, OSError) as e:
+        log(f"[preprocess_structure.py] Could not read {final_path}: {e}")
+        return False
+
+    sequences = get_sequences(structure[0])
+    if len(sequences) > 1:
+        log(f"[preprocess_structure.py] Multiple sequences found for {pdb_id}, using the first one.")
+    if len(sequences) == 0:
+        log(f"[preprocess_structure.py] No sequences found for {pdb_id}.")
+        return False
+    seq_file_path = os.path.join(pdb_dir, f"{pdb_id}_seq.txt")
+    if write_if_changed(seq_file_path, sequences[0]):
+        log(f"[preprocess_structure.py] Sequence for {pdb_id} saved to {seq_file_path}")
+
+    # Make non-water PDB
+    strip_to_polymer(structure)
+    cleaned_pdb_path = os.path.join(pdb_dir, f"{pdb_id}_nowat.pdb")
+    if write_pdb(structure, cleaned_pdb_path):
+        log(f"[preprocess_structure.py] Cleaned PDB for {pdb_id} saved to {cleaned_pdb_path}")
+
+    # Single-conformer copy for mdtraj (alignment topology)
+    drop_low_occupancy(structure)
+    static_pdb_path = os.path.join(pdb_dir, f"{pdb_id}_nowat_static.pdb")
+    if write_pdb(structure, static_pdb_path):
+        log(f"[preprocess_structure.py] Static PDB for {pdb_id} saved to {static_pdb_path}")
+    return True
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("Usage: python preprocess_structure.py <PDB_ID> [<PDB_ID> ...]")
+        sys.exit(1)
+    failed = [pdb_id for pdb_id in sys.argv[1:] if not preprocess(pdb_id)]
+    sys.exit(1 if failed else 0)
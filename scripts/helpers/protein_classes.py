@@ -0,0 +1,23 @@
+# protein_classes.py
+# Parser for the protein class mapping (./bin/protein_classes/include.txt): one "class,pdb" pair per line,
+# blank lines ignored. Shared by get_pseudoensemble_rmsf.py and the graphing loaders; a malformed line raises
+# ValueError naming the source and line number.
+
+
+def parse_class_lines(lines, source="<text>"):
+    # class -> [pdb ids], in file order
+    mapping = {}
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        fields = [field.strip() for field in line.strip().split(',')]
+        if len(fields) != 2 or not all(fields):
+            raise ValueError(f"{source}:{number}: expected 'class,pdb', got {line.strip()!r}")
+        protein_class, pdb = fields
+        mapping.setdefault(protein_class, []).append(pdb)
+    return mapping
+
+
+def read_class_mapping(mapping_file="bin/protein_classes/include.txt"):
+    with open(mapping_file, 'r') as f:
+        return parse_class_lines(f, mapping_file)
@@ -0,0 +1,16 @@
+# residue_numbering.py
+# Predictors (and other deposits of the same protein) don't always keep the deposited residue numbering.
+# numbering_offset finds the shift that lines up the most residue names, at any offset, in one broadcast compare.
+
+import numpy as np
+
+
+def numbering_offset(residues, names, reference_residues, reference_names):
+    # most common (reference - residue) among residue pairs with the same name; 0 if nothing matches
+    same_name = names[:, None] == reference_names[None, :]
+    if not same_name.any():
+        return 0
+    differences = (reference_residues[None, :] - residues[:, None])[same_name]
+    values, counts = np.unique(differences, return_counts=True)
+    best = values[counts == counts.max()]
+    return int(best[np.argmin(np.abs(best))])
@@ -0,0 +1,247 @@
+# rotamers.py
+# Side-chain chi angles and rotamer names for every model of a (multi-model) PDB in one process, in place of
+# running phenix.rotalyze on each ensemble. Side-chain atoms of all frames are one
+# (n_frames, n_residues, MAX_ATOMS, 3) array; chi1-chi4 of every residue and frame are one vectorized dihedral.
+# Rotamer names come from the penultimate rotamer library (Lovell et al. 2000) that rotalyze reports; the
+# centre of each rotamer is read from its name (p/t/m = +62/180/-65 degrees, numbers are the modal angle of
+# sp2 chis). A conformation gets the name of the nearest centre when every chi is within CHI_TOLERANCE of it,
+# otherwise OUTLIER. This is a window around the modal angles, not rotalyze's probability contours, so
+# residues at the edge of a rotamer can be named differently.
+
+import re
+
+import gemmi
+import numpy as np
+
+CHI_TOLERANCE = 45.0     # degrees
+OUTLIER = 'OUTLIER'
+
+# residue -> atoms of chi1..chiN (Arg chi5 and the terminal amide / carboxylate flips are not rotamer chis)
+CHI_ATOMS = {
+    'ARG': [('N', 'CA', 'CB', 'CG'), ('CA', 'CB', 'CG', 'CD'), ('CB', 'CG', 'CD', 'NE'), ('CG', 'CD', 'NE', 'CZ')],
+    'ASN': [('N', 'CA', 'CB', 'CG'), ('CA', 'CB', 'CG', 'OD1')],
+    'ASP': [('N', 'CA', 'CB', 'CG'), ('CA', 'CB', 'CG', 'OD1')],
+    'CYS': [('N', 'CA', 'CB', 'SG')],
+    'GLN': [('N', 'CA', 'CB', 'CG'), ('CA', 'CB', 'CG', 'CD'), ('CB', 'CG', 'CD', 'OE1')],
+    'GLU': [('N', 'CA', 'CB', 'CG'), ('CA', 'CB', 'CG', 'CD'), ('CB', 'CG', 'CD', 'OE1')],
+    'HIS': [('N', 'CA', 'CB', 'CG'), ('CA', 'CB', 'CG', 'ND1')],
+    'ILE': [('N', 'CA', 'CB', 'CG1'), ('CA', 'CB', 'CG1', 'CD1')],
+    'LEU': [('N', 'CA', 'CB', 'CG'), ('CA', 'CB', 'CG', 'CD1')],
+    'LYS': [('N', 'CA', 'CB', 'CG'), ('CA', 'CB', 'CG', 'CD'), ('CB', 'CG', 'CD', 'CE'), ('CG', 'CD', 'CE', 'NZ')],
+    'MET': [('N', 'CA', 'CB', 'CG'), ('CA', 'CB', 'CG', 'SD'), ('CB', 'CG', 'SD', 'CE')],
+    'PHE': [('N', 'CA', 'CB', 'CG'), ('CA', 'CB', 'CG', 'CD1')],
+    'PRO': [('N', 'CA', 'CB', 'CG')],
+    'SER': [('N', 'CA', 'CB', 'OG')],
+    'THR': [('N', 'CA', 'CB', 'OG1')],
+    'TRP': [('N', 'CA', 'CB', 'CG'), ('CA', 'CB', 'CG', 'CD1')],
+    'TYR': [('N', 'CA', 'CB', 'CG'), ('CA', 'CB', 'CG', 'CD1')],
+    'VAL': [('N', 'CA', 'CB', 'CG1')],
+}
+
+# last chi is 180-degree symmetric (OD1/OD2, OE1/OE2, CD1/CD2 of the ring)
+SYMMETRIC = {'ASP', 'GLU', 'PHE', 'TYR'}
+
+ROTAMER_NAMES = {
+    'ARG': "ptp85 ptp180 ptt85 ptt180 ptt-85 ptm180 ptm-85 tpp80 tpp-165 tpt85 tpt170 ttp85 ttp-170 ttp105 "
+           "ttt85 ttt180 ttt-85 ttm105 ttm-80 mtp85 mtp180 mtp-105 mtt85 mtt180 mtt-85 mtm105 mtm180 mtm-85 "
+           "mmt85 mmt180 mmt-85 mmm180 mmm-85",
+    'ASN': "p-10 p30 t-20 t30 m-20 m-80 m120",
+    'ASP': "p-10 p30 t0 t70 m-20",
+    'CYS': "p t m",
+    'GLN': "pt20 pm0 tp-100 tp60 tt0 mp0 mt-30 mm-40 mm100",
+    'GLU': "pt-20 pm0 tp10 tt0 tm-20 mp0 mt-10 mm-40",
+    'HIS': "p-80 p80 t-160 t-80 t60 m-70 m170 m80",
+    'ILE': "pp pt tp tt mp mt mm",
+    'LEU': "pp tp tt mp mt",
+    'LYS': "ptpt pttp pttt pttm ptmt tptp tptt tptm ttpp ttpt tttp tttt tttm ttmt ttmm tmtp tmtt tmtm "
+           "mptt mttp mttt mttm mtmt mtmm mmtp mmtt mmtm mmmt",
+    'MET': "ptp ptm tpp tpt ttp ttt ttm mtp mtt mtm mmp mmt mmm",
+    'PHE': "p90 t80 m-85 m-30",
+    'PRO': "Cg_endo Cg_exo",
+    'SER': "p t m",
+    'THR': "p t m",
+    'TRP': "p-90 p90 t-105 t90 m-90 m0 m95",
+    'TYR': "p90 t80 m-85 m-30",
+    'VAL': "p t m",
+}
+
+LETTER_ANGLES = {'p': 62.0, 't': 180.0, 'm': -65.0}
+PROLINE_ANGLES = {'Cg_endo': 30.0, 'Cg_exo': -30.0}
+
+# residue -> distinct side-chain atoms in the order they first appear in a chi; MAX_ATOMS slots per residue
+ATOMS = {aa: list(dict.fromkeys(name for chi in chis for name in chi)) for aa, chis in CHI_ATOMS.items()}
+MAX_ATOMS = max(len(names) for names in ATOMS.values())
+
+
+def rotamer_centers(aa):
+    # (names, (n_rotamers, n_chi) centres in degrees) of one residue type
+    names = ROTAMER_NAMES[aa].split()
+    if aa == 'PRO':
+        return names, np.array([[PROLINE_ANGLES[name]] for name in names])
+    centers = []
+    for name in names:
+        letters, number = re.fullmatch(r'([ptm]+)(-?\d+)?', name).groups()
+        angles = [LETTER_ANGLES[letter] for letter in letters]
+        if number is not None:
+            angles.append(float(number))
+        centers.append(angles)
+    return names, np.array(centers)
+
+
+def _slots(aa):
+    # (4, 4) indices into the residue's ATOMS slots for chi1..chi4, -1 for chis the residue does not have
+    slots = np.full((4, 4), -1, dtype=np.int64)
+    for k, chi in enumerate(CHI_ATOMS.get(aa, [])):
+        slots[k] = [ATOMS[aa].index(name) for name in chi]
+    return slots
+
+
+def _residue_table(residues):
+    # residues: [(chain, residue, aa)]
+    return {
+        'chain': np.array([r[0] for r in residues]),
+        'residue': np.array([r[1] for r in residues], dtype=np.int64),
+        'aa': np.array([r[2] for r in residues]),
+    }
+
+
+def read_side_chains(path):
+    # ((n_frames, n_residues, MAX_ATOMS, 3) float32, residue table): chi atoms of every model, NaN when missing.
+    # Residues come from the first model; the first altloc of each atom is used.
+    structure = gemmi.read_structure(path)
+    structure.setup_entities()
+    structure.remove_alternative_conformations()
+
+    keys, residues = [], []
+    for chain in structure[0]:
+        for residue in chain:
+            if residue.name in CHI_ATOMS or residue.name in ('GLY', 'ALA'):
+                keys.append((chain.name, residue.seqid.num, residue.seqid.icode))
+                residues.append((chain.name, residue.seqid.num, residue.name))
+    index = {key: i for i, key in enumerate(keys)}
+    lookups = [{name: slot for slot, name in enumerate(ATOMS.get(r[2], []))} for r in residues]
+
+    coords = np.full((len(structure), len(keys), MAX_ATOMS, 3), np.nan, dtype=np.float32)
+    for frame, model in enumerate(structure):
+        for chain in model:
+            for residue in chain:
+                i = index.get((chain.name, residue.seqid.num, residue.seqid.icode))
+                if i is None:
+                    continue
+                lookup = lookups[i]
+                for atom in residue:
+                    slot = lookup.get(atom.name)
+                    if slot is not None:
+                        coords[frame, i, slot] = (atom.pos.x, atom.pos.y, atom.pos.z)
+    return coords, _residue_table(residues)
+
+
+def read_conformers(path):
+    # ((1, n_conformers, MAX_ATOMS, 3), table with an extra 'altloc' and 'weight'): every residue of the first
+    # model once per altloc of its chi atoms, weighted by that altloc's occupancy (weights of a residue sum to 1)
+    structure = gemmi.read_structure(path)
+    structure.setup_entities()
+
+    conformers, residues, altlocs, weights = [], [], [], []
+    for chain in structure[0]:
+        for residue in chain:
+            aa = residue.name
+            if aa not in CHI_ATOMS:
+                continue
+            names = ATOMS[aa]
+            atoms = [atom for atom in residue if atom.name in names]
+            labels = sorted({atom.altloc for atom in atoms if atom.altloc != '\0'}) or ['\0']
+
+            rows, occupancies = [], []
+            for label in labels:
+                xyz = np.full((MAX_ATOMS, 3), np.nan, dtype=np.float32)
+                occupancy = []
+                for slot, name in enumerate(names):
+                    # this altloc's atom, else the shared (no altloc) one
+                    matches = [atom for atom in atoms if atom.name == name and atom.altloc in (label, '\0')]
+                    if matches:
+                        atom = max(matches, key=lambda a: a.altloc == label)
+                        xyz[slot] = (atom.pos.x, atom.pos.y, atom.pos.z)
+                        if atom.altloc == label:
+                            occupancy.append(atom.occ)
+                rows.append(xyz)
+                occupancies.append(np.mean(occupancy) if occupancy else 1.0)
+
+            occupancies = np.array(occupancies, dtype=np.float64)
+            occupancies = occupancies / occupancies.sum() if occupancies.sum() > 0 else np.full(len(labels), 1 / len(labels))
+            for label, xyz, weight in zip(labels, rows, occupancies):
+                conformers.append(xyz)
+                residues.append((chain.name, residue.seqid.num, aa))
+                altlocs.append('' if label == '\0' else label)
+                weights.append(weight)
+
+    coords = np.array(conformers, dtype=np.float32).reshape(1, len(conformers), MAX_ATOMS, 3)
+    table = _residue_table(residues)
+    table['altloc'] = np.array(altlocs)
+    table['weight'] = np.array(weights, dtype=np.float64)
+    return coords, table
+
+
+def dihedrals(p0, p1, p2, p3):
+    # degrees in (-180, 180], broadcasting over any leading axes of (..., 3) arrays
+    b0 = p0 - p1
+    b1 = p2 - p1
+    b2 = p3 - p2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        b1 = b1 / np.linalg.norm(b1, axis=-1, keepdims=True)
+    v = b0 - np.sum(b0 * b1, axis=-1, keepdims=True) * b1
+    w = b2 - np.sum(b2 * b1, axis=-1, keepdims=True) * b1
+    x = np.sum(v * w, axis=-1)
+    y = np.sum(np.cross(b1, v) * w, axis=-1)
+    return np.degrees(np.arctan2(y, x))
+
+
+def chi_angles(coords, aa):
+    # (n_frames, n_residues, 4) chi1..chi4 in degrees, NaN where the residue has no such chi or atoms are missing
+    slots = np.stack([_slots(name) for name in aa]) if len(aa) else np.zeros((0, 4, 4), dtype=np.int64)
+    defined = slots[..., 0] >= 0                                      # (n_residues, 4)
+    residues = np.arange(len(aa))[:, None, None]
+    atoms = coords[:, residues, slots.clip(0)].astype(np.float64)   # (n_frames, n_residues, 4, 4, 3)
+    chis = dihedrals(atoms[..., 0, :], atoms[..., 1, :], atoms[..., 2, :], atoms[..., 3, :])
+    return np.where(defined[None], chis, np.nan)
+
+
+def assign(chis, aa):
+    # (n_frames, n_residues) rotamer names; '' for residues without rotamers (GLY, ALA, unknown)
+    n_frames, n_residues = chis.shape[:2]
+    names = np.full((n_frames, n_residues), '', dtype=object)
+    for residue_type in np.unique(aa):
+        if residue_type not in ROTAMER_NAMES:
+            continue
+        columns = np.flatnonzero(aa == residue_type)
+        rotamer_names, centers = rotamer_centers(residue_type)
+        n_chi = centers.shape[1]
+        values = chis[:, columns, :n_chi]                            # (n_frames, r, n_chi)
+
+        period = np.full(n_chi, 360.0)
+        if residue_type in SYMMETRIC:
+            period[-1] = 180.0
+        difference = values[:, :, None, :] - centers[None, None]    # (n_frames, r, n_rotamers, n_chi)
+        difference = np.abs((difference + period / 2) % period - period / 2)
+
+        nearest = np.argmin(np.sum(difference ** 2, axis=-1), axis=-1)
+        worst = np.take_along_axis(difference.max(axis=-1), nearest[..., None], axis=-1)[..., 0]
+        assigned = np.array(rotamer_names, dtype=object)[nearest]
+        assigned[~(worst <= CHI_TOLERANCE)] = OUTLIER
+        assigned[np.isnan(values).any(axis=-1)] = ''                # truncated side chains are not named
+        names[:, columns] = assigned
+    return names
+
+
+def rotamers(path):
+    # (chis (n_frames, n_residues, 4), names (n_frames, n_residues), table) for every model in the file
+    coords, table = read_side_chains(path)
+    chis = chi_angles(coords, table['aa'])
+    return chis, assign(chis, table['aa']), table
+
+
+def deposited_rotamers(path):
+    # (chis (n_conformers, 4), names (n_conformers,), table with altloc and weight) for the altlocs of the first model
+    coords, table = read_conformers(path)
+    chis = chi_angles(coords, table['aa'])
+    return chis[0], assign(chis, table['aa'])[0], table
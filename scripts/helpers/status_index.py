@@ -0,0 +1,263 @@
+# status_index.py refresh <split_name>
+# status_index.py missing <split_name> <stage> [--predictor p]
+# status_index.py slowest [--stage s] [-n N]
+# status_index.py check <split_name>
+# status_index.py record <pdb_id> <predictor|-> <stage> <path> <status> [--wall-ms N] [--note text]
+# status_index.py record-run <script_name> <pdb_id> <exit_code> <wall_ms>
+# SQLite index (./bin/status.sqlite) of every (PDB, predictor, stage) artifact: path, size, hash, status and wall time.
+# Stages update it as they finish; refresh only stats the expected paths of a split, it never walks ./PDBs/.
+
+import argparse
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+
+STATUS_DB = "./bin/status.sqlite"
+PREDICTORS = ['bioemu', 'alphaflow', 'sam2', 'boltz2', 'openfold']
+PREDICTOR_NAMES = {'bioemu': 'BioEmu', 'alphaflow': 'AlphaFlow', 'sam2': 'SAM2', 'boltz2': 'Boltz2', 'openfold': 'OpenFold'}
+
+# stage -> (artifact path, per_predictor); per-PDB analyses get one row per predictor whose ensemble they include
+ARTIFACTS = {
+    'prepare': ("./PDBs/{pdb}/{pdb}_final.pdb", False),
+    'ensemble': ("./PDBs/{pdb}/{pdb}_{predictor}.pdb", True),
+    'rfree': ("./PDBs/{pdb}/analysis/rfrees.csv", True),
+    'rmsf': ("./PDBs/{pdb}/analysis/rmsf.csv", True),
+    'rmsf_baseline': ("./PDBs/{pdb}/analysis/{pdb}_qfit_RMSF.csv", False),
+    'density_fitness': ("./PDBs/{pdb}/analysis/density_fitness.json", True),
+    'secondary_structure': ("./PDBs/{pdb}/analysis/secondary_structure.csv", False),
+    'secondary_structure_frames': ("./PDBs/{pdb}/analysis/secondary_structure_propensity.csv", True),
+    'rotamers': ("./PDBs/{pdb}/analysis/rotamers.csv", True),
+    'rmsr_galign': ("./PDBs/{pdb}/analysis/rmsr_galign.csv", True),
+    'rmsr_mr': ("./PDBs/{pdb}/analysis/rmsr_mr.csv", True),
+    'cosine_similarity': ("./PDBs/{pdb}/analysis/cosine_similarity.csv", True),
+}
+
+SCRIPT_STAGES = {
+    'get_rfrees.py': 'rfree',
+    'get_rmsf.py': 'rmsf',
+    'get_rmsf_baseline.py': 'rmsf_baseline',
+    'get_density_fitness.py': 'density_fitness',
+    'get_secondary_structure.py': 'secondary_structure',
+    'get_rotamers.py': 'rotamers',
+    'get_rmsr_galign.py': 'rmsr_galign',
+    'get_rmsr_mr.py': 'rmsr_mr',
+    'get_rmsf_cosine_similarity.py': 'cosine_similarity',
+}
+
+
+def connect(db_path=STATUS_DB):
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    connection = sqlite3.connect(db_path, timeout=60)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS artifacts (
+            pdb_id TEXT NOT NULL,
+            predictor TEXT NOT NULL,
+            stage TEXT NOT NULL,
+            path TEXT,
+            size INTEGER,
+            mtime_ns INTEGER,
+            sha256 TEXT,
+            status TEXT NOT NULL,
+            wall_ms INTEGER,
+            note TEXT,
+            updated_at REAL NOT NULL,
+            PRIMARY KEY (pdb_id, predictor, stage)
+        )""")
+    connection.execute("CREATE INDEX IF NOT EXISTS artifacts_stage ON artifacts (stage, predictor, status)")
+    return connection
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def record(pdb_id, predictor, stage, path, status, wall_ms=None, note=None, connection=None):
+    # Hashes are only recomputed when size or mtime changed since the last record.
+    own_connection = connection is None
+    if own_connection:
+        connection = connect()
+
+    size = mtime_ns = sha256 = None
+    if path and os.path.exists(path):
+        stat = os.stat(path)
+        size, mtime_ns = stat.st_size, stat.st_mtime_ns
+        previous = connection.execute(
+            "SELECT size, mtime_ns, sha256 FROM artifacts WHERE pdb_id=? AND predictor=? AND stage=?",
+            (pdb_id.lower(), predictor, stage)).fetchone()
+        if previous is not None and previous[0] == size and previous[1] == mtime_ns and previous[2]:
+            sha256 = previous[2]
+        else:
+            sha256 = file_hash(path)
+
+    if wall_ms is None:
+        # keep the last known wall time when only refreshing file state
+        previous = connection.execute(
+            "SELECT wall_ms FROM artifacts WHERE pdb_id=? AND predictor=? AND stage=?",
+            (pdb_id.lower(), predictor, stage)).fetchone()
+        wall_ms = previous[0] if previous is not None else None
+
+    connection.execute(
+        "INSERT OR REPLACE INTO artifacts VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (pdb_id.lower(), predictor, stage, path, size, mtime_ns, sha256, status, wall_ms, note, time.time()))
+    connection.commit()
+
+    if own_connection:
+        connection.close()
+
+
+def artifact_status(stage, pdb_id, predictor):
+    template, per_predictor = ARTIFACTS[stage]
+    path = template.format(pdb=pdb_id, predictor=predictor)
+    if not os.path.exists(path):
+        return path, 'missing'
+
+    if stage != 'ensemble' and per_predictor:
+        # a per-PDB analysis only covers a predictor if it was written after that predictor's ensemble
+        ensemble_path = ARTIFACTS['ensemble'][0].format(pdb=pdb_id, predictor=predictor)
+        if not os.path.exists(ensemble_path):
+            return path, 'missing'
+        if os.path.getmtime(ensemble_path) > os.path.getmtime(path):
+            return path, 'stale'
+    return path, 'done'
+
+
+def refresh_pdb(pdb_id, stages=None, predictors=None, wall_ms=None, failed=False, connection=None):
+    own_connection = connection is None
+    if own_connection:
+        connection = connect()
+
+    for stage in stages or ARTIFACTS:
+        per_predictor = ARTIFACTS[stage][1]
+        for predictor in ((predictors or PREDICTORS) if per_predictor else [""]):
+            path, status = artifact_status(stage, pdb_id, predictor)
+            if failed and status != 'done':
+                status = 'failed'
+            record(pdb_id, predictor, stage, path, status, wall_ms=wall_ms, connection=connection)
+
+    if own_connection:
+        connection.close()
+
+
+def read_split(split_name):
+    with open(f"./splits/{split_name}.txt") as f:
+        return [line.strip().lower() for line in f if line.strip()]
+
+
+def refresh_split(split_name, stages=None):
+    connection = connect()
+    for pdb_id in read_split(split_name):
+        refresh_pdb(pdb_id, stages, connection=connection)
+    connection.close()
+
+
+def missing(split_name, stage, predictor=None):
+    # PDBs of the split without a 'done' row for the stage (and predictor)
+    pdb_ids = read_split(split_name)
+    if ARTIFACTS[stage][1] and predictor is None:
+        predictors = PREDICTORS
+    else:
+        predictors = [predictor or ""]
+
+    connection = connect()
+    done = set(connection.execute(
+        f"SELECT pdb_id, predictor FROM artifacts WHERE stage=? AND status='done' AND predictor IN ({','.join('?' * len(predictors))})",
+        (stage, *predictors)).fetchall())
+    connection.close()
+
+    return [(pdb_id, p) for pdb_id in pdb_ids for p in predictors if (pdb_id, p) not in done]
+
+
+def slowest(stage=None, limit=20):
+    connection = connect()
+    query = "SELECT pdb_id, predictor, stage, wall_ms, status FROM artifacts WHERE wall_ms IS NOT NULL"
+    params = ()
+    if stage:
+        query += " AND stage=?"
+        params = (stage,)
+    rows = connection.execute(query + " ORDER BY wall_ms DESC LIMIT ?", (*params, limit)).fetchall()
+    connection.close()
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dataset completeness and stage timing index")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    refresh_parser = subparsers.add_parser("refresh", help="Re-stat the expected artifacts of a split")
+    refresh_parser.add_argument("split_name")
+    refresh_parser.add_argument("--stages", nargs="+", choices=list(ARTIFACTS))
+
+    missing_parser = subparsers.add_parser("missing", help="PDBs of a split lacking a stage")
+    missing_parser.add_argument("split_name")
+    missing_parser.add_argument("stage", choices=list(ARTIFACTS))
+    missing_parser.add_argument("--predictor", choices=PREDICTORS)
+    missing_parser.add_argument("--refresh", action="store_true", help="Re-stat the stage's artifacts first")
+
+    slowest_parser = subparsers.add_parser("slowest", help="Slowest recorded jobs")
+    slowest_parser.add_argument("--stage")
+    slowest_parser.add_argument("-n", type=int, default=20)
+
+    check_parser = subparsers.add_parser("check", help="Report missing predictions (check_missing.sh)")
+    check_parser.add_argument("split_name")
+
+    record_parser = subparsers.add_parser("record", help="Record one artifact")
+    record_parser.add_argument("pdb_id")
+    record_parser.add_argument("predictor", help="Predictor name, or - for PDB-level stages")
+    record_parser.add_argument("stage")
+    record_parser.add_argument("path")
+    record_parser.add_argument("status")
+    record_parser.add_argument("--wall-ms", type=int)
+    record_parser.add_argument("--note")
+
+    run_parser = subparsers.add_parser("record-run", help="Record the outcome of an analysis script run")
+    run_parser.add_argument("script_name")
+    run_parser.add_argument("pdb_id")
+    run_parser.add_argument("exit_code", type=int)
+    run_parser.add_argument("wall_ms", type=int)
+
+    args = parser.parse_args()
+
+    if args.command == "refresh":
+        refresh_split(args.split_name, args.stages)
+
+    elif args.command == "missing":
+        if args.refresh:
+            refresh_split(args.split_name, [args.stage])
+        for pdb_id, predictor in missing(args.split_name, args.stage, args.predictor):
+            print(f"{pdb_id},{predictor}" if predictor else pdb_id)
+
+    elif args.command == "slowest":
+        for pdb_id, predictor, stage, wall_ms, status in slowest(args.stage, args.n):
+            print(f"{pdb_id},{predictor},{stage},{wall_ms},{status}")
+
+    elif args.command == "check":
+        refresh_split(args.split_name, ['ensemble'])
+        absent = missing(args.split_name, 'ensemble')
+        absent_by_pdb = {}
+        for pdb_id, predictor in absent:
+            absent_by_pdb.setdefault(pdb_id, []).append(predictor)
+        for pdb_id in read_split(args.split_name):
+            if pdb_id not in absent_by_pdb:
+                print(f"> [{pdb_id}] All present.")
+                continue
+            for predictor in absent_by_pdb[pdb_id]:
+                print(f"[{pdb_id}] Missing {PREDICTOR_NAMES[predictor]} Prediction")
+
+    elif args.command == "record":
+        predictor = "" if args.predictor == "-" else args.predictor
+        record(args.pdb_id, predictor, args.stage, args.path, args.status, args.wall_ms, args.note)
+
+    elif args.command == "record-run":
+        stage = SCRIPT_STAGES.get(os.path.basename(args.script_name))
+        if stage is None:
+            sys.exit(0)
+        refresh_pdb(args.pdb_id.lower(), [stage], wall_ms=args.wall_ms, failed=args.exit_code != 0)
+
+    sys.exit(0)
@@ -0,0 +1,181 @@
+# template_hits.py index <dataset> [--watch SECONDS]
+# template_hits.py list <dataset> [--top N] [--max-evalue E] [--target pdb_id]
+# Persistent index of OpenFold template hits: (target, rank, template, chain, probability, e-value)
+# parsed from ./bin/openfold_data/<dataset>/alignments/<target>/hhsearch_output.hhr into
+# ./bin/openfold_data/<dataset>/template_hits.sqlite. Only new or changed .hhr files are parsed, so the
+# template cutoff can be changed without rescanning every alignment.
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+import time
+
+OPENFOLD_DATA = "./bin/openfold_data"
+HHR_NAME = "hhsearch_output.hhr"
+HIT_LINE = re.compile(r'^\s*(\d+)\s+(\S+)')
+
+
+def dataset_root(dataset):
+    return os.path.join(OPENFOLD_DATA, dataset)
+
+
+def connect(dataset):
+    connection = sqlite3.connect(os.path.join(dataset_root(dataset), "template_hits.sqlite"), timeout=60)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS hits (
+            target TEXT NOT NULL,
+            rank INTEGER NOT NULL,
+            template TEXT NOT NULL,
+            chain TEXT,
+            probability REAL,
+            evalue REAL,
+            PRIMARY KEY (target, rank)
+        )""")
+    connection.execute("""
+        CREATE TABLE IF NOT EXISTS sources (
+            target TEXT PRIMARY KEY,
+            path TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            mtime_ns INTEGER NOT NULL
+        )""")
+    connection.execute("CREATE INDEX IF NOT EXISTS hits_template ON hits (template)")
+    return connection
+
+
+def parse_hhr(hhr_path):
+    # hit table of an HHsearch result: "No Hit  Prob E-value P-value Score ..." up to the first blank line.
+    # The hit column is 30 characters wide, so the numbers are read after it.
+    hits = []
+    in_table = False
+    with open(hhr_path, 'r') as f:
+        for line in f:
+            if line.startswith(" No Hit"):
+                in_table = True
+                continue
+            if not in_table:
+                continue
+            if not line.strip():
+                break
+            match = HIT_LINE.match(line)
+            if not match:
+                continue
+            rank = int(match.group(1))
+            entry = match.group(2)
+            template = entry[:4].lower()
+            if len(template) != 4 or not template.isalnum():
+                continue
+            chain = entry[5:] if len(entry) > 5 else None
+            numbers = line[34:].split()
+            try:
+                probability, evalue = float(numbers[0]), float(numbers[1])
+            except (IndexError, ValueError):
+                probability = evalue = None
+            hits.append((rank, template, chain, probability, evalue))
+    return hits
+
+
+def index_dataset(dataset, connection=None):
+    # (re)parse the .hhr of every target whose file is new or changed since the last index run
+    own_connection = connection is None
+    if own_connection:
+        connection = connect(dataset)
+
+    alignments_dir = os.path.join(dataset_root(dataset), "alignments")
+    known = {target: (size, mtime_ns) for target, size, mtime_ns in
+             connection.execute("SELECT target, size, mtime_ns FROM sources")}
+    updated = 0
+    targets = os.listdir(alignments_dir) if os.path.isdir(alignments_dir) else []
+    for target in targets:
+        hhr_path = os.path.join(alignments_dir, target, HHR_NAME)
+        try:
+            stat = os.stat(hhr_path)
+        except FileNotFoundError:
+            continue
+        if known.get(target) == (stat.st_size, stat.st_mtime_ns):
+            continue
+
+        hits = parse_hhr(hhr_path)
+        with connection:
+            connection.execute("DELETE FROM hits WHERE target=?", (target,))
+            connection.executemany("INSERT OR REPLACE INTO hits VALUES (?, ?, ?, ?, ?, ?)",
+                                   [(target, *hit) for hit in hits])
+            connection.execute("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)",
+                               (target, hhr_path, stat.st_size, stat.st_mtime_ns))
+        updated += 1
+
+    if own_connection:
+        connection.close()
+    return updated
+
+
+def target_hits(dataset, top=None, max_evalue=None, targets=None, refresh=True):
+    # {target: [template, ...]} in rank order, keeping the first `top` hits per target
+    connection = connect(dataset)
+    if refresh:
+        index_dataset(dataset, connection)
+
+    query = "SELECT target, template FROM hits WHERE 1=1"
+    params = []
+    if max_evalue is not None:
+        query += " AND evalue <= ?"
+        params.append(max_evalue)
+    if targets is not None:
+        query += f" AND target IN ({','.join('?' * len(targets))})"
+        params.extend(targets)
+    rows = connection.execute(query + " ORDER BY target, rank", params).fetchall()
+    connection.close()
+
+    by_target = {}
+    for target, template in rows:
+        templates = by_target.setdefault(target, [])
+        if top is None or len(templates) < top:
+            templates.append(template)
+    return by_target
+
+
+def unique_templates(dataset, top=None, max_evalue=None, targets=None):
+    templates = set()
+    for hits in target_hits(dataset, top, max_evalue, targets).values():
+        templates.update(hits)
+    return sorted(templates)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index and query OpenFold template hits")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    index_parser = subparsers.add_parser("index", help="Parse new or changed hhsearch results")
+    index_parser.add_argument("dataset")
+    index_parser.add_argument("--watch", type=float, help="Keep indexing every SECONDS while alignments are running")
+
+    list_parser = subparsers.add_parser("list", help="Print the templates selected by a cutoff")
+    list_parser.add_argument("dataset")
+    list_parser.add_argument("--top", type=int, help="Hits kept per target")
+    list_parser.add_argument("--max-evalue", type=float)
+    list_parser.add_argument("--target", action="append", help="Restrict to these targets")
+    list_parser.add_argument("--per-target", action="store_true", help="Print target,rank,template rows")
+
+    args = parser.parse_args()
+
+    if args.command == "index":
+        while True:
+            updated = index_dataset(args.dataset)
+            if updated:
+                print(f"[template_hits.py] Indexed {updated} new or updated alignments for {args.dataset}")
+            if args.watch is None:
+                break
+            time.sleep(args.watch)
+
+    elif args.command == "list":
+        if args.per_target:
+            for target, templates in target_hits(args.dataset, args.top, args.max_evalue, args.target).items():
+                for rank, template in enumerate(templates, start=1):
+                    print(f"{target},{rank},{template}")
+        else:
+            for template in unique_templates(args.dataset, args.top, args.max_evalue, args.target):
+                print(template)
+
+    sys.exit(0)
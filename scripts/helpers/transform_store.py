@@ -0,0 +1,213 @@
+# transform_store.py record <pdb_id> <predictor> <method> <source_pdb> <placed_pdb>
+# transform_store.py apply <pdb_id> <predictor> <method> <output_pdb>
+# transform_store.py list <pdb_id>
+# Keeps the rotation + translation found by each alignment method instead of a rewritten copy of the ensemble.
+# Transforms are stored per (PDB, predictor, method) in ./bin/transforms/<pdb_id>/<predictor>.<method>.npz,
+# in Å, either one global transform or one per frame, together with the file they apply to.
+
+import argparse
+import os
+import sys
+
+import numpy as np
+
+TRANSFORM_ROOT = "./bin/transforms"
+# a placed copy must reproduce its source this closely (PDB coordinates are rounded to 0.001 Å)
+RECORD_MAX_RMSD = 0.5
+
+
+def transform_path(pdb_id, predictor, method):
+    return f"{TRANSFORM_ROOT}/{pdb_id.lower()}/{predictor}.{method}.npz"
+
+
+def kabsch(mobile, reference):
+    # mobile / reference: (N, 3) for one transform or (F, N, 3) for one per frame
+    mobile_center = mobile.mean(axis=-2, keepdims=True)
+    reference_center = reference.mean(axis=-2, keepdims=True)
+
+    h = np.swapaxes(mobile - mobile_center, -1, -2) @ (reference - reference_center)
+    u, _, vt = np.linalg.svd(h)
+    v = np.swapaxes(vt, -1, -2)
+    d = np.sign(np.linalg.det(v @ np.swapaxes(u, -1, -2)))
+
+    correction = np.zeros(h.shape)
+    correction[..., 0, 0] = 1.0
+    correction[..., 1, 1] = 1.0
+    correction[..., 2, 2] = d
+    rotation = v @ correction @ np.swapaxes(u, -1, -2)
+    translation = reference_center[..., 0, :] - np.einsum('...ij,...j->...i', rotation, mobile_center[..., 0, :])
+    return rotation, translation
+
+
+def apply_transform(coords, rotation, translation):
+    # coords: (N, 3) or (F, N, 3); rotation: (3, 3) or (F, 3, 3)
+    if rotation.ndim == 3:
+        return np.einsum('fij,fnj->fni', rotation, coords) + translation[:, None, :]
+    return coords @ rotation.T + translation
+
+
+def save_transform(pdb_id, predictor, method, rotation, translation, source_path, applied=False):
+    # applied=True means source_path was rewritten with the transform already applied
+    path = transform_path(pdb_id, predictor, method)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    stat = os.stat(source_path)
+    np.savez_compressed(
+        path,
+        rotation=np.asarray(rotation, dtype=np.float64),
+        translation=np.asarray(translation, dtype=np.float64),
+        source=source_path,
+        source_mtime_ns=stat.st_mtime_ns,
+        source_size=stat.st_size,
+        applied=applied,
+    )
+    print(f"[transform_store.py] Stored {method} transform for {pdb_id} {predictor} at {path}")
+    return path
+
+
+def load_transform(pdb_id, predictor, method, check_source=True):
+    path = transform_path(pdb_id, predictor, method)
+    if not os.path.exists(path):
+        return None
+
+    with np.load(path) as data:
+        transform = {
+            'rotation': data['rotation'],
+            'translation': data['translation'],
+            'source': str(data['source']),
+            'source_mtime_ns': int(data['source_mtime_ns']),
+            'source_size': int(data['source_size']),
+            'applied': bool(data['applied']),
+        }
+
+    if check_source:
+        source = transform['source']
+        if not os.path.exists(source):
+            return None
+        stat = os.stat(source)
+        if stat.st_mtime_ns != transform['source_mtime_ns'] or stat.st_size != transform['source_size']:
+            print(f"[transform_store.py] {source} changed since its {method} transform was stored, ignoring it")
+            return None
+
+    return transform
+
+
+def list_transforms(pdb_id, predictor=None):
+    folder = f"{TRANSFORM_ROOT}/{pdb_id.lower()}"
+    if not os.path.isdir(folder):
+        return []
+
+    entries = []
+    for file in sorted(os.listdir(folder)):
+        if not file.endswith(".npz"):
+            continue
+        file_predictor, method = file[:-len(".npz")].split(".", 1)
+        if predictor is None or file_predictor == predictor:
+            entries.append((file_predictor, method))
+    return entries
+
+
+def load_aligned_ensemble(pdb_id, predictor, method):
+    # mdtraj trajectory of the transform's source with the transform applied (in memory only)
+    import mdtraj as md
+
+    transform = load_transform(pdb_id, predictor, method)
+    if transform is None:
+        return None
+
+    ensemble = md.load(transform['source'])
+    if not transform['applied']:
+        xyz = ensemble.xyz.astype(np.float64) * 10.0
+        ensemble.xyz = (apply_transform(xyz, transform['rotation'], transform['translation']) / 10.0).astype(np.float32)
+    return ensemble
+
+
+def ca_by_residue(topology):
+    # (resSeq, residue name) -> CA atom index; None when a key repeats (several chains, insertion codes)
+    ca = {}
+    for atom in topology.atoms:
+        if atom.name != "CA":
+            continue
+        key = (atom.residue.resSeq, atom.residue.name)
+        if key in ca:
+            return None
+        ca[key] = atom.index
+    return ca
+
+
+def record_from_files(pdb_id, predictor, method, source_path, placed_path):
+    # One global rigid transform that maps source onto an already placed copy of it (e.g. Phaser's pa.1.1.pdb).
+    # The placed file is rewritten by another program, so CA atoms are paired by residue, not by atom index.
+    # Returns None (nothing stored) when the CA atoms don't pair up one-to-one or the copy isn't rigid.
+    import mdtraj as md
+
+    source = md.load(source_path)
+    placed = md.load(placed_path)
+    source_ca = ca_by_residue(source.topology)
+    placed_ca = ca_by_residue(placed.topology)
+    if source_ca is None or placed_ca is None or source_ca.keys() != placed_ca.keys() or len(source_ca) < 3:
+        print(f"[transform_store.py] Error: CA atoms of {source_path} and {placed_path} don't pair up by residue, "
+              f"{method} transform not stored")
+        return None
+    keys = sorted(source_ca)
+    source_indices = [source_ca[key] for key in keys]
+    placed_indices = [placed_ca[key] for key in keys]
+
+    frames = min(source.n_frames, placed.n_frames)
+    mobile = source.xyz[:frames, source_indices].reshape(-1, 3).astype(np.float64) * 10.0
+    target = placed.xyz[:frames, placed_indices].reshape(-1, 3).astype(np.float64) * 10.0
+
+    rotation, translation = kabsch(mobile, target)
+    rmsd = np.sqrt(((apply_transform(mobile, rotation, translation) - target) ** 2).sum(axis=1).mean())
+    print(f"[transform_store.py] {method} transform reproduces {placed_path} with CA RMSD {rmsd:.3f} Å")
+    if rmsd > RECORD_MAX_RMSD:
+        print(f"[transform_store.py] Error: {placed_path} is not a rigid copy of {source_path} "
+              f"(CA RMSD above {RECORD_MAX_RMSD} Å), {method} transform not stored")
+        return None
+
+    return save_transform(pdb_id, predictor, method, rotation, translation, source_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Alignment transform store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="Store the rigid transform between an ensemble and a placed copy")
+    record_parser.add_argument("pdb_id")
+    record_parser.add_argument("predictor")
+    record_parser.add_argument("method")
+    record_parser.add_argument("source_pdb")
+    record_parser.add_argument("placed_pdb")
+
+    apply_parser = subparsers.add_parser("apply", help="Write the aligned ensemble for a stored transform")
+    apply_parser.add_argument("pdb_id")
+    apply_parser.add_argument("predictor")
+    apply_parser.add_argument("method")
+    apply_parser.add_argument("output_pdb")
+
+    list_parser = subparsers.add_parser("list", help="List stored transforms for a PDB")
+    list_parser.add_argument("pdb_id")
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        for path in [args.source_pdb, args.placed_pdb]:
+            if not os.path.exists(path):
+                print(f"[transform_store.py] Error: '{path}' does not exist.")
+                sys.exit(1)
+        if record_from_files(args.pdb_id, args.predictor, args.method, args.source_pdb, args.placed_pdb) is None:
+            sys.exit(1)
+
+    elif args.command == "apply":
+        ensemble = load_aligned_ensemble(args.pdb_id, args.predictor, args.method)
+        if ensemble is None:
+            print(f"[transform_store.py] Error: No usable {args.method} transform for {args.pdb_id} {args.predictor}")
+            sys.exit(1)
+        ensemble.save(args.output_pdb)
+        print(f"[transform_store.py] Saved {args.method}-aligned ensemble to {args.output_pdb}")
+
+    elif args.command == "list":
+        for predictor, method in list_transforms(args.pdb_id):
+            print(f"{args.pdb_id.lower()},{predictor},{method},{transform_path(args.pdb_id, predictor, method)}")
+
+    sys.exit(0)
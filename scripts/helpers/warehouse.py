@@ -0,0 +1,273 @@
+# warehouse.py build <split_name> [--tables t1 t2 ...] [--jobs N]
+# warehouse.py show <split_name> <table> [--pdb id ...] [--predictor p ...]
+# Columnar copy of every per-PDB analysis output of a split, so dataset-level summaries and plots read
+# one table instead of one CSV per PDB. Each table is a hive-partitioned Parquet dataset
+# ./bin/warehouse/<table>/split=<split>/pdb_id=<id>/data.parquet, rows sorted by predictor and residue,
+# keeping the columns of the CSV it came from (density keeps the per-residue stats of residue_stats).
+# build only rewrites partitions whose source file changed (./bin/warehouse/<split>.json).
+# Needs pyarrow; without it, before the first build, or when a source file changed since the last build
+# (size/mtime differ from the manifest) consumers read the per-PDB CSVs as before.
+
+import argparse
+import importlib.util
+import json
+import os
+import shutil
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from scripts.summary import residue_stats
+
+WAREHOUSE_ROOT = "./bin/warehouse"
+
+# table -> (source file, sort columns)
+TABLES = {
+    'rmsf': ("./PDBs/{pdb}/analysis/rmsf.csv", ['predictor', 'residue']),
+    'rmsr': ("./PDBs/{pdb}/analysis/rmsr_galign.csv", ['predictor', 'residue']),
+    'density': ("./PDBs/{pdb}/analysis/density_fitness.json", ['predictor', 'residue']),
+    'rfree': ("./PDBs/{pdb}/analysis/rfrees.csv", ['predictor']),
+    'secondary_structure': ("./PDBs/{pdb}/analysis/secondary_structure.csv", ['residue']),
+    'cosine_similarity': ("./PDBs/{pdb}/analysis/cosine_similarity.csv", ['element1', 'element2']),
+    'qfit_rmsf': ("./PDBs/{pdb}/analysis/{pdb}_qfit_RMSF.csv", ['resseq']),
+}
+
+
+def pyarrow_installed():
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def manifest_path(split_name):
+    return os.path.join(WAREHOUSE_ROOT, f"{split_name}.json")
+
+
+def load_manifest(split_name):
+    if not os.path.exists(manifest_path(split_name)):
+        return {}
+    with open(manifest_path(split_name)) as f:
+        return json.load(f)
+
+
+def split_pdb_ids(split_name):
+    with open(f"./splits/{split_name}.txt") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def fresh_pdbs(split_name, tables=None, pdb_ids=None):
+    # PDBs (in the given order) whose source files still have the size and mtime recorded by the last build
+    # in every table, i.e. whose partitions are up to date; a source that is missing on both sides counts as fresh
+    if not pyarrow_installed() or not os.path.exists(manifest_path(split_name)):
+        return []
+    manifest = load_manifest(split_name)
+    tables = tables or list(TABLES)
+    if any(table not in manifest for table in tables):
+        return []
+    if pdb_ids is None:
+        pdb_ids = split_pdb_ids(split_name)
+    return [pdb_id for pdb_id in pdb_ids
+            if all(manifest[table].get(pdb_id.lower()) == source_state(TABLES[table][0].format(pdb=pdb_id.lower()))
+                   for table in tables)]
+
+
+def available(split_name, tables=None):
+    # True when these tables of the split can be read from the warehouse instead of the per-PDB CSVs:
+    # pyarrow is installed and no source file changed since the last build
+    if not pyarrow_installed() or not os.path.exists(manifest_path(split_name)):
+        return False
+    pdb_ids = split_pdb_ids(split_name)
+    outdated = len(pdb_ids) - len(fresh_pdbs(split_name, tables, pdb_ids))
+    if outdated:
+        print(f"[warehouse.py] {outdated} PDBs of {split_name} changed since the last build, reading the per-PDB files "
+              f"(rebuild with: python ./scripts/helpers/warehouse.py build {split_name})")
+    return outdated == 0
+
+
+def partition_dir(table, split_name, pdb_id):
+    return os.path.join(WAREHOUSE_ROOT, table, f"split={split_name}", f"pdb_id={pdb_id}")
+
+
+def load_density(path):
+    # density_fitness.json (DataFrame.to_json of predictor, frame, metrics = list of residue objects, written by
+    # get_density_fitness.py) -> per-residue stats, as summary/dataset.py
+    with open(path, 'r') as f:
+        parsed = json.load(f)
+    predictors = parsed.get('predictor', {})
+    frames = parsed.get('frame', {})
+    metrics = parsed.get('metrics', {})
+
+    rows = []
+    for k, predictor in predictors.items():
+        for residue_data in metrics.get(k) or []:
+            if 'EDIAm' in residue_data and 'seqID' in residue_data:
+                rows.append({
+                    'predictor': predictor,
+                    'frame': str(frames.get(k, '')),
+                    'residue': (residue_data['pdb']['seqNum'] - 1) if predictor == 'alphaflow' else residue_data['pdb']['seqNum'],
+                    'EDIAm': residue_data['EDIAm'],
+                    'RSCCS': residue_data['RSCCS'],
+                    'RSR': residue_data['RSR'],
+                    'aa': residue_data.get('compID', ''),
+                })
+    if not rows:
+        return pd.DataFrame()
+    return residue_stats.group_stats(pd.DataFrame(rows), ['predictor', 'residue', 'aa'], ['EDIAm', 'RSCCS', 'RSR'])
+
+
+def load_source(table, path):
+    if table == 'density':
+        return load_density(path)
+    df = pd.read_csv(path)
+    return df.drop(columns=[c for c in df.columns if c.startswith('Unnamed:')])
+
+
+def source_state(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def write_partition(table, split_name, pdb_id, df):
+    directory = partition_dir(table, split_name, pdb_id)
+    os.makedirs(directory, exist_ok=True)
+    sort_columns = [c for c in TABLES[table][1] if c in df.columns]
+    if sort_columns:
+        df = df.sort_values(sort_columns, kind='stable')
+    temp_path = os.path.join(directory, f".data.{uuid.uuid4().hex}.part")
+    df.reset_index(drop=True).to_parquet(temp_path, index=False)
+    os.replace(temp_path, os.path.join(directory, "data.parquet"))
+
+
+def build_pdb(table, split_name, pdb_id, previous_state):
+    # returns (state, action); state None means no source file for this PDB
+    path = TABLES[table][0].format(pdb=pdb_id)
+    state = source_state(path)
+    if state is None:
+        shutil.rmtree(partition_dir(table, split_name, pdb_id), ignore_errors=True)
+        return None, "removed" if previous_state else "missing"
+    if state == previous_state and os.path.exists(os.path.join(partition_dir(table, split_name, pdb_id), "data.parquet")):
+        return state, "unchanged"
+    try:
+        df = load_source(table, path)
+    except Exception as e:
+        print(f"[warehouse.py] Error reading {path}: {e}")
+        return previous_state, "failed"
+    write_partition(table, split_name, pdb_id, df)
+    return state, "written"
+
+
+def build(split_name, tables=None, jobs=8):
+    if not pyarrow_installed():
+        print("[warehouse.py] pyarrow is not installed. Install with: pip install pyarrow")
+        return False
+
+    pdb_ids = [pdb_id.lower() for pdb_id in split_pdb_ids(split_name)]
+    manifest = load_manifest(split_name)
+
+    failed = 0
+    for table in tables or TABLES:
+        previous = manifest.get(table, {})
+        with ThreadPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(lambda pdb_id: build_pdb(table, split_name, pdb_id, previous.get(pdb_id)), pdb_ids))
+
+        # PDBs dropped from the split lose their partition too
+        for pdb_id in set(previous) - set(pdb_ids):
+            shutil.rmtree(partition_dir(table, split_name, pdb_id), ignore_errors=True)
+
+        manifest[table] = {pdb_id: state for pdb_id, (state, _) in zip(pdb_ids, results) if state is not None}
+        actions = [action for _, action in results]
+        failed += actions.count("failed")
+        print(f"[warehouse.py] {table}: {actions.count('written')} written, {actions.count('unchanged')} unchanged, "
+              f"{actions.count('missing')} missing, {actions.count('failed')} failed")
+
+    os.makedirs(WAREHOUSE_ROOT, exist_ok=True)
+    with open(manifest_path(split_name) + ".tmp", "w") as f:
+        json.dump(manifest, f)
+    os.replace(manifest_path(split_name) + ".tmp", manifest_path(split_name))
+    return failed == 0
+
+
+def read_table(table, split_name, pdb_ids=None, predictors=None, columns=None):
+    # one dataset scan; the PDB filter prunes partitions, the predictor filter is pushed down to row groups.
+    # Partitions are read as built: check available() / fresh_pdbs() first
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    root = os.path.join(WAREHOUSE_ROOT, table)
+    if not os.path.isdir(os.path.join(root, f"split={split_name}")):
+        return pd.DataFrame()
+
+    # PDB IDs stay strings even when they look numeric
+    partitioning = ds.partitioning(pa.schema([("pdb_id", pa.string())]), flavor="hive")
+    dataset = ds.dataset(os.path.join(root, f"split={split_name}"), format="parquet", partitioning=partitioning)
+
+    # read_csv can type a column differently per PDB (e.g. an all-numeric name), so every file is
+    # scanned as one common schema: mixed numbers become float64, anything else mixed becomes string
+    field_types = {}
+    for fragment in dataset.get_fragments():
+        for schema_field in fragment.physical_schema:
+            field_types.setdefault(schema_field.name, []).append(schema_field.type)
+    fields = []
+    for name, types in field_types.items():
+        kinds = {t for t in types if not pa.types.is_null(t)}
+        if len(kinds) <= 1:
+            field_type = kinds.pop() if kinds else pa.null()
+        elif all(pa.types.is_integer(t) or pa.types.is_floating(t) for t in kinds):
+            field_type = pa.float64()
+        else:
+            field_type = pa.string()
+        fields.append(pa.field(name, field_type))
+    fields.append(pa.field("pdb_id", pa.string()))
+    dataset = ds.dataset(os.path.join(root, f"split={split_name}"), format="parquet", partitioning=partitioning,
+                         schema=pa.schema(fields))
+    expression = None
+    if pdb_ids is not None:
+        expression = ds.field("pdb_id").isin([pdb_id.lower() for pdb_id in pdb_ids])
+    if predictors is not None and "predictor" in dataset.schema.names:
+        predictor_expression = ds.field("predictor").isin(list(predictors))
+        expression = predictor_expression if expression is None else expression & predictor_expression
+    if columns is not None:
+        columns = ["pdb_id"] + [c for c in columns if c != "pdb_id"]
+
+    return dataset.to_table(columns=columns, filter=expression).to_pandas()
+
+
+def split_by_pdb(df, pdb_ids):
+    # [(pdb_id, frame with the source CSV's columns)] in split order, for the PDBs that have rows
+    if df.empty:
+        return []
+    groups = {pdb_id: group.drop(columns=['pdb_id']).reset_index(drop=True) for pdb_id, group in df.groupby('pdb_id', sort=False)}
+    return [(pdb_id, groups[pdb_id.lower()]) for pdb_id in pdb_ids if pdb_id.lower() in groups]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Consolidate per-PDB analysis outputs into Parquet tables")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Write new or changed per-PDB outputs of a split")
+    build_parser.add_argument("split_name")
+    build_parser.add_argument("--tables", nargs="+", choices=list(TABLES), help="Tables to build (default: all)")
+    build_parser.add_argument("--jobs", type=int, default=8, help="PDBs converted at the same time")
+
+    show_parser = subparsers.add_parser("show", help="Print rows of one table")
+    show_parser.add_argument("split_name")
+    show_parser.add_argument("table", choices=list(TABLES))
+    show_parser.add_argument("--pdb", action="append", help="Restrict to these PDB IDs")
+    show_parser.add_argument("--predictor", action="append", help="Restrict to these predictors")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        sys.exit(0 if build(args.split_name, args.tables, args.jobs) else 1)
+
+    elif args.command == "show":
+        if not available(args.split_name, [args.table]):
+            print(f"[warehouse.py] No warehouse for {args.split_name}, run: python ./scripts/helpers/warehouse.py build {args.split_name}")
+            sys.exit(1)
+        print(read_table(args.table, args.split_name, args.pdb, args.predictor).to_string())
+
+    sys.exit(0)
@@ -0,0 +1,88 @@
+# watch_outputs.py <watch_dir> [--pattern *.pdb] [--pid PID] [--workers N] [--settle SECONDS] -- <command ...>
+# Runs <command> once for every file that appears in <watch_dir>, with at most N running at a time.
+# {stem} and {path} in the command are replaced by the file's name without extension and its path.
+# A file is picked up once its size and mtime have been unchanged for --settle seconds (right away once the
+# producer --pid has exited). Returns when the producer is gone and every file has been handled.
+
+import argparse
+import fnmatch
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def pid_alive(pid):
+    if pid is None:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def run_command(command, path):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    arguments = [part.replace("{stem}", stem).replace("{path}", path) for part in command]
+    print(f"[watch_outputs.py] Starting: {' '.join(arguments)}", flush=True)
+    result = subprocess.run(arguments)
+    if result.returncode != 0:
+        print(f"[watch_outputs.py] Failed ({result.returncode}): {' '.join(arguments)}", flush=True)
+    return result.returncode == 0
+
+
+def watch(watch_dir, command, pattern="*.pdb", pid=None, workers=4, settle=10.0, poll=2.0):
+    seen = {}        # path -> (size, mtime_ns, first time this state was seen)
+    submitted = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            producer_running = pid_alive(pid)
+            now = time.time()
+            names = os.listdir(watch_dir) if os.path.isdir(watch_dir) else []
+            for name in sorted(names):
+                path = os.path.join(watch_dir, name)
+                if path in submitted or not fnmatch.fnmatch(name, pattern):
+                    continue
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                state = (stat.st_size, stat.st_mtime_ns)
+                previous = seen.get(path)
+                if previous is None or previous[:2] != state:
+                    seen[path] = (*state, now)
+                    previous = seen[path]
+                # still being written?
+                if producer_running and (stat.st_size == 0 or now - previous[2] < settle):
+                    continue
+                submitted[path] = executor.submit(run_command, command, path)
+
+            if not producer_running:
+                break
+            time.sleep(poll)
+
+    failed = [path for path, future in submitted.items() if not future.result()]
+    print(f"[watch_outputs.py] Processed {len(submitted)} files from {watch_dir}, {len(failed)} failed", flush=True)
+    return failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fan out a command over files as a producer writes them")
+    parser.add_argument("watch_dir")
+    parser.add_argument("--pattern", default="*.pdb")
+    parser.add_argument("--pid", type=int, help="Producer process; keep watching while it runs")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--settle", type=float, default=10.0, help="Seconds a file must stay unchanged")
+    argv = sys.argv[1:]
+    if "--" not in argv or argv.index("--") == len(argv) - 1:
+        parser.error("a command is required after --")
+    split = argv.index("--")
+    args = parser.parse_args(argv[:split])
+    command = argv[split + 1:]
+
+    failed = watch(args.watch_dir, command, args.pattern, args.pid, args.workers, args.settle)
+    sys.exit(1 if failed else 0)
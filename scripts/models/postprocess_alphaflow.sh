@@ -0,0 +1,24 @@
+#!/bin/bash
+# postprocess_alphaflow.sh <pdb_id> <predicted_pdb>
+# Copies one AlphaFlow prediction into ./PDBs/<pdb_id>/alphaflow_bin/ and aligns it (MDTRAJ transform, then PHASER).
+# run_alphaflow.sh starts this for each target as soon as its prediction is written.
+
+if [ "$#" -ne 2 ]; then
+    echo "[postprocess_alphaflow.sh] A pdb id AND predicted PDB file are required."
+    exit 1
+fi
+
+pdb_id=$1
+pdb_file=$2
+
+target_dir="./PDBs/$pdb_id"
+mkdir -p "$target_dir"
+mkdir -p "$target_dir/alphaflow_bin"
+rm -rf "$target_dir/alphaflow_bin/*"
+OUTPUT_FILE="$target_dir/alphaflow_bin/${pdb_id}_ensemble.pdb"
+cp "$pdb_file" $OUTPUT_FILE
+python ./scripts/helpers/align_with_mdtraj.py $OUTPUT_FILE "$target_dir/${pdb_id,,}_final.pdb"
+
+echo "[postprocess_alphaflow.sh] Alignment with MDTRAJ completed. Now aligning with PHASER..."
+bash ./scripts/helpers/align_with_phaser.sh "${pdb_id,,}" alphaflow
+echo "[postprocess_alphaflow.sh] Final, aligned PDB file: $target_dir/${pdb_id,,}_alphaflow.pdb"
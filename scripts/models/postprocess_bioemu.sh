@@ -0,0 +1,22 @@
+#!/bin/bash
+# postprocess_bioemu.sh <pdb_id> [--xtc]
+# Sidechain reconstruction, superposition and ensemble write (models/bioemu/postprocess.py, one in-memory pass)
+# followed by Phaser placement, for BioEmu samples already in ./PDBs/<pdb_id>/bioemu_bin/ (topology.pdb + bioemu.xtc).
+# Called by run_bioemu.sh and by the batched driver as each target finishes.
+
+set -e
+if [ "$#" -lt 1 ]; then
+    echo "[postprocess_bioemu.sh] A pdb id is required."
+    exit 1
+fi
+
+PDB_ID=$1
+PDB_DIR="./PDBs/${PDB_ID,,}"
+ENSEMBLE_OUTPUT="${PDB_DIR}/bioemu_bin/${PDB_ID,,}_ensemble.pdb"
+export PYTHONPATH=$(pwd):$PYTHONPATH
+
+python ./models/bioemu/postprocess.py "$PDB_ID" "${@:2}"
+echo "[postprocess_bioemu.sh] Saved aligned ensemble of $PDB_ID to $ENSEMBLE_OUTPUT. Aligning with PHASER now"
+
+bash ./scripts/helpers/align_with_phaser.sh "${PDB_ID,,}" bioemu
+echo "[postprocess_bioemu.sh] Aligned $ENSEMBLE_OUTPUT to original with PHASER. Done."
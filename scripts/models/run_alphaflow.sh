@@ -1,14 +1,15 @@
 #!/bin/bash
-# run_alphaflow.sh <split_name> <sequence_count>
+# run_alphaflow.sh <split_name> <sequence_count> [post_workers]
 #set -e
 
-if [ "$#" -ne 2 ]; then
-    echo "[run_alphaflow.sh] A split name AND sequence count is required."
+if [ "$#" -lt 2 ] || [ "$#" -gt 3 ]; then
+    echo "[run_alphaflow.sh] A split name AND sequence count is required (optionally the number of parallel post-processing jobs)."
     exit 1
 fi
 
 
 SPLIT_NAME=$1
+POST_WORKERS=${3:-4}
 
 
 SEQ_FILE="./splits/${SPLIT_NAME}_seqs.csv"
@@ -42,40 +43,29 @@ echo "[run_alphaflow.sh] Starting AlphaFlow prediction for split: $SPLIT_NAME"
 cd ./models/alphaflow
 
 
-python predict.py --mode alphafold --input_csv $ABSOLUTE_SEQ_FILE --msa_dir $ABSOLUTE_MSA_DIR --weights $ABSOLUTE_WEIGHTS_PATH --samples $2 --outpdb $ABSOLUTE_OUTPUT_DIR
+python predict.py --mode alphafold --input_csv $ABSOLUTE_SEQ_FILE --msa_dir $ABSOLUTE_MSA_DIR --weights $ABSOLUTE_WEIGHTS_PATH --samples $2 --outpdb $ABSOLUTE_OUTPUT_DIR &
+PREDICT_PID=$!
+cd ../..
+
+# align each target as soon as its PDB is written, while later targets are still predicted
+mkdir -p ./PDBs
+echo "[run_alphaflow.sh] Post-processing targets as they finish ($POST_WORKERS at a time)..."
+python ./scripts/helpers/watch_outputs.py "$ALPHAFLOW_OUT_DIR" --pattern "*.pdb" --pid $PREDICT_PID --workers $POST_WORKERS \
+    -- bash ./scripts/models/postprocess_alphaflow.sh {stem} {path} &
+WATCH_PID=$!
 
+wait $PREDICT_PID
 RUN_STATUS=$?
-cd ../..
+wait $WATCH_PID
+WATCH_STATUS=$?
 
 if [ $RUN_STATUS -eq 0 ]; then
     echo "[run_alphaflow.sh] AlphaFlow prediction completed successfully"
-    
-    echo "[run_alphaflow.sh] Moving PDB files from the output..."
-    
-    mkdir -p ./PDBs
-    
-    for pdb_file in $ALPHAFLOW_OUT_DIR/*.pdb; do
-        if [ -f "$pdb_file" ]; then
-            pdb_id=$(basename "$pdb_file" .pdb)
-            
-            target_dir="./PDBs/$pdb_id"
-            mkdir -p "$target_dir"
-            mkdir -p "$target_dir/alphaflow_bin"
-            rm -rf "$target_dir/alphaflow_bin/*"
-            OUTPUT_FILE="$target_dir/alphaflow_bin/${pdb_id}_ensemble.pdb"
-            cp "$pdb_file" $OUTPUT_FILE
-            python ./scripts/helpers/align_with_mdtraj.py $OUTPUT_FILE "$target_dir/${pdb_id,,}_final.pdb"
-
-            echo "[run_alphaflow.sh] Alignment with MDTRAJ completed. Now aligning with PHASER..."
-            bash ./scripts/helpers/align_with_phaser.sh "${pdb_id,,}" alphaflow
-            echo "[run_alphaflow.sh] Final, aligned PDB file: $PDB_DIR/${pdb_id,,}_alphaflow.pdb"
-
-        fi
-    done
-    
+    if [ $WATCH_STATUS -ne 0 ]; then
+        echo "[run_alphaflow.sh] Some targets failed post-processing, see the log above"
+    fi
     echo "[run_alphaflow.sh] All AlphaFlow PDB files have been moved."
 else
     echo "[run_alphaflow.sh] AlphaFlow prediction failed with status code $RUN_STATUS"
     exit $RUN_STATUS
 fi
-
@@ -1,21 +1,20 @@
 #!/bin/bash
-# run_bioemu.sh <pdb_id> <sequence_count>
+# run_bioemu.sh <pdb_id> <sequence_count> [seed]
+# MSAs/embeddings persist in ./bin/bioemu_embeds/ (keyed by sequence hash); pass a seed to reproduce a run.
 
 # LOCK ISSUE FIX: export BIOEMU_COLABFOLD_DIR="/matterhorn/hd1/ahmed/bioemu-colabfold"
 
 set -e
-if [ "$#" -ne 2 ]; then
-    echo "[run_bioemu.sh] A pdb id AND sequence count is required."
+if [ "$#" -lt 2 ] || [ "$#" -gt 3 ]; then
+    echo "[run_bioemu.sh] A pdb id AND sequence count is required (optionally a seed)."
     exit 1
 fi
-
-rm -rf ~/.bioemu_embeds_cache # clear MSA cache to avoid same output
-ls ~/.bioemu_embeds_cache && echo "[run_bioemu.sh] Cleared BioEmu MSA cache."
+SEED=$3
 
 PDB_ID=$1
 PDB_DIR="./PDBs/${PDB_ID,,}"
 SEQ_FILE="${PDB_DIR}/${PDB_ID,,}_seq.txt"
-OUTPUT_FILE="${PDB_DIR}/bioemu_bin/backbone.pdb"
+OUTPUT_FILE="${PDB_DIR}/bioemu_bin/topology.pdb"
 
 if [ ! -f "$SEQ_FILE" ]; then
     echo "Sequence file not found: $SEQ_FILE"
@@ -30,23 +29,8 @@ export PYTHONPATH=$(pwd):$PYTHONPATH
 mkdir -p "$PDB_DIR/bioemu_bin"
 rm -rf "$PDB_DIR/bioemu_bin/*"
 
-XTC_FILE="${PDB_DIR}/bioemu_bin/bioemu.xtc"
-
 echo "[run_bioemu.sh] Running BioEmu for $PDB_ID with $2 sequences."
-python ./models/bioemu/inference.py "$PDB_ID" "$OUTPUT_FILE" "$SEQUENCE" $2
-echo "[run_bioemu.sh] Saved backbone of $PDB_ID to $OUTPUT_FILE"
-
-python -m bioemu.sidechain_relax --pdb-path $OUTPUT_FILE --xtc-path $XTC_FILE --outpath "$PDB_DIR/bioemu_bin"
-echo "[run_bioemu.sh] Saved sidechains of $PDB_ID to $PDB_DIR/bioemu_bin"
-
-ENSEMBLE_OUTPUT="${PDB_DIR}/bioemu_bin/${PDB_ID,,}_ensemble.pdb"
-
-python ./scripts/helpers/dcd_to_pdb.py "$PDB_DIR/bioemu_bin/samples_sidechain_rec.xtc" "$PDB_DIR/bioemu_bin/samples_sidechain_rec.pdb" "$ENSEMBLE_OUTPUT"
-echo "[run_bioemu.sh] Saved predicted ensemble of $PDB_ID to $ENSEMBLE_OUTPUT"
-
-python ./scripts/helpers/align_with_mdtraj.py "$ENSEMBLE_OUTPUT" "$PDB_DIR/${PDB_ID,,}_final.pdb"
-echo "[run_bioemu.sh] Aligned $ENSEMBLE_OUTPUT to original with MDTRAJ. Aligning with PHASER now"
-
-bash ./scripts/helpers/align_with_phaser.sh "${PDB_ID,,}" bioemu
-echo "[run_bioemu.sh] Aligned $ENSEMBLE_OUTPUT to original with PHASER. Done."
+python ./models/bioemu/inference.py "$PDB_ID" "$OUTPUT_FILE" "$SEQUENCE" $2 $SEED
+echo "[run_bioemu.sh] Saved samples of $PDB_ID to ${PDB_DIR}/bioemu_bin"
 
+bash ./scripts/models/postprocess_bioemu.sh "$PDB_ID"
@@ -0,0 +1,22 @@
+#!/bin/bash
+# run_bioemu_batch.sh <split_name> <sequence_count> [--seed N] [--backend bioemu|stub] [--post-workers N]
+# Samples every PDB of the split in one BioEmu process (weights loaded once); post-processing
+# (sidechains, ensemble PDB, alignment) of each target overlaps with sampling of the next.
+
+set -e
+if [ "$#" -lt 2 ]; then
+    echo "[run_bioemu_batch.sh] A split name AND sequence count is required."
+    exit 1
+fi
+
+SPLIT_NAME=$1
+if [ ! -f "./splits/${SPLIT_NAME}.txt" ]; then
+    echo "[run_bioemu_batch.sh] Split file not found: ./splits/${SPLIT_NAME}.txt"
+    exit 1
+fi
+
+export PYTHONPATH=$(pwd):$PYTHONPATH
+
+echo "[run_bioemu_batch.sh] Running BioEmu for $SPLIT_NAME with $2 sequences per target."
+python ./models/bioemu/batch_inference.py "$@"
+echo "[run_bioemu_batch.sh] Done."
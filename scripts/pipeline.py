@@ -0,0 +1,437 @@
+# pipeline.py <split_name> [--stages s1 s2 ...] [--predictors p1 p2 ...] [--samples N] [--jobs N] [--hash] [--dry-run]
+# Make-style runner for the benchmark. Every stage declares its inputs and outputs under ./PDBs/<id>/,
+# targets are (PDB, predictor, stage), and only out-of-date targets run (in parallel, dependencies first).
+# A target is out of date when an output is missing, an input is newer than its oldest output
+# (or, with --hash, an input's content changed since the last successful run). Staleness is checked once a
+# target's upstream has finished, so a PDB added to a split only rebuilds that PDB's targets.
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..")))
+from scripts.helpers import status_index
+
+PREDICTORS = ['bioemu', 'alphaflow', 'sam2', 'boltz2', 'openfold']
+HASH_STATE_PATH = "./bin/pipeline/hashes.json"
+LOG_ROOT = "./bin/logs/pipeline"
+
+
+@dataclass
+class Stage:
+    name: str
+    scope: str                  # "pdb": one target per PDB, "predictor": per (PDB, predictor), "split": one per split
+    command: list
+    outputs: list
+    inputs: list = field(default_factory=list)            # required, must exist when the target runs
+    optional_inputs: list = field(default_factory=list)   # used if present (e.g. one file per predictor)
+    predictors: list = None     # predictor stages: which predictors this stage builds
+    max_parallel: int = 0       # 0 = no limit beyond --jobs
+    keeps_unchanged: bool = False   # outputs whose content doesn't change keep their mtime
+
+
+@dataclass
+class Target:
+    stage: Stage
+    pdb_ids: list
+    predictor: str = ""
+    inputs: list = field(default_factory=list)
+    optional_inputs: list = field(default_factory=list)
+    outputs: list = field(default_factory=list)
+    command: list = field(default_factory=list)
+    upstream: set = field(default_factory=set)
+    dirty: bool = False
+    reason: str = ""
+
+    @property
+    def key(self):
+        pdb_part = self.pdb_ids[0] if len(self.pdb_ids) == 1 else "split"
+        return f"{self.stage.name}:{pdb_part}:{self.predictor}"
+
+
+PDB = "./PDBs/{pdb}"
+
+STAGES = [
+    Stage("prepare", "split",
+          command=["bash", "./scripts/prepare_split.sh", "./splits/{split}.txt"],
+          outputs=[PDB + "/{pdb}_final.pdb", PDB + "/{pdb}_final.mtz", PDB + "/{pdb}_seq.txt", PDB + "/{pdb}_nowat.pdb",
+                   PDB + "/{pdb}_nowat_static.pdb"],
+          keeps_unchanged=True),
+
+    Stage("ensemble", "predictor",
+          command=["bash", "./scripts/models/run_{predictor}.sh", "{pdb}", "{samples}"],
+          inputs=[PDB + "/{pdb}_seq.txt", PDB + "/{pdb}_final.pdb", PDB + "/{pdb}_final.mtz"],
+          outputs=[PDB + "/{pdb}_{predictor}.pdb"],
+          predictors=['bioemu', 'sam2', 'boltz2'], max_parallel=1),
+
+    # AlphaFlow and OpenFold predict a whole split per call
+    Stage("ensemble_split", "split",
+          command=["bash", "./scripts/models/run_{predictor}.sh", "{split}", "{samples}"],
+          inputs=[PDB + "/{pdb}_seq.txt", PDB + "/{pdb}_final.pdb", PDB + "/{pdb}_final.mtz"],
+          outputs=[PDB + "/{pdb}_{predictor}.pdb"],
+          predictors=['alphaflow', 'openfold'], max_parallel=1),
+
+    Stage("rfree", "pdb",
+          command=["python", "./scripts/analysis/get_rfrees.py", "{pdb}"],
+          inputs=[PDB + "/{pdb}_final.pdb", PDB + "/{pdb}_final.mtz"],
+          optional_inputs=[PDB + "/{pdb}_{predictor}.pdb"],
+          outputs=[PDB + "/analysis/rfrees.csv"]),
+
+    Stage("rmsf", "pdb",
+          command=["python", "./scripts/analysis/get_rmsf.py", "{pdb}"],
+          optional_inputs=[PDB + "/{pdb}_{predictor}.pdb"],
+          outputs=[PDB + "/analysis/rmsf.csv"]),
+
+    Stage("rmsf_baseline", "pdb",
+          command=["python", "./scripts/analysis/get_rmsf_baseline.py", "{pdb}"],
+          inputs=[PDB + "/{pdb}_final.pdb"],
+          outputs=[PDB + "/analysis/{pdb}_qfit_RMSF.csv"]),
+
+    Stage("density_fitness", "pdb",
+          command=["python", "./scripts/analysis/get_density_fitness.py", "{pdb}"],
+          inputs=[PDB + "/{pdb}_final.pdb", PDB + "/{pdb}_final.mtz"],
+          optional_inputs=[PDB + "/{pdb}_{predictor}.pdb"],
+          outputs=[PDB + "/analysis/density_fitness.json"]),
+
+    Stage("secondary_structure", "pdb",
+          command=["python", "./scripts/analysis/get_secondary_structure.py", "{pdb}"],
+          inputs=[PDB + "/{pdb}_final.pdb"],
+          outputs=[PDB + "/analysis/secondary_structure.csv"]),
+
+    Stage("secondary_structure_frames", "pdb",
+          command=["python", "./scripts/analysis/get_secondary_structure.py", "{pdb}", "--ensembles"],
+          optional_inputs=[PDB + "/{pdb}_{predictor}.pdb"],
+          outputs=[PDB + "/analysis/secondary_structure_frames.csv", PDB + "/analysis/secondary_structure_propensity.csv"]),
+
+    Stage("rotamers", "pdb",
+          command=["python", "./scripts/analysis/get_rotamers.py", "{pdb}"],
+          inputs=[PDB + "/{pdb}_final.pdb"],
+          optional_inputs=[PDB + "/{pdb}_{predictor}.pdb"],
+          outputs=[PDB + "/analysis/rotamers.csv", PDB + "/analysis/rotamers_deposited.csv",
+                   PDB + "/analysis/rotamer_comparison.csv"]),
+
+    Stage("rmsr_galign", "pdb",
+          command=["python", "./scripts/analysis/get_rmsr_galign.py", "{pdb}"],
+          inputs=[PDB + "/{pdb}_final.pdb"],
+          optional_inputs=[PDB + "/{pdb}_{predictor}.pdb"],
+          outputs=[PDB + "/analysis/rmsr_galign.csv"]),
+
+    Stage("rmsr_mr", "pdb",
+          command=["python", "./scripts/analysis/get_rmsr_mr.py", "{pdb}"],
+          inputs=[PDB + "/{pdb}_final.pdb"],
+          optional_inputs=[PDB + "/{pdb}_{predictor}.pdb"],
+          outputs=[PDB + "/analysis/rmsr_mr.csv"]),
+
+    Stage("cosine_similarity", "pdb",
+          command=["python", "./scripts/analysis/get_rmsf_cosine_similarity.py", "{pdb}"],
+          inputs=[PDB + "/analysis/rmsf.csv", PDB + "/analysis/{pdb}_qfit_RMSF.csv"],
+          outputs=[PDB + "/analysis/cosine_similarity.csv"]),
+
+    # class baseline RMSF from the deposited structures of each class in ./bin/protein_classes/include.txt
+    Stage("class_rmsf", "split",
+          command=["python", "./scripts/analysis/get_pseudoensemble_rmsf.py"],
+          inputs=["./bin/protein_classes/include.txt"],
+          optional_inputs=[PDB + "/{pdb}_final.pdb"],
+          outputs=["./bin/protein_classes/rmsfs.csv", "./bin/protein_classes/include.csv"]),
+
+    # consolidates every per-PDB analysis file of the split into ./bin/warehouse/ (needs pyarrow)
+    Stage("warehouse", "split",
+          command=["python", "./scripts/helpers/warehouse.py", "build", "{split}"],
+          optional_inputs=[PDB + "/analysis/rmsf.csv", PDB + "/analysis/rmsr_galign.csv",
+                           PDB + "/analysis/density_fitness.json", PDB + "/analysis/rfrees.csv",
+                           PDB + "/analysis/secondary_structure.csv", PDB + "/analysis/cosine_similarity.csv",
+                           PDB + "/analysis/{pdb}_qfit_RMSF.csv"],
+          outputs=["./bin/warehouse/{split}.json"]),
+]
+
+
+def fill(template, pdb="", predictor="", split="", samples=""):
+    return template.format(pdb=pdb, predictor=predictor, split=split, samples=samples)
+
+
+def build_targets(stages, pdb_ids, predictors, split, samples):
+    targets = []
+    for stage in stages:
+        if stage.scope == "split":
+            stage_predictors = [p for p in (stage.predictors or [""]) if not p or p in predictors]
+            for predictor in stage_predictors:
+                target = Target(stage, list(pdb_ids), predictor)
+                for pdb_id in pdb_ids:
+                    target.inputs += [fill(t, pdb_id, predictor, split) for t in stage.inputs]
+                    target.optional_inputs += [fill(t, pdb_id, predictor, split) for t in stage.optional_inputs]
+                    # split-wide outputs (no {pdb}) are listed once
+                    target.outputs += [path for path in (fill(t, pdb_id, predictor, split) for t in stage.outputs)
+                                       if path not in target.outputs]
+                target.command = [fill(t, "", predictor, split, samples) for t in stage.command]
+                targets.append(target)
+
+        elif stage.scope == "predictor":
+            for pdb_id in pdb_ids:
+                for predictor in [p for p in stage.predictors if p in predictors]:
+                    target = Target(stage, [pdb_id], predictor)
+                    target.inputs = [fill(t, pdb_id, predictor, split) for t in stage.inputs]
+                    target.outputs = [fill(t, pdb_id, predictor, split) for t in stage.outputs]
+                    target.command = [fill(t, pdb_id, predictor, split, samples) for t in stage.command]
+                    targets.append(target)
+
+        else:
+            for pdb_id in pdb_ids:
+                target = Target(stage, [pdb_id])
+                target.inputs = [fill(t, pdb_id, "", split) for t in stage.inputs]
+                for template in stage.optional_inputs:
+                    if "{predictor}" in template:
+                        target.optional_inputs += [fill(template, pdb_id, p, split) for p in predictors]
+                    else:
+                        target.optional_inputs.append(fill(template, pdb_id, "", split))
+                target.outputs = [fill(t, pdb_id, "", split) for t in stage.outputs]
+                target.command = [fill(t, pdb_id, "", split, samples) for t in stage.command]
+                targets.append(target)
+
+    # a target depends on whichever targets produce its inputs
+    producers = {}
+    for target in targets:
+        for output in target.outputs:
+            producers[os.path.normpath(output)] = target
+
+    for target in targets:
+        for path in target.inputs + target.optional_inputs:
+            producer = producers.get(os.path.normpath(path))
+            if producer is not None and producer is not target:
+                target.upstream.add(producer.key)
+
+    return targets
+
+
+_hash_cache = {}
+
+def file_hash(path):
+    stat = os.stat(path)
+    cache_key = (path, stat.st_size, stat.st_mtime_ns)
+    if cache_key not in _hash_cache:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        _hash_cache[cache_key] = digest.hexdigest()
+    return _hash_cache[cache_key]
+
+
+def input_hashes(target):
+    return {path: file_hash(path) for path in target.inputs + target.optional_inputs if os.path.exists(path)}
+
+
+def staleness(target, use_hash, hash_state):
+    # returns why the target needs to run, or "" when it is up to date
+    missing = [path for path in target.outputs if not os.path.exists(path)]
+    if missing:
+        return f"missing {missing[0]}" + (f" (+{len(missing) - 1})" if len(missing) > 1 else "")
+
+    # targets never run with --hash before fall back to mtimes
+    if use_hash and target.key in hash_state:
+        if hash_state[target.key] != input_hashes(target):
+            return "input content changed"
+        return ""
+
+    existing_inputs = [path for path in target.inputs + target.optional_inputs if os.path.exists(path)]
+    if existing_inputs:
+        oldest_output = min(os.path.getmtime(path) for path in target.outputs)
+        newer = [path for path in existing_inputs if os.path.getmtime(path) > oldest_output]
+        if newer:
+            return f"{newer[0]} is newer"
+    return ""
+
+
+def predict_dirty(targets, use_hash, hash_state):
+    # dry run: a target is out of date if it is stale now or reads a file an earlier target will (re)write
+    will_write = set()
+    for target in targets:
+        target.reason = staleness(target, use_hash, hash_state)
+        if not target.reason:
+            rewritten = [path for path in target.inputs + target.optional_inputs if os.path.normpath(path) in will_write]
+            if rewritten:
+                target.reason = f"{rewritten[0]} will be rebuilt"
+        target.dirty = bool(target.reason)
+        if not target.dirty:
+            continue
+
+        if target.stage.keeps_unchanged:
+            # revalidated downloads and identical preprocess outputs keep their mtime,
+            # so only the missing outputs are sure to change
+            written = [path for path in target.outputs if not os.path.exists(path)] or target.outputs
+        else:
+            written = target.outputs
+        will_write.update(os.path.normpath(path) for path in written)
+
+
+def run_target(target):
+    log_path = f"{LOG_ROOT}/{target.stage.name}/{target.key.replace(':', '_')}.log"
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+
+    start_ms_timestamp = int(time.time() * 1000)
+    with open(log_path, "w") as log:
+        result = subprocess.run(target.command, stdout=log, stderr=subprocess.STDOUT)
+    elapsed_time_ms = int(time.time() * 1000) - start_ms_timestamp
+
+    if result.returncode != 0:
+        return target, False, elapsed_time_ms, f"exit code {result.returncode}, see {log_path}"
+    missing = [path for path in target.outputs if not os.path.exists(path)]
+    if missing:
+        return target, False, elapsed_time_ms, f"finished without writing {missing[0]}, see {log_path}"
+    return target, True, elapsed_time_ms, log_path
+
+
+def record_status(target, success, elapsed_time_ms):
+    stage = "ensemble" if target.stage.name.startswith("ensemble") else target.stage.name
+    if stage not in status_index.ARTIFACTS:
+        return
+
+    predictors = [target.predictor] if target.predictor else None
+    # split-wide targets share one wall time across their PDBs
+    wall_ms = elapsed_time_ms // len(target.pdb_ids)
+    connection = status_index.connect()
+    for pdb_id in target.pdb_ids:
+        status_index.refresh_pdb(pdb_id, [stage], predictors, wall_ms=wall_ms, failed=not success, connection=connection)
+    connection.close()
+
+
+def run_pipeline(targets, jobs, use_hash, hash_state):
+    # Staleness is decided when a target's upstream has finished, so it sees what upstream actually rewrote.
+    pending = list(targets)
+    finished = set()
+    running = {}
+    running_per_stage = {}
+    counts = {'succeeded': 0, 'failed': 0, 'skipped': 0, 'up_to_date': 0}
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        while pending or running:
+            progressed = False
+            for target in list(pending):
+                if len(running) >= jobs:
+                    break
+                if any(key not in finished for key in target.upstream):
+                    continue
+
+                target.reason = staleness(target, use_hash, hash_state)
+                if not target.reason:
+                    if use_hash and target.key not in hash_state:
+                        hash_state[target.key] = input_hashes(target)
+                    pending.remove(target)
+                    finished.add(target.key)
+                    counts['up_to_date'] += 1
+                    progressed = True
+                    continue
+
+                missing = [path for path in target.inputs if not os.path.exists(path)]
+                if missing:
+                    pending.remove(target)
+                    finished.add(target.key)
+                    counts['skipped'] += 1
+                    progressed = True
+                    print(f"[pipeline.py] Skipping {target.key}: required input {missing[0]} does not exist")
+                    continue
+
+                stage_limit = target.stage.max_parallel
+                if stage_limit and running_per_stage.get(target.stage.name, 0) >= stage_limit:
+                    continue
+
+                pending.remove(target)
+                running_per_stage[target.stage.name] = running_per_stage.get(target.stage.name, 0) + 1
+                print(f"[pipeline.py] Running {target.key} ({target.reason})")
+                running[executor.submit(run_target, target)] = target
+
+            if not running:
+                if progressed:
+                    continue
+                # nothing runnable left; everything pending waits on something that cannot finish
+                for target in pending:
+                    counts['skipped'] += 1
+                    print(f"[pipeline.py] Skipping {target.key}: upstream did not finish")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                target, success, elapsed_time_ms, message = future.result()
+                del running[future]
+                running_per_stage[target.stage.name] -= 1
+                # downstream targets still run on whatever their upstream managed to produce
+                finished.add(target.key)
+
+                if success:
+                    counts['succeeded'] += 1
+                    print(f"[pipeline.py] Finished {target.key} in {elapsed_time_ms / 1000:.1f}s")
+                    if use_hash:
+                        hash_state[target.key] = input_hashes(target)
+                else:
+                    counts['failed'] += 1
+                    print(f"[pipeline.py] Failed {target.key}: {message}")
+
+                record_status(target, success, elapsed_time_ms)
+
+                os.makedirs("./bin/timings", exist_ok=True)
+                with open("./bin/timings/pipeline.csv", "a") as f:
+                    f.write(f"{target.key},{int(success)},{elapsed_time_ms}\n")
+
+    return counts
+
+
+def load_hash_state():
+    if not os.path.exists(HASH_STATE_PATH):
+        return {}
+    with open(HASH_STATE_PATH) as f:
+        return json.load(f)
+
+
+def save_hash_state(hash_state):
+    os.makedirs(os.path.dirname(HASH_STATE_PATH), exist_ok=True)
+    with open(HASH_STATE_PATH + ".tmp", "w") as f:
+        json.dump(hash_state, f)
+    os.replace(HASH_STATE_PATH + ".tmp", HASH_STATE_PATH)
+
+
+if __name__ == "__main__":
+    stage_names = [stage.name for stage in STAGES]
+
+    parser = argparse.ArgumentParser(description="Run only the out-of-date parts of the benchmark for a split")
+    parser.add_argument("split_name", help="Split name (./splits/<split_name>.txt)")
+    parser.add_argument("--stages", nargs="+", choices=stage_names, default=stage_names, help="Stages to consider")
+    parser.add_argument("--predictors", nargs="+", choices=PREDICTORS, default=PREDICTORS, help="Predictors to consider")
+    parser.add_argument("--samples", type=int, default=100, help="Samples per ensemble for prediction stages")
+    parser.add_argument("--jobs", "-j", type=int, default=4, help="Targets to run at once")
+    parser.add_argument("--hash", action="store_true", help="Compare input content hashes instead of mtimes")
+    parser.add_argument("--dry-run", action="store_true", help="Only list out-of-date targets")
+    args = parser.parse_args()
+
+    split_path = f"./splits/{args.split_name}.txt"
+    if not os.path.exists(split_path):
+        print(f"[pipeline.py] Error: Split file {split_path} does not exist.")
+        sys.exit(1)
+
+    with open(split_path) as f:
+        pdb_ids = [line.strip().lower() for line in f if line.strip()]
+
+    stages = [stage for stage in STAGES if stage.name in args.stages]
+    targets = build_targets(stages, pdb_ids, args.predictors, args.split_name, args.samples)
+
+    hash_state = load_hash_state() if args.hash else {}
+
+    if args.dry_run:
+        predict_dirty(targets, args.hash, hash_state)
+        dirty = [target for target in targets if target.dirty]
+        print(f"[pipeline.py] {len(dirty)} of {len(targets)} targets are out of date")
+        for target in dirty:
+            print(f"{target.key},{target.reason}")
+        sys.exit(0)
+
+    counts = run_pipeline(targets, args.jobs, args.hash, hash_state)
+    if args.hash:
+        save_hash_state(hash_state)
+
+    print(f"[pipeline.py] Done, {counts['succeeded']} succeeded, {counts['failed']} failed, "
+          f"{counts['skipped']} skipped, {counts['up_to_date']} already up to date")
+    sys.exit(1 if counts['failed'] else 0)
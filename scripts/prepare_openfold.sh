@@ -64,6 +64,11 @@ done
 # OpenFold Alignment Generation
 echo "[prepare_openfold.sh] Generating alignments with openfold..."
 
+# index template hits as each target's hhsearch result lands
+python ./scripts/helpers/template_hits.py index "$SPLIT_NAME" --watch 60 &
+INDEX_WATCH_PID=$!
+trap 'kill $INDEX_WATCH_PID 2>/dev/null' EXIT
+
 cd $OPENFOLD_PATH || exit 1
 
 RELRESOURCES="/home/aslamaj/databases"
@@ -80,4 +85,7 @@ python ./openfold/scripts/precompute_alignments.py \
 
 cd - 
 
+kill $INDEX_WATCH_PID 2>/dev/null || true
+python ./scripts/helpers/template_hits.py index "$SPLIT_NAME"
+
 echo "[prepare_openfold.sh] Alignment generation completed for $SPLIT_NAME at $BIN_ROOT/alignments"
\ No newline at end of file
@@ -1,6 +1,6 @@
 
 if [ $# -eq 0 ]; then
-  echo "Usage: $0 <path_to_split_file>"
+  echo "Usage: $0 <path_to_split_file> [--jobs N] [--per-host N] [--no-cache] [--workers N]"
   exit 1
 fi
 
@@ -23,7 +23,7 @@ contents=$(cat "$SPLIT_FILE")
 normalized_contents=$(echo "$contents" | tr '[:upper:]' '[:lower:]')
 echo "$normalized_contents" > "$SPLIT_FILE"
 
-python ./scripts/helpers/prepare_split.py "$1"
+python ./scripts/helpers/prepare_split.py "$1" "${@:2}"
 
 
 
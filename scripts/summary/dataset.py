@@ -1,4 +1,6 @@
-# python dataset.py <dataset> [--predictor <predictor>] [--output_csv <output_file>]
+# python dataset.py <dataset> [--predictor <predictor>] [--output_csv <output_file>] [--no-cache]
+# Per-PDB stats rows are cached in ./bin/summary/<dataset>.json with the sha256 of the files they were
+# computed from; a re-run only recomputes PDBs whose inputs changed and re-aggregates the rest from the cache.
 
 
 import pandas as pd
@@ -7,6 +9,15 @@ import os
 import sys
 import json
 import argparse
+import hashlib
+
+import residue_stats
+
+sys.path.insert(0, os.path.realpath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from scripts.helpers import warehouse
+
+STATS_CACHE_DIR = "./bin/summary"
+STATS_CACHE_VERSION = 1   # bump when process_pdb_stats changes what it computes
 
 def load_rmsf_data(pdb_id):
     file_path = f"./PDBs/{pdb_id}/analysis/rmsf.csv"
@@ -23,90 +34,23 @@ def load_rmsf_data(pdb_id):
 
 
 def load_ediam_data(pdb_id):
-    file_path = f"./PDBs/{pdb_id}/analysis/density_fitness.csv"
+    file_path = f"./PDBs/{pdb_id}/analysis/density_fitness.json"
     
     if not os.path.exists(file_path):
         print(f"[dataset.py] Density fitness file not found: {file_path}")
         return pd.DataFrame()
     
     try:
-        lines = []
-        with open(file_path, 'r') as f:
-            for line in f:
-                if not line.startswith('#'):
-                    lines.append({
-                        'predictor': line.split(',')[0].strip(),
-                        'frame': line.split(',')[1].strip(),
-                        'metrics': (','.join(line.split(',')[2:]).strip())[1:-1]  # Remove surrounding quotes cuz JSON parsing
-                    })
-        
-        df = pd.DataFrame(lines)
-        all_data = []
-        
-        if 'metrics' in df.columns:
-            for _, row in df.iterrows():
-                predictor = row['predictor']
-                frame = row['frame']
-                if (_ == 0):
-                    continue 
-
-                try:
-                    metrics = json.loads(row['metrics'])
-                    
-                    for residue_data in metrics:
-                        if 'EDIAm' in residue_data and 'seqID' in residue_data:
-                            all_data.append({
-                                'predictor': predictor,
-                                'frame': frame,
-                                'residue': (residue_data['pdb']['seqNum'] - 1) if predictor == 'alphaflow' else residue_data['pdb']['seqNum'], # alphaflow starts residue number at 1 
-                                'EDIAm': residue_data['EDIAm'],
-                                'RSCCS': residue_data['RSCCS'],
-                                'RSR': residue_data['RSR'],
-                                'SRSR': residue_data['SRSR'],
-                                'aa': residue_data.get('compID', '')
-                            })
-                except Exception as e:
-                    print(f"[dataset.py] Error parsing metrics: {e}")
-            
-            ediam_df = pd.DataFrame(all_data)
-            
-            
-            stats_ediam = ediam_df.groupby(['predictor', 'residue', 'aa'])['EDIAm'].agg([
-                'mean', 'std', 'min', 'max',
-                lambda x: x.quantile(0.25),  # Q1
-                lambda x: x.quantile(0.75)   # Q3
-            ]).reset_index()
-            stats_ediam.columns = ['predictor', 'residue', 'aa', 'EDIAm_mean', 'EDIAm_std', 'EDIAm_min', 'EDIAm_max', 'EDIAm_q1', 'EDIAm_q3']
-            stats_ediam['EDIAm_iqr'] = stats_ediam['EDIAm_q3'] - stats_ediam['EDIAm_q1']
-            
-            stats_rsccs = ediam_df.groupby(['predictor', 'residue', 'aa'])['RSCCS'].agg([
-                'mean', 'std', 'min', 'max',
-                lambda x: x.quantile(0.25),  # Q1
-                lambda x: x.quantile(0.75)   # Q3
-            ]).reset_index()
-            stats_rsccs.columns = ['predictor', 'residue', 'aa', 'RSCCS_mean', 'RSCCS_std', 'RSCCS_min', 'RSCCS_max', 'RSCCS_q1', 'RSCCS_q3']
-            stats_rsccs['RSCCS_iqr'] = stats_rsccs['RSCCS_q3'] - stats_rsccs['RSCCS_q1']
-            
-            stats_rsr = ediam_df.groupby(['predictor', 'residue', 'aa'])['RSR'].agg([
-                'mean', 'std', 'min', 'max',
-                lambda x: x.quantile(0.25),  # Q1
-                lambda x: x.quantile(0.75)   # Q3
-            ]).reset_index()
-            stats_rsr.columns = ['predictor', 'residue', 'aa', 'RSR_mean', 'RSR_std', 'RSR_min', 'RSR_max', 'RSR_q1', 'RSR_q3']
-            stats_rsr['RSR_iqr'] = stats_rsr['RSR_q3'] - stats_rsr['RSR_q1']
-            
-            ediam_df = pd.merge(stats_ediam, stats_rsccs, on=['predictor', 'residue', 'aa'], how='outer')
-            ediam_df = pd.merge(ediam_df, stats_rsr, on=['predictor', 'residue', 'aa'], how='outer')
-
-            ediam_df = ediam_df[[
-                'predictor', 'residue', 'aa', 
-                'EDIAm_mean', 'EDIAm_std', 'EDIAm_iqr', 'EDIAm_min', 'EDIAm_max',
-                'RSCCS_mean', 'RSCCS_std', 'RSCCS_iqr', 'RSCCS_min', 'RSCCS_max',
-                'RSR_mean', 'RSR_std', 'RSR_iqr', 'RSR_min', 'RSR_max'
-            ]]
+        # same per-residue stats as the warehouse's density table
+        ediam_df = warehouse.load_density(file_path)
+        if ediam_df.empty:
             return ediam_df
-        
-        return pd.DataFrame()
+        return ediam_df[[
+            'predictor', 'residue', 'aa', 
+            'EDIAm_mean', 'EDIAm_std', 'EDIAm_iqr', 'EDIAm_min', 'EDIAm_max',
+            'RSCCS_mean', 'RSCCS_std', 'RSCCS_iqr', 'RSCCS_min', 'RSCCS_max',
+            'RSR_mean', 'RSR_std', 'RSR_iqr', 'RSR_min', 'RSR_max'
+        ]]
         
     except Exception as e:
         print(f"[dataset.py] Error loading density fitness data: {e}")
@@ -133,8 +77,9 @@ def load_rfree(pdb_id):
         print(f"[dataset.py] R-free file not found: {file_path}")
         return None
     
-    rfree_df = pd.read_csv(file_path)
-    
+    return rfree_values(pd.read_csv(file_path))
+
+def rfree_values(rfree_df):
     sam2_df = rfree_df[rfree_df['predictor'] == 'sam2'].reset_index(drop=True)
     alphaflow_df = rfree_df[rfree_df['predictor'] == 'alphaflow'].reset_index(drop=True)
     bioemu_df = rfree_df[rfree_df['predictor'] == 'bioemu'].reset_index(drop=True)
@@ -160,11 +105,18 @@ def load_pdb_list(split_name):
         print(f"[dataset.py] Error reading split file: {e}")
         return []
 
-def process_pdb_stats(pdb_id):
-    rmsf_data = load_rmsf_data(pdb_id)
-    ediam_data = load_ediam_data(pdb_id)
-    ss_data = load_secondary_structure(pdb_id)
-    r_frees = load_rfree(pdb_id)
+def process_pdb_stats(pdb_id, data=None):
+    if data is None:
+        rmsf_data = load_rmsf_data(pdb_id)
+        ediam_data = load_ediam_data(pdb_id)
+        ss_data = load_secondary_structure(pdb_id)
+        r_frees = load_rfree(pdb_id)
+    else:
+        # tables already read from the warehouse, same columns as the per-PDB files
+        rmsf_data = data.get('rmsf', pd.DataFrame())
+        ediam_data = data.get('density', pd.DataFrame())
+        ss_data = data.get('secondary_structure', pd.DataFrame())
+        r_frees = rfree_values(data['rfree']) if 'rfree' in data else None
     
     if ss_data.empty or rmsf_data.empty or ediam_data.empty:
         return None
@@ -243,11 +195,57 @@ def process_pdb_stats(pdb_id):
     
     return pdb_stats
 
+def stats_input_paths(pdb_id):
+    return [f"./PDBs/{pdb_id}/analysis/rmsf.csv", f"./PDBs/{pdb_id}/analysis/density_fitness.json",
+            f"./PDBs/{pdb_id}/analysis/secondary_structure.csv", f"./PDBs/{pdb_id}/analysis/rfrees.csv"]
+
+def input_state(pdb_id, previous):
+    # path -> [size, mtime_ns, sha256] (None if missing); files whose size and mtime are unchanged are not re-hashed
+    state = {}
+    for path in stats_input_paths(pdb_id):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            state[path] = None
+            continue
+        known = previous.get(path)
+        if known and known[:2] == [stat.st_size, stat.st_mtime_ns]:
+            state[path] = known
+            continue
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        state[path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+    return state
+
+def same_inputs(state, previous):
+    return {path: value and value[2] for path, value in state.items()} == {path: value and value[2] for path, value in previous.items()}
+
+def load_stats_cache(split_name):
+    cache_path = f"{STATS_CACHE_DIR}/{split_name}.json"
+    if not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path) as f:
+            cache = json.load(f)
+    except ValueError:
+        return {}
+    return cache.get('pdbs', {}) if cache.get('version') == STATS_CACHE_VERSION else {}
+
+def save_stats_cache(split_name, pdbs):
+    os.makedirs(STATS_CACHE_DIR, exist_ok=True)
+    cache_path = f"{STATS_CACHE_DIR}/{split_name}.json"
+    with open(cache_path + ".tmp", "w") as f:
+        json.dump({'version': STATS_CACHE_VERSION, 'pdbs': pdbs}, f)
+    os.replace(cache_path + ".tmp", cache_path)
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Calculate per-PDB statistics for a dataset split.")
     parser.add_argument('split_name', type=str, help='Name of the split (e.g., train, test, validation)')
     parser.add_argument('--predictor', type=str, help='Predictor name to filter data')
     parser.add_argument('--output_csv', type=str, help='Output CSV file to save results')
+    parser.add_argument('--no-cache', action='store_true', help='Recompute every PDB instead of reusing cached rows')
 
     args = parser.parse_args()
     split_name = args.split_name
@@ -260,17 +258,47 @@ if __name__ == "__main__":
 
     print(f"Processing {len(pdb_ids)} PDBs from split: {split_name}")
 
+    cached = {} if args.no_cache else load_stats_cache(split_name)
+    states = {pdb_id: input_state(pdb_id, cached.get(pdb_id, {}).get('inputs', {})) for pdb_id in pdb_ids}
+    stale = [pdb_id for pdb_id in pdb_ids
+             if pdb_id not in cached or not same_inputs(states[pdb_id], cached[pdb_id]['inputs'])]
+    print(f"[dataset.py] {len(pdb_ids) - len(stale)} PDBs unchanged since the last run, recomputing {len(stale)}")
+
+    # one read per table instead of one CSV per PDB for the PDBs the warehouse holds up to date;
+    # PDBs whose files changed since the last warehouse build are read from their CSVs
+    tables = ['rmsf', 'density', 'secondary_structure', 'rfree']
+    from_warehouse = warehouse.fresh_pdbs(split_name, tables, stale) if stale else []
+    warehouse_data = {}
+    if from_warehouse:
+        print(f"[dataset.py] Reading {len(from_warehouse)} of {len(stale)} PDBs from the {split_name} warehouse")
+        for table in tables:
+            for pdb_id, table_df in warehouse.split_by_pdb(warehouse.read_table(table, split_name, from_warehouse), from_warehouse):
+                warehouse_data.setdefault(pdb_id, {})[table] = table_df
+    from_warehouse = set(from_warehouse)
+
     all_stats = []
+    stale = set(stale)
     
     for i, pdb_id in enumerate(pdb_ids):
-        print(f"Processing PDB {i+1}/{len(pdb_ids)}: {pdb_id}")
-        
-        pdb_stats = process_pdb_stats(pdb_id)
+        if pdb_id in stale:
+            print(f"Processing PDB {i+1}/{len(pdb_ids)}: {pdb_id}")
+            pdb_stats = process_pdb_stats(pdb_id, warehouse_data.get(pdb_id, {}) if pdb_id in from_warehouse else None)
+            cached[pdb_id] = {'inputs': states[pdb_id], 'stats': pdb_stats}
+        else:
+            pdb_stats = cached[pdb_id]['stats']
+            if cached[pdb_id]['inputs'] != states[pdb_id]:
+                # touched but identical content: keep the new mtimes so the file is not hashed again
+                cached[pdb_id]['inputs'] = states[pdb_id]
+                stale.add(pdb_id)
+
         if pdb_stats:
             all_stats.extend(pdb_stats)
         else:
             print(f"[dataset.py] Skipping {pdb_id} due to missing data")
 
+    if stale and not args.no_cache:
+        save_stats_cache(split_name, {pdb_id: cached[pdb_id] for pdb_id in pdb_ids})
+
     if not all_stats:
         print("No valid statistics found for any PDB in the split")
         sys.exit(1)
@@ -8,6 +8,8 @@ import sys
 import json
 import argparse
 
+import residue_stats
+
 def load_rmsf_data(pdb_id):
     file_path = f"./PDBs/{pdb_id}/analysis/rmsf.csv"
     
@@ -69,35 +71,9 @@ def load_ediam_data(pdb_id):
                     print(f"[pdb.py] Error parsing metrics: {e}")
             
             ediam_df = pd.DataFrame(all_data)
-            
-            # More Statistics per stat:
-            
-            stats_ediam = ediam_df.groupby(['predictor', 'residue', 'aa'])['EDIAm'].agg([
-                'mean', 'std', 'min', 'max',
-                lambda x: x.quantile(0.25),  # Q1
-                lambda x: x.quantile(0.75)   # Q3
-            ]).reset_index()
-            stats_ediam.columns = ['predictor', 'residue', 'aa', 'EDIAm_mean', 'EDIAm_std', 'EDIAm_min', 'EDIAm_max', 'EDIAm_q1', 'EDIAm_q3']
-            stats_ediam['EDIAm_iqr'] = stats_ediam['EDIAm_q3'] - stats_ediam['EDIAm_q1']
-            
-            stats_rsccs = ediam_df.groupby(['predictor', 'residue', 'aa'])['RSCCS'].agg([
-                'mean', 'std', 'min', 'max',
-                lambda x: x.quantile(0.25),  # Q1
-                lambda x: x.quantile(0.75)   # Q3
-            ]).reset_index()
-            stats_rsccs.columns = ['predictor', 'residue', 'aa', 'RSCCS_mean', 'RSCCS_std', 'RSCCS_min', 'RSCCS_max', 'RSCCS_q1', 'RSCCS_q3']
-            stats_rsccs['RSCCS_iqr'] = stats_rsccs['RSCCS_q3'] - stats_rsccs['RSCCS_q1']
-            
-            stats_rsr = ediam_df.groupby(['predictor', 'residue', 'aa'])['RSR'].agg([
-                'mean', 'std', 'min', 'max',
-                lambda x: x.quantile(0.25),  # Q1
-                lambda x: x.quantile(0.75)   # Q3
-            ]).reset_index()
-            stats_rsr.columns = ['predictor', 'residue', 'aa', 'RSR_mean', 'RSR_std', 'RSR_min', 'RSR_max', 'RSR_q1', 'RSR_q3']
-            stats_rsr['RSR_iqr'] = stats_rsr['RSR_q3'] - stats_rsr['RSR_q1']
-            
-            ediam_df = pd.merge(stats_ediam, stats_rsccs, on=['predictor', 'residue', 'aa'], how='outer')
-            ediam_df = pd.merge(ediam_df, stats_rsr, on=['predictor', 'residue', 'aa'], how='outer')
+
+            # mean/std/min/max/Q1/Q3/IQR of all three metrics in one sorted pass
+            ediam_df = residue_stats.group_stats(ediam_df, ['predictor', 'residue', 'aa'], ['EDIAm', 'RSCCS', 'RSR'])
 
             ediam_df = ediam_df[[
                 'predictor', 'residue', 'aa', 
@@ -0,0 +1,68 @@
+# residue_stats.py
+# Per-group summary statistics (mean, std, min, max, Q1, Q3, IQR) for several metric columns at once.
+# Rows are sorted once by group and then by value inside each group, so every statistic is a slice or
+# a reduceat over contiguous runs instead of a Python-level lambda per group.
+# Matches pandas: NaNs are skipped, std uses ddof=1 and quantiles interpolate linearly.
+
+import numpy as np
+import pandas as pd
+
+STATS = ['mean', 'std', 'min', 'max', 'q1', 'q3', 'iqr']
+
+
+def group_stats(df, keys, metrics):
+    # one row per unique `keys` combination (sorted like groupby), columns <metric>_<stat> for every metric
+    columns = list(keys) + [f"{metric}_{stat}" for metric in metrics for stat in STATS]
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+
+    codes, groups = pd.factorize(pd.MultiIndex.from_frame(df[list(keys)]), sort=True)
+    n_groups = len(groups)
+    values = df[list(metrics)].to_numpy(dtype=np.float64)
+
+    # group layout: rows of group g live in [starts[g], starts[g] + sizes[g])
+    sizes = np.bincount(codes, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+
+    result = pd.DataFrame(list(groups), columns=list(keys))
+    for column, metric in enumerate(metrics):
+        # sort by (group, value); NaNs sort to the end of their group
+        order = np.lexsort((values[:, column], codes))
+        sorted_values = values[order, column]
+        valid = ~np.isnan(sorted_values)
+        counts = np.bincount(codes[order], weights=valid, minlength=n_groups).astype(np.int64)
+        filled = np.where(valid, sorted_values, 0.0)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.add.reduceat(filled, starts) / counts
+            deviations = np.where(valid, sorted_values - np.repeat(mean, sizes), 0.0)
+            std = np.sqrt(np.add.reduceat(deviations * deviations, starts) / (counts - 1))
+        mean[counts == 0] = np.nan
+        std[counts < 2] = np.nan
+
+        last = starts + np.maximum(counts - 1, 0)
+        empty = counts == 0
+
+        def quantile(q):
+            position = starts + q * (counts - 1).clip(min=0)
+            lower = np.floor(position).astype(np.int64)
+            upper = np.minimum(lower + 1, last)
+            fraction = position - lower
+            out = sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+            out[empty] = np.nan
+            return out
+
+        minimum = np.where(empty, np.nan, sorted_values[starts])
+        maximum = np.where(empty, np.nan, sorted_values[last])
+        q1 = quantile(0.25)
+        q3 = quantile(0.75)
+
+        result[f"{metric}_mean"] = mean
+        result[f"{metric}_std"] = std
+        result[f"{metric}_min"] = minimum
+        result[f"{metric}_max"] = maximum
+        result[f"{metric}_q1"] = q1
+        result[f"{metric}_q3"] = q3
+        result[f"{metric}_iqr"] = q3 - q1
+
+    return result[columns]
@@ -4,7 +4,7 @@ import sys
 from dataclasses import dataclass
 from typing import Dict, Tuple, Optional
 from collections import defaultdict, Counter
-import re
+import pandas as pd
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 import numpy as np
@@ -23,87 +23,23 @@ class RotamerData:
         return f"RotamerData(chi1={self.chi1}, chi2={self.chi2}, chi3={self.chi3}, chi4={self.chi4}, evaluation='{self.evaluation}', rotamer='{self.rotamer}')"
 
 
-def parse_rotalyze_output(filepath: str) -> Dict[Tuple[int, int], RotamerData]:
+def load_ensemble_rotamers(filepath: str, predictor: str) -> Dict[Tuple[int, int], RotamerData]:
+    # rotamers.csv from scripts/analysis/get_rotamers.py; models are numbered from 1 like rotalyze's
+    df = pd.read_csv(filepath, keep_default_na=False, na_values=[''])
+    df = df[df['predictor'] == predictor]
     data = {}
-    current_model = 1
-    prev_residue_num = -1
-    
-    with open(filepath, 'r') as f:
-        for line in f:
-            line = line.strip()
-            
-            if not line or line.startswith('residue:') or line.startswith('SUMMARY:'):
-                continue
-            
-            parts = line.split(':')
-            if len(parts) < 9:
-                continue
-            
-            residue_info = parts[0].strip()
-            match = re.match(r'([A-Z])\s+(\d+)\s+([A-Z]?)([A-Z]{3})', residue_info)
-            if not match:
-                continue
-            
-            chain = match.group(1)
-            residue_num = int(match.group(2))
-            alt_loc = match.group(3) 
-            residue_type = match.group(4)
-            
-            if residue_num < prev_residue_num:
-                current_model += 1
-            
-            prev_residue_num = residue_num
-            
-            chi1 = float(parts[3]) if parts[3].strip() else None
-            chi2 = float(parts[4]) if parts[4].strip() else None
-            chi3 = float(parts[5]) if parts[5].strip() else None
-            chi4 = float(parts[6]) if parts[6].strip() else None
-            
-            evaluation = parts[7].strip()
-            rotamer = parts[8].strip()
-            
-            rotamer_data = RotamerData(
-                chi1=chi1,
-                chi2=chi2,
-                chi3=chi3,
-                chi4=chi4,
-                evaluation=evaluation,
-                rotamer=rotamer
-            )
-            
-            key = (current_model, residue_num)
-            
-            data[key] = rotamer_data
-    
+    for row in df.itertuples(index=False):
+        chis = [None if pd.isna(value) else float(value) for value in (row.chi1, row.chi2, row.chi3, row.chi4)]
+        evaluation = "OUTLIER" if row.rotamer == "OUTLIER" else ""
+        data[(int(row.frame) + 1, int(row.residue))] = RotamerData(*chis, evaluation=evaluation, rotamer=row.rotamer)
     return data
 
 
-def parse_deposited_structure(filepath: str) -> Dict[int, str]:
-    deposited_rotamers = {}
-    
-    with open(filepath, 'r') as f:
-        for line in f:
-            line = line.strip()
-            
-            if not line or line.startswith('residue:') or line.startswith('SUMMARY:'):
-                continue
-            
-            parts = line.split(':')
-            if len(parts) < 9:
-                continue
-            
-            residue_info = parts[0].strip()
-            match = re.match(r'([A-Z])\s+(\d+)\s+([A-Z]?)([A-Z]{3})', residue_info)
-            if not match:
-                continue
-            
-            residue_num = int(match.group(2))
-            rotamer = parts[8].strip()
-            
-            if residue_num not in deposited_rotamers:
-                deposited_rotamers[residue_num] = rotamer
-    
-    return deposited_rotamers
+def load_deposited_rotamers(filepath: str) -> Dict[int, str]:
+    # rotamers_deposited.csv: the first altloc of each residue
+    df = pd.read_csv(filepath, keep_default_na=False, na_values=[''])
+    df = df.drop_duplicates('residue')
+    return dict(zip(df['residue'].astype(int), df['rotamer']))
 
 
 def calculate_rotamer_distribution(data: Dict[Tuple[int, int], RotamerData], 
@@ -133,11 +69,9 @@ if __name__ == "__main__":
     pdb_id = sys.argv[1].lower()
     predictor = sys.argv[2].lower()
 
-    rotalyze_path = f'./PDBs/{pdb_id}/{predictor}_bin/rotalyze/out.txt'
-    result = parse_rotalyze_output(rotalyze_path)
-    
-    deposited_path = f'./PDBs/{pdb_id}/rotalyze/out.txt'
-    deposited_rotamers = parse_deposited_structure(deposited_path)
+    # written by: python ./scripts/analysis/get_rotamers.py <pdb_id>
+    result = load_ensemble_rotamers(f'./PDBs/{pdb_id}/analysis/rotamers.csv', predictor)
+    deposited_rotamers = load_deposited_rotamers(f'./PDBs/{pdb_id}/analysis/rotamers_deposited.csv')
     
     print(f"Total entries: {len(result)}")
     num_models = max(k[0] for k in result.keys())